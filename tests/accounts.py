@@ -0,0 +1,113 @@
+"""
+Configuration and tokens of the test accounts.
+
+Shared by conftest.py and the command line tools (sweeper.py, seeding.py, pool.py, ...), which only need the
+credentials they actually use instead of the whole test session that conftest.py sets up.
+"""
+import os
+import requests
+from ratelimit import RateLimiter, default_profile
+from schemas import SchemaRegistry
+from schemathesis import Case
+from session import create_session
+from tokens import TokenCache
+from typing import Optional
+
+# The stand-in server and the replay of cassettes do not need real credentials
+STANDIN_DEFAULTS = {
+    'SEATABLE_SERVER': 'https://standin.seatable.local',
+    'SEATABLE_USERNAME': 'automated-testing@standin.local',
+    'SEATABLE_PASSWORD': 'standin-password',
+    'SEATABLE_ADMIN_USERNAME': 'automated-testing-admin@standin.local',
+    'SEATABLE_ADMIN_PASSWORD': 'standin-admin-password',
+} if os.environ.get('SEATABLE_STANDIN') == 'True' or os.environ.get('SEATABLE_CASSETTE') == 'replay' else {}
+
+BASE_URL = os.environ.get('SEATABLE_SERVER', STANDIN_DEFAULTS.get('SEATABLE_SERVER'))
+USERNAME = os.environ.get('SEATABLE_USERNAME', STANDIN_DEFAULTS.get('SEATABLE_USERNAME'))
+PASSWORD = os.environ.get('SEATABLE_PASSWORD', STANDIN_DEFAULTS.get('SEATABLE_PASSWORD'))
+ADMIN_USERNAME = os.environ.get('SEATABLE_ADMIN_USERNAME', STANDIN_DEFAULTS.get('SEATABLE_ADMIN_USERNAME'))
+ADMIN_PASSWORD = os.environ.get('SEATABLE_ADMIN_PASSWORD', STANDIN_DEFAULTS.get('SEATABLE_ADMIN_PASSWORD'))
+# Rate limits of the command line tools (see RATE_LIMITS in conftest.py)
+RATE_LIMITS = os.environ.get('SEATABLE_RATE_LIMITS', default_profile(BASE_URL or ''))
+
+# Tokens of the command line tools, refreshed if they expire soon or get rejected
+token_cache = TokenCache()
+
+class Secret:
+    """
+    Class to store a secret, ensures that the value will not be printed (e.g. if an assertion fails)
+    Based on https://github.com/pytest-dev/pytest/issues/8613#issuecomment-830011874
+    """
+    def __init__(self, value: str):
+        self.value = value
+
+    def __repr__(self):
+        return "Secret(********)"
+
+    def __str___(self):
+        return "*******"
+
+def require(**variables: Optional[str]):
+    """Exits with a message if one of the given environment variables (name=value) is not set"""
+    missing = [name for name, value in variables.items() if value is None]
+    if missing:
+        raise SystemExit(f'{", ".join(missing)} environment variable(s) not set')
+
+def connect() -> tuple[SchemaRegistry, requests.Session]:
+    """
+    Returns the schemas and the HTTP session for a command line tool, requires SEATABLE_SERVER.
+
+    Like the session of the tests, it waits for the rate limits, retries responses with status 429 and refreshes the
+    tokens returned by login() and get_api_token().
+    """
+    require(SEATABLE_SERVER=BASE_URL)
+    http_session = create_session()
+    RateLimiter(RATE_LIMITS).mount(http_session)
+    token_cache.mount(http_session)
+
+    return SchemaRegistry(base_url=BASE_URL, session=http_session), http_session
+
+def login(schemas: SchemaRegistry, admin: bool = False) -> Secret:
+    """Returns an account token of the test user (or the admin), requires its credentials"""
+    if admin:
+        require(SEATABLE_ADMIN_USERNAME=ADMIN_USERNAME, SEATABLE_ADMIN_PASSWORD=ADMIN_PASSWORD)
+        username, password = ADMIN_USERNAME, ADMIN_PASSWORD
+    else:
+        require(SEATABLE_USERNAME=USERNAME, SEATABLE_PASSWORD=PASSWORD)
+        username, password = USERNAME, PASSWORD
+
+    fetch = lambda: fetch_account_token(schemas, username, password)
+    return Secret(token_cache.get('account', f'{BASE_URL} {username}', fetch))
+
+def get_api_token(schemas: SchemaRegistry, account_token: Secret, workspace_id: int, base_name: str) -> Secret:
+    """Returns a temporary API token of the base, refreshed by the session of connect() once it expires"""
+    fetch = lambda: fetch_api_token(schemas, account_token, workspace_id, base_name)
+    return Secret(token_cache.get('api', f'{BASE_URL} {workspace_id}/{base_name}', fetch))
+
+def fetch_account_token(schemas: SchemaRegistry, username: str, password: str) -> str:
+    body = {"username": username, "password": password}
+
+    operation = schemas.get('authentication.yaml').get_operation_by_id('getAccountTokenfromUsername')
+    case: Case = operation.make_case(body=body)
+    response = case.call_and_validate()
+
+    assert response.status_code == 200
+
+    account_token = response.json()['token']
+    assert isinstance(account_token, str)
+
+    return account_token
+
+def fetch_api_token(schemas: SchemaRegistry, account_token: Secret, workspace_id: int, base_name: str) -> str:
+    path_parameters = {'workspace_id': workspace_id, 'base_name': base_name}
+    headers = {'Authorization': f'Bearer {account_token.value}'}
+    case: Case = schemas.get('authentication.yaml').get_operation_by_id('createTempApiToken') \
+        .make_case(path_parameters=path_parameters, headers=headers)
+    response = case.call_and_validate()
+
+    assert response.status_code == 200
+
+    api_token = response.json()['api_token']
+    assert isinstance(api_token, str)
+
+    return api_token
@@ -0,0 +1,64 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+# Operations whose latency is compared with the baseline
+GATED_OPERATIONS = os.environ.get('PERF_GATED_OPERATIONS', 'listRows,querySQL,appendRows').split(',')
+
+# A gated operation regresses if its median latency exceeds the baseline by this factor ...
+THRESHOLD = float(os.environ.get('PERF_REGRESSION_THRESHOLD', '1.5'))
+# ... and by at least this many milliseconds (to ignore noise of very fast operations)
+MIN_DELTA_MS = float(os.environ.get('PERF_REGRESSION_MIN_DELTA_MS', '50'))
+
+# 'fail' fails the test, 'warn' only emits a PerformanceRegressionWarning
+MODE = os.environ.get('PERF_REGRESSION_MODE', 'fail')
+assert MODE in ['fail', 'warn'], "PERF_REGRESSION_MODE environment variable must be either 'fail' or 'warn'"
+
+class PerformanceRegressionWarning(UserWarning):
+    pass
+
+def baseline_path(snapshot_dir: Path, test_name: str) -> Path:
+    """
+    Baselines mirror the layout of the snapshots, e.g. __baselines__/test_base_operations/test_listRows[listRows].json
+
+    They cannot be stored inside __snapshots__, since syrupy would report them as unused snapshots.
+    """
+    parts = ['__baselines__' if part == '__snapshots__' else part for part in snapshot_dir.parts]
+    return Path(*parts) / f'{test_name}.json'
+
+def read_baseline(path: Path) -> Optional[dict[str, Any]]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def write_baseline(path: Path, summary: dict[str, dict[str, Any]]):
+    """Stores the latency percentiles of all operations called by a test"""
+    baseline = {
+        operation_id: {'count': statistics['count'], 'latency': statistics['latency'], 'ttfb': statistics['ttfb']}
+        for operation_id, statistics in summary.items()
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+def find_regressions(baseline: dict[str, Any], summary: dict[str, dict[str, Any]]) -> list[str]:
+    """Returns a message for every gated operation that got slower than the baseline allows"""
+    regressions = []
+
+    for operation_id in GATED_OPERATIONS:
+        if operation_id not in baseline or operation_id not in summary:
+            continue
+
+        expected = baseline[operation_id]['latency']['p50']
+        actual = summary[operation_id]['latency']['p50']
+
+        if actual > expected * THRESHOLD and (actual - expected) * 1000 >= MIN_DELTA_MS:
+            factor = f'{actual / expected:.2f}x' if expected else 'n/a'
+            regressions.append(
+                f'{operation_id}: median latency {actual * 1000:.1f} ms, baseline {expected * 1000:.1f} ms '
+                f'({factor}, threshold {THRESHOLD}x)'
+            )
+
+    return regressions
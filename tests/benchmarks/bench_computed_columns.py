@@ -0,0 +1,154 @@
+"""
+Cost of computed columns (formula and link-formula) when reading rows.
+
+For every size in BENCH_COMPUTED_ROW_COUNTS and every fan-out in BENCH_LINK_FANOUTS, two tables of that size are created
+and every row of the first table is linked to `fan-out` random rows of the second one (see links.py). The columns in
+COMPUTED_COLUMNS are then added one at a time. Before the first and after every added column, a page of rows is read
+with listRows and querySQL BENCH_ITERATIONS times. The difference of the median latency to the previous step is the cost of the added column.
+
+Run with: BENCH_COMPUTED_ROW_COUNTS=1000 BENCH_LINK_FANOUTS=1,10 pytest benchmarks/bench_computed_columns.py -s
+"""
+import json
+import os
+import time
+from conftest import Base, base_operations_schema, schemas
+from datagen import RowGenerator
+from links import Linker, link_graph
+from metrics import percentile
+from pathlib import Path
+from requests import Response
+from seeding import Seeder
+from test_base_operations import create_table, insert_column
+from typing import Callable
+
+ROW_COUNTS = sorted(int(count) for count in os.environ.get('BENCH_COMPUTED_ROW_COUNTS', '1000,10000').split(','))
+FANOUTS = sorted(int(fanout) for fanout in os.environ.get('BENCH_LINK_FANOUTS', '1,10').split(','))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 5))
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'computed_columns.json'))
+
+# Rows read per request, listRows returns at most 1,000 rows
+PAGE_SIZE = 1000
+
+COLUMNS = [
+    {'column_name': 'text', 'column_type': 'text'},
+    {'column_name': 'number', 'column_type': 'number'},
+    {'column_name': 'date', 'column_type': 'date', 'column_data': {'format': 'YYYY-MM-DD'}},
+]
+
+# Added one at a time in this order, link-formula columns refer to the link column 'link'
+COMPUTED_COLUMNS = [
+    {'column_name': 'formula-arithmetic', 'column_type': 'formula', 'column_data': {'formula': '{number} * 2 + 1'}},
+    {'column_name': 'formula-concatenate', 'column_type': 'formula', 'column_data': {'formula': 'concatenate({text}, "-", {number})'}},
+    {'column_name': 'formula-if', 'column_type': 'formula', 'column_data': {'formula': 'if({number} > 500000, "high", "low")'}},
+    {'column_name': 'formula-date-add', 'column_type': 'formula', 'column_data': {'formula': "dateAdd({date}, 1, 'year')"}},
+    {'column_name': 'link-formula-lookup', 'column_type': 'link-formula',
+     'column_data': {'formula': 'lookup', 'link_column': 'link', 'level1_linked_column': 'number'}},
+    {'column_name': 'link-formula-countlinks', 'column_type': 'link-formula',
+     'column_data': {'formula': 'count_links', 'link_column': 'link'}},
+    {'column_name': 'link-formula-rollup-average', 'column_type': 'link-formula',
+     'column_data': {'formula': 'rollup', 'link_column': 'link', 'summary_column': 'number', 'summary_method': 'average'}},
+    {'column_name': 'link-formula-rollup-max', 'column_type': 'link-formula',
+     'column_data': {'formula': 'rollup', 'link_column': 'link', 'summary_column': 'number', 'summary_method': 'max'}},
+    {'column_name': 'link-formula-rollup-concatenate', 'column_type': 'link-formula',
+     'column_data': {'formula': 'rollup', 'link_column': 'link', 'summary_column': 'number', 'summary_method': 'concatenate'}},
+    {'column_name': 'link-formula-findmax', 'column_type': 'link-formula',
+     'column_data': {'formula': 'findmax', 'link_column': 'link', 'searched_column': 'number', 'comparison_column': 'number'}},
+    {'column_name': 'link-formula-findmin', 'column_type': 'link-formula',
+     'column_data': {'formula': 'findmin', 'link_column': 'link', 'searched_column': 'number', 'comparison_column': 'number'}},
+]
+
+def test_computed_columns(base: Base):
+    results = []
+
+    for row_count in ROW_COUNTS:
+        for fanout in FANOUTS:
+            table_name = f'bench_computed_{row_count}_{fanout}'
+            setup_tables(base, table_name, row_count, fanout)
+
+            previous = {}
+            # None: only the plain columns and the link column
+            for column in [None, *COMPUTED_COLUMNS]:
+                if column is not None:
+                    insert_column(base, {'table_name': table_name, **column})
+
+                for operation_id, latencies in measure(base, table_name).items():
+                    p50 = percentile(latencies, 50)
+                    results.append({
+                        'row_count': row_count,
+                        'fanout': fanout,
+                        'operation': operation_id,
+                        'column': column['column_name'] if column else None,
+                        'column_type': column['column_type'] if column else None,
+                        'latency_p50': round(p50, 4),
+                        'latency_p95': round(percentile(latencies, 95), 4),
+                        # Cost of the added column
+                        'delta_p50': round(p50 - previous[operation_id], 4) if operation_id in previous else None,
+                    })
+                    previous[operation_id] = p50
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(f'{"column":<32} {"operation":<9} {"rows":>7} {"fanout":>6} {"p50 ms":>8} {"p95 ms":>8} {"cost ms":>8}')
+    for result in results:
+        if result['column'] is None:
+            continue
+        print(
+            f'{result["column"]:<32} {result["operation"]:<9} {result["row_count"]:>7} {result["fanout"]:>6} '
+            f'{result["latency_p50"] * 1000:>8.1f} {result["latency_p95"] * 1000:>8.1f} {result["delta_p50"] * 1000:>8.1f}'
+        )
+    print(f'Results: {OUTPUT_FILE}')
+
+def setup_tables(base: Base, table_name: str, row_count: int, fanout: int):
+    """Creates `table_name` and `table_name`_linked with `row_count` rows each, linked by the column 'link'"""
+    other_table_name = f'{table_name}_linked'
+    table_id = create_table(base, table_name, COLUMNS)
+    other_table_id = create_table(base, other_table_name, COLUMNS)
+
+    seeder = Seeder(schemas, base.uuid, base.token)
+    row_ids, other_row_ids = [], []
+    seeder.seed(table_name, RowGenerator(COLUMNS, seed=0).rows(row_count), on_row_ids=row_ids.extend)
+    seeder.seed(other_table_name, RowGenerator(COLUMNS, seed=1).rows(row_count), on_row_ids=other_row_ids.extend)
+
+    body = {
+        'table_name': table_name,
+        'column_name': 'link',
+        'column_type': 'link',
+        'column_data': {'table': table_name, 'other_table': other_table_name},
+    }
+    link_id = insert_column(base, body).json()['data']['link_id']
+
+    Linker(schemas, base.uuid, base.token, table_id, other_table_id, link_id).link(link_graph(row_ids, other_row_ids, fanout))
+
+def measure(base: Base, table_name: str) -> dict[str, list[float]]:
+    """Reads a page of rows with listRows and querySQL ITERATIONS times (alternating) and returns the latencies"""
+    path_parameters = {'base_uuid': base.uuid}
+    headers = {'Authorization': f'Bearer {base.token}'}
+    requests = {
+        'listRows': lambda: base_operations_schema.get_operation_by_id('listRows').make_case(
+            path_parameters=path_parameters, headers=headers,
+            query={'table_name': table_name, 'start': 0, 'limit': PAGE_SIZE, 'convert_keys': True},
+        ).call(),
+        'querySQL': lambda: base_operations_schema.get_operation_by_id('querySQL').make_case(
+            path_parameters=path_parameters, headers=headers,
+            body={'sql': f'SELECT * FROM `{table_name}` LIMIT {PAGE_SIZE}', 'convert_keys': True},
+        ).call(),
+    }
+
+    latencies = {operation_id: [] for operation_id in requests}
+    for _ in range(ITERATIONS):
+        for operation_id, request in requests.items():
+            latencies[operation_id].append(timed(operation_id, request))
+
+    return latencies
+
+def timed(operation_id: str, request: Callable[[], Response]) -> float:
+    start = time.perf_counter()
+    response: Response = request()
+    # Set by TimingAdapter (see metrics.py), which does not include time spent waiting for the rate limits
+    seconds = response.timing[1] if hasattr(response, 'timing') else time.perf_counter() - start
+
+    assert response.status_code == 200, f'{operation_id} failed: {response.text}'
+
+    return seconds
@@ -0,0 +1,205 @@
+"""
+Compares the deprecated base operations with their current counterparts.
+
+The pairs are found by matching the operation IDs of base_operations_deprecated.yaml (e.g. listRowsDeprecated) with
+those of base_operations.yaml (listRows). Every pair with an entry in REQUESTS is called BENCH_ITERATIONS times on the
+same seeded table. The calls are interleaved (current and deprecated take turns, alternating which one goes first), so
+that changing server load affects both sides alike. Latency, throughput, response size and rate-limit cost are printed
+per pair and written to BENCH_OUTPUT.
+
+Run with: BENCH_ITERATIONS=20 pytest benchmarks/bench_deprecated.py -s
+"""
+import json
+import os
+from columns import COLUMNS
+from conftest import Base, base_operations_deprecated_schema, base_operations_schema, schemas
+from datagen import RowGenerator
+from metrics import FIELDS, Metrics, distribution
+from pathlib import Path
+from pyrate_limiter import Duration
+from ratelimit import RateLimiter
+from requests import Response
+from seeding import Seeder
+from test_base_operations import create_table
+from typing import Any, Callable, Optional
+
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 20))
+# The first calls of each operation open connections and warm up caches on the server, they are not measured
+WARMUP = 2
+# Comma-separated operation IDs (without the suffix) to compare, all pairs with a request by default
+SELECTED_PAIRS = [name for name in os.environ.get('BENCH_PAIRS', '').split(',') if name]
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'deprecated.json'))
+
+TABLE_NAME = 'bench_deprecated'
+ROW_COUNT = 1000
+# Rows sent by each appendRows call
+APPEND_ROWS = 100
+
+SUFFIX = 'Deprecated'
+
+def test_deprecated_vs_current(base: Base):
+    pairs = [pair for pair in operation_pairs() if not SELECTED_PAIRS or pair[0] in SELECTED_PAIRS]
+    measured = [pair for pair in pairs if pair[0] in REQUESTS]
+    assert measured, f'None of the pairs {[pair[0] for pair in pairs]} has a request in REQUESTS'
+
+    create_table(base, TABLE_NAME, COLUMNS)
+    row_ids = []
+    Seeder(schemas, base.uuid, base.token).seed(TABLE_NAME, RowGenerator(COLUMNS).rows(ROW_COUNT), on_row_ids=row_ids.extend)
+    context = {'row_ids': row_ids, 'append_rows': list(RowGenerator(COLUMNS, seed=1).rows(APPEND_ROWS))}
+
+    metrics = Metrics()
+    for iteration in range(WARMUP + ITERATIONS):
+        for current, deprecated in measured:
+            # Alternate the order, so neither side always profits from the other one warming up the server
+            order = [(current, current), (current, deprecated)]
+            if iteration % 2:
+                order.reverse()
+
+            for name, operation_id in order:
+                response = REQUESTS[name](base, operation_id, iteration, context)
+                assert response.status_code == 200, f'{operation_id} failed: {response.text}'
+                if iteration >= WARMUP:
+                    metrics.record(operation_id, response)
+
+    results = [compare(metrics, current, deprecated) for current, deprecated in measured]
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps({
+        'iterations': ITERATIONS,
+        'results': results,
+        'not_measured': [current for current, _ in pairs if current not in REQUESTS],
+    }, indent=2))
+
+    print()
+    print(f'{"operation":<12} {"side":<10} {"p50 ms":>8} {"p95 ms":>8} {"calls/s":>8} {"bytes":>8} {"calls/h":>8} {"retries":>7} {"p50 ratio":>9}')
+    for result in results:
+        for side in ('current', 'deprecated'):
+            statistics = result[side]
+            print(
+                f'{result["operation"] if side == "current" else "":<12} {side:<10} '
+                f'{statistics["latency"]["p50"] * 1000:>8.1f} {statistics["latency"]["p95"] * 1000:>8.1f} '
+                f'{statistics["calls_per_second"]:>8.1f} {statistics["response_bytes"]:>8.0f} '
+                f'{statistics["rate_limit"]["calls_per_hour"] or "-":>8} {statistics["retries"]:>7} '
+                f'{result["latency_p50_ratio"] if side == "current" else "":>9}'
+            )
+    print(f'Not measured (no request defined): {", ".join(current for current, _ in pairs if current not in REQUESTS)}')
+    print(f'Results: {OUTPUT_FILE}')
+
+def operation_pairs() -> list[tuple[str, str]]:
+    """Returns (current operation ID, deprecated operation ID) for every deprecated operation that has a counterpart"""
+    current = schemas.operation_paths('base_operations.yaml')
+    deprecated = schemas.operation_paths('base_operations_deprecated.yaml')
+
+    return sorted(
+        (operation_id.removesuffix(SUFFIX), operation_id)
+        for operation_id in deprecated
+        if operation_id.endswith(SUFFIX) and operation_id.removesuffix(SUFFIX) in current
+    )
+
+def compare(metrics: Metrics, current: str, deprecated: str) -> dict[str, Any]:
+    result = {'operation': current, 'current': statistics(metrics, current), 'deprecated': statistics(metrics, deprecated)}
+
+    # Below 1 means the current operation is faster
+    for key in ('p50', 'p95'):
+        result[f'latency_{key}_ratio'] = round(result['current']['latency'][key] / result['deprecated']['latency'][key], 2)
+    result['response_bytes_ratio'] = round(result['current']['response_bytes'] / (result['deprecated']['response_bytes'] or 1), 2)
+
+    return result
+
+def statistics(metrics: Metrics, operation_id: str) -> dict[str, Any]:
+    columns = dict(zip(FIELDS, zip(*metrics.samples[operation_id])))
+    method, path = operation_path(operation_id)
+
+    return {
+        'operation_id': operation_id,
+        'method': method.upper(),
+        'path': path,
+        'calls': len(columns['latency']),
+        'latency': distribution(columns['latency']),
+        # Sequential calls per second, i.e. the inverse of the mean latency
+        'calls_per_second': round(len(columns['latency']) / sum(columns['latency']), 2),
+        'response_bytes': sum(columns['response_bytes']) / len(columns['response_bytes']),
+        'retries': sum(columns['retries']),
+        'rate_limit': rate_limit_cost(method, path),
+    }
+
+def operation_path(operation_id: str) -> tuple[str, str]:
+    filename = 'base_operations_deprecated.yaml' if operation_id.endswith(SUFFIX) else 'base_operations.yaml'
+    return schemas.operation_paths(filename)[operation_id]
+
+def rate_limit_cost(method: str, path: str) -> dict[str, Any]:
+    """
+    Returns the endpoint classes a call counts against (with the documented limits of SeaTable Cloud) and the number of
+    calls per hour that can be sustained without exceeding any of them (None if the endpoint is not limited)
+    """
+    limiter = RateLimiter('cloud')
+    classes = {}
+    calls_per_hour = None
+
+    for endpoint_class, _ in limiter.buckets(method.upper(), path):
+        rates = limiter.rates(endpoint_class)
+        classes[endpoint_class.name] = [f'{rate.limit} per {int(rate.interval) // 1000} s' for rate in rates]
+        for rate in rates:
+            sustained = rate.limit * int(Duration.HOUR) // int(rate.interval)
+            calls_per_hour = sustained if calls_per_hour is None else min(calls_per_hour, sustained)
+
+    return {'classes': classes, 'calls_per_hour': calls_per_hour}
+
+def schema_for(operation_id: str) -> Any:
+    return base_operations_deprecated_schema if operation_id.endswith(SUFFIX) else base_operations_schema
+
+def call(operation_id: str, base: Base, query: Optional[dict] = None, body: Optional[dict] = None,
+         path_parameters: Optional[dict] = None) -> Response:
+    """
+    Calls the operation without validating the response, validation would take longer than some of the calls.
+    The test suite already validates both variants.
+    """
+    headers = {'Authorization': f'Bearer {base.token}'}
+    path_parameters = {'base_uuid': base.uuid, **(path_parameters or {})}
+    # body=None makes schemathesis look up the request body of operations that have none (e.g. getRow)
+    kwargs = {'body': body} if body is not None else {}
+
+    return schema_for(operation_id).get_operation_by_id(operation_id) \
+        .make_case(path_parameters=path_parameters, query=query, headers=headers, **kwargs).call()
+
+def list_rows(base: Base, operation_id: str, iteration: int, context: dict) -> Response:
+    query = {'table_name': TABLE_NAME, 'start': 0, 'limit': ROW_COUNT}
+    if not operation_id.endswith(SUFFIX):
+        query['convert_keys'] = True
+
+    return call(operation_id, base, query=query)
+
+def get_row(base: Base, operation_id: str, iteration: int, context: dict) -> Response:
+    query = {'table_name': TABLE_NAME}
+    if not operation_id.endswith(SUFFIX):
+        query['convert_keys'] = True
+    row_id = context['row_ids'][iteration % len(context['row_ids'])]
+
+    return call(operation_id, base, query=query, path_parameters={'row_id': row_id})
+
+def query_sql(base: Base, operation_id: str, iteration: int, context: dict) -> Response:
+    body = {'sql': f'SELECT * FROM {TABLE_NAME} LIMIT {ROW_COUNT}', 'convert_keys': True}
+    return call(operation_id, base, body=body)
+
+def append_rows(base: Base, operation_id: str, iteration: int, context: dict) -> Response:
+    return call(operation_id, base, body={'table_name': TABLE_NAME, 'rows': context['append_rows']})
+
+def update_row(base: Base, operation_id: str, iteration: int, context: dict) -> Response:
+    row_id = context['row_ids'][iteration % len(context['row_ids'])]
+    row = {'text': f'updated-{iteration}'}
+
+    if operation_id.endswith(SUFFIX):
+        body = {'table_name': TABLE_NAME, 'row_id': row_id, 'row': row}
+    else:
+        body = {'table_name': TABLE_NAME, 'updates': [{'row_id': row_id, 'row': row}]}
+
+    return call(operation_id, base, body=body)
+
+# Current operation ID -> function sending one request for either operation of the pair
+REQUESTS: dict[str, Callable[[Base, str, int, dict], Response]] = {
+    'listRows': list_rows,
+    'getRow': get_row,
+    'querySQL': query_sql,
+    'appendRows': append_rows,
+    'updateRow': update_row,
+}
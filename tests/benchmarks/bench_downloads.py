@@ -0,0 +1,76 @@
+"""
+Download throughput of the asset exporter against the number and size of assets.
+
+For every count in BENCH_DOWNLOAD_FILES and every size in BENCH_DOWNLOAD_SIZES_KB, random files are uploaded (see
+uploads.py) and referenced from the file column of a table. The table is walked and its assets are exported to an empty
+directory with every concurrency in BENCH_DOWNLOAD_CONCURRENCY (see downloads.py). Files per second, megabytes per
+second and the time spent walking the cells are printed and written to BENCH_OUTPUT.
+
+Run with: BENCH_DOWNLOAD_FILES=10,100 BENCH_DOWNLOAD_SIZES_KB=16,1024 BENCH_DOWNLOAD_CONCURRENCY=1,4,8 pytest benchmarks/bench_downloads.py -s
+"""
+import json
+import os
+import time
+from conftest import Base, http_session, schemas
+from downloads import AssetExporter
+from pathlib import Path
+from test_base_operations import append_rows, create_table
+from uploads import Uploader
+
+FILE_COUNTS = sorted(int(count) for count in os.environ.get('BENCH_DOWNLOAD_FILES', '10,100').split(','))
+SIZES_KB = sorted(int(size) for size in os.environ.get('BENCH_DOWNLOAD_SIZES_KB', '16,1024').split(','))
+CONCURRENCY = sorted(int(limit) for limit in os.environ.get('BENCH_DOWNLOAD_CONCURRENCY', '1,4,8').split(','))
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'downloads.json'))
+
+def test_downloads(base: Base, tmp_path: Path):
+    results = []
+
+    for file_count in FILE_COUNTS:
+        for size_kb in SIZES_KB:
+            table_name = f'bench_downloads_{file_count}_{size_kb}'
+            setup_table(base, table_name, tmp_path / 'sources' / table_name, file_count, size_kb)
+
+            for concurrency in CONCURRENCY:
+                exporter = AssetExporter(schemas, http_session, base.uuid, base.token, base.api_token,
+                                         tmp_path / 'export' / f'{table_name}_{concurrency}', concurrency=concurrency)
+                start = time.perf_counter()
+                assets = exporter.assets([table_name])
+                walk_seconds = time.perf_counter() - start
+
+                result = exporter.export(assets)
+                assert len(result.files) == file_count
+
+                results.append({
+                    'files': file_count,
+                    'size_kb': size_kb,
+                    'concurrency': concurrency,
+                    'walk_seconds': round(walk_seconds, 4),
+                    'seconds': round(result.seconds, 4),
+                    'files_per_second': round(result.files_per_second, 1),
+                    'megabytes_per_second': round(result.megabytes_per_second, 2),
+                })
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(f'{"files":>6} {"size KB":>8} {"concurrency":>11} {"walk s":>7} {"seconds":>8} {"files/s":>8} {"MB/s":>7}')
+    for result in results:
+        print(
+            f'{result["files"]:>6} {result["size_kb"]:>8} {result["concurrency"]:>11} {result["walk_seconds"]:>7.1f} '
+            f'{result["seconds"]:>8.1f} {result["files_per_second"]:>8.1f} {result["megabytes_per_second"]:>7.2f}'
+        )
+    print(f'Results: {OUTPUT_FILE}')
+
+def setup_table(base: Base, table_name: str, directory: Path, file_count: int, size_kb: int):
+    """Uploads `file_count` random files and adds a row for each of them to `table_name`"""
+    directory.mkdir(parents=True)
+    paths = []
+    for i in range(file_count):
+        path = directory / f'{table_name}_{i}.bin'
+        path.write_bytes(os.urandom(size_kb * 1024))
+        paths.append(path)
+
+    create_table(base, table_name, [{'column_name': 'files', 'column_type': 'file'}])
+    uploaded = Uploader(schemas, http_session, base.api_token, base.workspace_id).upload_many(paths, image=False)
+    append_rows(base, table_name, [{'files': [file.cell_value]} for file in uploaded.files])
@@ -0,0 +1,142 @@
+"""
+Link workload benchmark for n:m links between two tables.
+
+For every size in BENCH_LINK_ROW_COUNTS and every density in BENCH_LINKS_PER_ROW, two tables of that size are linked so
+that every row is linked to `links per row` random rows of the other table (see links.py). The links are created with
+createRowLink and replaced with updateRowLink and updateRowLinksDeprecated, measuring links per second. Afterwards
+listRowLinks (with the default limit and with a limit covering all links) and listRows are called BENCH_ITERATIONS times.
+The number of linked rows these return per row shows where the results are cut off (listRowLinks returns 10 linked rows
+unless a limit is given). The results are printed and written to BENCH_OUTPUT.
+
+Run with: BENCH_LINK_ROW_COUNTS=1000 BENCH_LINKS_PER_ROW=1,10,50 pytest benchmarks/bench_links.py -s
+"""
+import json
+import os
+import time
+from conftest import Base, base_operations_schema, schemas
+from datagen import RowGenerator
+from links import Linker, link_graph
+from metrics import distribution
+from pathlib import Path
+from requests import Response
+from seeding import Seeder
+from test_base_operations import create_table, insert_column
+from typing import Any, Callable, Optional
+
+ROW_COUNTS = sorted(int(count) for count in os.environ.get('BENCH_LINK_ROW_COUNTS', '1000,10000').split(','))
+LINKS_PER_ROW = sorted(int(count) for count in os.environ.get('BENCH_LINKS_PER_ROW', '1,10,50').split(','))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 5))
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'links.json'))
+
+# Rows whose links are requested with a single listRowLinks call
+LIST_LINKS_ROWS = 100
+# Rows read with a single listRows call
+LIST_ROWS_PAGE_SIZE = 1000
+
+COLUMNS = [
+    {'column_name': 'text', 'column_type': 'text'},
+    {'column_name': 'number', 'column_type': 'number'},
+]
+
+def test_links(base: Base):
+    results = []
+
+    for row_count in ROW_COUNTS:
+        for links_per_row in LINKS_PER_ROW:
+            table_name = f'bench_links_{row_count}_{links_per_row}'
+            linker, row_ids, other_row_ids = setup_tables(base, table_name, row_count)
+
+            result: dict[str, Any] = {'row_count': row_count, 'links_per_row': links_per_row, 'writes': {}, 'reads': {}}
+            # Every operation gets a different graph, so the update operations actually change the links
+            for seed, operation_id in enumerate(['createRowLink', 'updateRowLink', 'updateRowLinksDeprecated']):
+                link_result = linker.link(link_graph(row_ids, other_row_ids, links_per_row, seed=seed), operation_id)
+                result['writes'][operation_id] = {
+                    'links': link_result.links,
+                    'requests': link_result.requests,
+                    'seconds': round(link_result.seconds, 4),
+                    'links_per_second': round(link_result.links_per_second),
+                }
+
+            reads = {
+                'listRowLinks': lambda: list_row_links(base, table_name, row_ids[:LIST_LINKS_ROWS], limit=None),
+                'listRowLinks (limit)': lambda: list_row_links(base, table_name, row_ids[:LIST_LINKS_ROWS], limit=links_per_row),
+                'listRows': lambda: list_rows(base, table_name),
+            }
+            for name, read in reads.items():
+                result['reads'][name] = measure(name, read)
+
+            results.append(result)
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(f'{"rows":>7} {"links/row":>9} {"operation":<26} {"links/s":>9} {"p50 ms":>8} {"p95 ms":>8} {"linked rows":>11}')
+    for result in results:
+        for operation_id, write in result['writes'].items():
+            print(f'{result["row_count"]:>7} {result["links_per_row"]:>9} {operation_id:<26} {write["links_per_second"]:>9} {"":>8} {"":>8} {"":>11}')
+        for name, read in result['reads'].items():
+            print(
+                f'{result["row_count"]:>7} {result["links_per_row"]:>9} {name:<26} {"":>9} '
+                f'{read["latency"]["p50"] * 1000:>8.1f} {read["latency"]["p95"] * 1000:>8.1f} {read["max_linked_rows"]:>11}'
+            )
+    print(f'Results: {OUTPUT_FILE}')
+
+def setup_tables(base: Base, table_name: str, row_count: int) -> tuple[Linker, list[str], list[str]]:
+    """Creates `table_name` and `table_name`_linked with `row_count` rows each and the link column 'link'"""
+    other_table_name = f'{table_name}_linked'
+    table_id = create_table(base, table_name, COLUMNS)
+    other_table_id = create_table(base, other_table_name, COLUMNS)
+
+    seeder = Seeder(schemas, base.uuid, base.token)
+    row_ids, other_row_ids = [], []
+    seeder.seed(table_name, RowGenerator(COLUMNS, seed=0).rows(row_count), on_row_ids=row_ids.extend)
+    seeder.seed(other_table_name, RowGenerator(COLUMNS, seed=1).rows(row_count), on_row_ids=other_row_ids.extend)
+
+    body = {
+        'table_name': table_name,
+        'column_name': 'link',
+        'column_type': 'link',
+        'column_data': {'table': table_name, 'other_table': other_table_name},
+    }
+    link_id = insert_column(base, body).json()['data']['link_id']
+
+    return Linker(schemas, base.uuid, base.token, table_id, other_table_id, link_id), row_ids, other_row_ids
+
+def list_row_links(base: Base, table_name: str, row_ids: list[str], limit: Optional[int] = None) -> tuple[Response, list[int]]:
+    rows = [{'row_id': row_id} if limit is None else {'row_id': row_id, 'limit': limit} for row_id in row_ids]
+    body = {'table_name': table_name, 'link_column_name': 'link', 'rows': rows}
+
+    response = base_operations_schema.get_operation_by_id('listRowLinks') \
+        .make_case(path_parameters={'base_uuid': base.uuid}, body=body, headers={'Authorization': f'Bearer {base.token}'}) \
+        .call()
+
+    return response, [len(linked_rows) for linked_rows in response.json().values()] if response.status_code == 200 else []
+
+def list_rows(base: Base, table_name: str) -> tuple[Response, list[int]]:
+    query = {'table_name': table_name, 'start': 0, 'limit': LIST_ROWS_PAGE_SIZE, 'convert_keys': True}
+
+    response = base_operations_schema.get_operation_by_id('listRows') \
+        .make_case(path_parameters={'base_uuid': base.uuid}, query=query, headers={'Authorization': f'Bearer {base.token}'}) \
+        .call()
+
+    return response, [len(row.get('link') or []) for row in response.json()['rows']] if response.status_code == 200 else []
+
+def measure(name: str, read: Callable[[], tuple[Response, list[int]]]) -> dict[str, Any]:
+    """Calls `read` ITERATIONS times and returns its latencies and the largest number of linked rows returned for a row"""
+    latencies = []
+    linked_rows = []
+
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        response, linked_rows = read()
+        # Set by TimingAdapter (see metrics.py), which does not include time spent waiting for the rate limits
+        latencies.append(response.timing[1] if hasattr(response, 'timing') else time.perf_counter() - start)
+
+        assert response.status_code == 200, f'{name} failed: {response.text}'
+
+    return {
+        'latency': distribution(tuple(latencies)),
+        'response_bytes': len(response.content),
+        'max_linked_rows': max(linked_rows, default=0),
+    }
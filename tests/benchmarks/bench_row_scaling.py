@@ -0,0 +1,154 @@
+"""
+Row-count scaling benchmark for reading whole tables.
+
+A table with the columns of columns.py is grown to every size in BENCH_ROW_COUNTS. At each size, the whole
+table is read with listRows and listRowsDeprecated (start/limit paging) and with querySQL (LIMIT/OFFSET paging, ordered
+by _id). Rows beyond NORMAL_BACKEND_LIMIT go to the big data backend, which only querySQL reads.
+Throughput and page latencies are printed per operation and size, and written to BENCH_OUTPUT. They only count the
+time the server took; the time spent waiting for the rate limits (including backoff after status 429) is reported as
+throttled seconds.
+
+Run with: BENCH_ROW_COUNTS=1000,10000 pytest benchmarks/bench_row_scaling.py -s
+
+The default sizes (up to 1,000,000 rows) need several thousand requests, mind the rate limits of the server.
+"""
+import json
+import os
+import time
+from columns import COLUMNS
+from conftest import Base, base_operations_deprecated_schema, base_operations_schema, schemas
+from datagen import RowGenerator
+from metrics import percentile
+from pathlib import Path
+from requests import Response
+from seeding import Seeder
+from test_base_operations import create_table
+from typing import Any, Iterator
+
+ROW_COUNTS = sorted(int(count) for count in os.environ.get('BENCH_ROW_COUNTS', '1000,10000,100000,1000000').split(','))
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'row_scaling.json'))
+
+# listRows returns at most 1,000 rows per request, querySQL at most 10,000 rows
+LIST_PAGE_SIZE = 1000
+SQL_PAGE_SIZE = 10_000
+# The normal backend holds up to 100,000 rows per base, all further rows are added to the big data backend
+NORMAL_BACKEND_LIMIT = 100_000
+# listRows and listRowsDeprecated return no rows from the big data backend
+BIG_DATA_READERS = {'querySQL'}
+
+TABLE_NAME = 'bench_row_scaling'
+
+def test_row_scaling(base: Base):
+    create_table(base, TABLE_NAME, COLUMNS)
+
+    results = []
+    row_count = 0
+    # The table only grows, so every row is added once
+    for target in ROW_COUNTS:
+        seed(base, row_count, target)
+        row_count = target
+
+        for operation_id in PAGINATORS:
+            result = read_table(base, operation_id)
+            expected = row_count if operation_id in BIG_DATA_READERS else min(row_count, NORMAL_BACKEND_LIMIT)
+            assert result['rows'] == expected, f'{operation_id} returned {result["rows"]} of {expected} rows'
+            results.append({'row_count': row_count, 'operation': operation_id, **result})
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(
+        f'{"operation":<20} {"rows":>9} {"pages":>6} {"seconds":>8} {"throttled":>9} {"rows/s":>9} {"p50 ms":>8} {"p95 ms":>8} '
+        f'{"bytes/row":>9}'
+    )
+    for result in sorted(results, key=lambda r: (r['operation'], r['row_count'])):
+        print(
+            f'{result["operation"]:<20} {result["row_count"]:>9} {result["pages"]:>6} {result["seconds"]:>8.2f} '
+            f'{result["throttled_seconds"]:>9.2f} {result["rows_per_second"]:>9.0f} {result["latency_p50"] * 1000:>8.1f} {result["latency_p95"] * 1000:>8.1f} '
+            f'{result["bytes_per_row"]:>9.0f}'
+        )
+    print(f'Results: {OUTPUT_FILE}')
+
+def seed(base: Base, start: int, stop: int):
+    """Adds the rows with the numbers start..stop-1"""
+    seeder = Seeder(schemas, base.uuid, base.token)
+
+    if start < NORMAL_BACKEND_LIMIT:
+        seeder.seed(TABLE_NAME, numbered_rows(start, min(stop, NORMAL_BACKEND_LIMIT)))
+    if stop > NORMAL_BACKEND_LIMIT:
+        seeder.seed(TABLE_NAME, numbered_rows(max(start, NORMAL_BACKEND_LIMIT), stop), big_data=True)
+
+def numbered_rows(start: int, stop: int) -> Iterator[dict]:
+    # Row number i always gets the same values, so every size contains the same rows
+    return RowGenerator(COLUMNS).rows(stop - start, start=start)
+
+def list_rows_page(base: Base, operation_id: str, offset: int) -> Response:
+    query = {'table_name': TABLE_NAME, 'start': offset, 'limit': LIST_PAGE_SIZE}
+    headers = {'Authorization': f'Bearer {base.token}'}
+
+    if operation_id == 'listRowsDeprecated':
+        operation = base_operations_deprecated_schema.get_operation_by_id(operation_id)
+    elif operation_id == 'listRows':
+        query['convert_keys'] = True
+        operation = base_operations_schema.get_operation_by_id(operation_id)
+
+    return operation.make_case(path_parameters={'base_uuid': base.uuid}, query=query, headers=headers).call()
+
+def sql_page(base: Base, operation_id: str, offset: int) -> Response:
+    # Without ORDER BY, the rows of a page are not guaranteed to be the same in every query
+    body = {'sql': f'SELECT * FROM {TABLE_NAME} ORDER BY _id LIMIT {SQL_PAGE_SIZE} OFFSET {offset}', 'convert_keys': True}
+    headers = {'Authorization': f'Bearer {base.token}'}
+
+    return base_operations_schema.get_operation_by_id(operation_id) \
+        .make_case(path_parameters={'base_uuid': base.uuid}, body=body, headers=headers).call()
+
+# operation_id -> (function returning the page at an offset, key of the rows in the response, page size)
+PAGINATORS = {
+    'listRows': (list_rows_page, 'rows', LIST_PAGE_SIZE),
+    'listRowsDeprecated': (list_rows_page, 'rows', LIST_PAGE_SIZE),
+    'querySQL': (sql_page, 'results', SQL_PAGE_SIZE),
+}
+
+def read_table(base: Base, operation_id: str) -> dict[str, Any]:
+    """
+    Reads the whole table page by page and returns the throughput and page latencies.
+
+    Page latencies are measured by TimingAdapter (see metrics.py) and do not include the time spent waiting for the rate
+    limits, which is returned as throttled_seconds. The responses are not validated against the OpenAPI files, since
+    validating thousands of rows per page would take longer than the requests themselves.
+    """
+    fetch, key, page_size = PAGINATORS[operation_id]
+    latencies = []
+    throttled_seconds = 0.0
+    rows = 0
+    response_bytes = 0
+
+    while True:
+        start = time.perf_counter()
+        response = fetch(base, operation_id, rows)
+        seconds = time.perf_counter() - start
+        latencies.append(response.timing[1] if hasattr(response, 'timing') else seconds)
+        throttled_seconds += max(seconds - latencies[-1], 0)
+
+        page = response.json()[key] if response.status_code == 200 else None
+
+        assert response.status_code == 200, f'{operation_id} failed at offset {rows}: {response.text}'
+
+        rows += len(page)
+        response_bytes += len(response.content)
+        if len(page) < page_size:
+            break
+
+    seconds = sum(latencies)
+
+    return {
+        'rows': rows,
+        'pages': len(latencies),
+        'seconds': round(seconds, 4),
+        'throttled_seconds': round(throttled_seconds, 4),
+        'rows_per_second': rows / seconds if seconds else 0,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'bytes_per_row': response_bytes / rows if rows else 0,
+    }
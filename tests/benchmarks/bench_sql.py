@@ -0,0 +1,184 @@
+"""
+Latency of typical querySQL statements on tables of growing size.
+
+A table with the columns of columns.py is grown to every size in BENCH_SQL_ROW_COUNTS. At each size,
+every query shape in QUERIES (filters per column type, sorts, aggregations, parameterized queries and the 10,000 row
+cap) is run BENCH_ITERATIONS times. Some shapes are also run without convert_keys to show what converting the column
+keys to names costs. With BENCH_SQL_WRITES=True, INSERT (big data), UPDATE and DELETE statements are measured as well.
+Latency, returned rows and response size are printed per shape and size, and written to BENCH_OUTPUT.
+
+Run with: BENCH_SQL_ROW_COUNTS=1000,10000 pytest benchmarks/bench_sql.py -s
+
+SeaTable-specific syntax (e.g. HAS ANY OF) and writes are not supported by the stand-in server and skipped there.
+"""
+import json
+import os
+import time
+from columns import COLUMNS
+from conftest import STANDIN_SERVER, Base, base_operations_schema, schemas
+from dataclasses import dataclass
+from datagen import RowGenerator
+from metrics import distribution
+from pathlib import Path
+from requests import Response
+from seeding import Seeder
+from test_base_operations import create_table
+from typing import Any, Callable, Optional
+
+ROW_COUNTS = sorted(int(count) for count in os.environ.get('BENCH_SQL_ROW_COUNTS', '1000,10000,100000').split(','))
+ITERATIONS = int(os.environ.get('BENCH_ITERATIONS', 5))
+WRITES = os.environ.get('BENCH_SQL_WRITES', 'False') == 'True'
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'sql.json'))
+
+# querySQL returns 100 rows without a LIMIT clause and never more than 10,000 rows
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10_000
+# The normal backend holds up to 100,000 rows per base, all further rows are added to the big data backend
+NORMAL_BACKEND_LIMIT = 100_000
+
+TABLE_NAME = 'bench_sql'
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    sql: str
+    parameters: tuple = ()
+    # Uses syntax or statements the stand-in server does not support
+    seatable_only: bool = False
+    # Also run with convert_keys=False
+    compare_convert_keys: bool = False
+    # Rows returned for a table with `row_count` rows, None if it depends on the data
+    expected_rows: Optional[Callable[[int], int]] = None
+
+QUERIES = [
+    # Plain reads and the row cap
+    Query('select-all', f'SELECT * FROM {TABLE_NAME} LIMIT 1000', compare_convert_keys=True, expected_rows=lambda n: min(n, 1000)),
+    Query('select-columns', f'SELECT `text`, `number`, `date-iso` FROM {TABLE_NAME} LIMIT 1000', compare_convert_keys=True,
+          expected_rows=lambda n: min(n, 1000)),
+    Query('no-limit', f'SELECT * FROM {TABLE_NAME}', expected_rows=lambda n: min(n, DEFAULT_LIMIT)),
+    Query('limit-10000', f'SELECT * FROM {TABLE_NAME} LIMIT {MAX_LIMIT}', compare_convert_keys=True,
+          expected_rows=lambda n: min(n, MAX_LIMIT)),
+    Query('limit-above-cap', f'SELECT * FROM {TABLE_NAME} LIMIT {MAX_LIMIT * 5}', expected_rows=lambda n: min(n, MAX_LIMIT)),
+    Query('offset-deep', f'SELECT * FROM {TABLE_NAME} LIMIT 100 OFFSET 50000', expected_rows=lambda n: min(max(n - 50000, 0), 100)),
+
+    # Filters on each column type
+    Query('filter-text-like', f"SELECT * FROM {TABLE_NAME} WHERE `text` LIKE '%alpha%' LIMIT 1000", compare_convert_keys=True),
+    Query('filter-long-text-like', f"SELECT * FROM {TABLE_NAME} WHERE `long-text` LIKE '%bravo%' LIMIT 1000"),
+    Query('filter-number', f'SELECT * FROM {TABLE_NAME} WHERE `number` > 500000 LIMIT 1000'),
+    Query('filter-number-percent', f'SELECT * FROM {TABLE_NAME} WHERE `number-percent` BETWEEN 10 AND 20 LIMIT 1000'),
+    Query('filter-date', f"SELECT * FROM {TABLE_NAME} WHERE `date-iso` >= '2030-01-01' LIMIT 1000"),
+    Query('filter-duration', f'SELECT * FROM {TABLE_NAME} WHERE `duration-hours-minutes` > 36000 LIMIT 1000'),
+    Query('filter-single-select', f"SELECT * FROM {TABLE_NAME} WHERE `single-select` = 'option-1' LIMIT 1000"),
+    Query('filter-multiple-select', f"SELECT * FROM {TABLE_NAME} WHERE `multiple-select` HAS ANY OF ('option-1') LIMIT 1000",
+          seatable_only=True),
+    Query('filter-checkbox', f'SELECT * FROM {TABLE_NAME} WHERE `checkbox` = true LIMIT 1000'),
+    Query('filter-rate', f'SELECT * FROM {TABLE_NAME} WHERE `rate` >= 8 LIMIT 1000'),
+    Query('filter-email', f"SELECT * FROM {TABLE_NAME} WHERE `email` LIKE 'alpha.%' LIMIT 1000"),
+    Query('filter-is-null', f'SELECT * FROM {TABLE_NAME} WHERE `formula` IS NULL LIMIT 1000'),
+    Query('filter-and-or', f"SELECT * FROM {TABLE_NAME} WHERE (`rate` > 5 AND `checkbox` = true) OR `single-select` = 'option-3' LIMIT 1000"),
+
+    # Sorts
+    Query('order-by-number', f'SELECT * FROM {TABLE_NAME} ORDER BY `number` DESC LIMIT 100', compare_convert_keys=True),
+    Query('order-by-text', f'SELECT * FROM {TABLE_NAME} ORDER BY `text` LIMIT 100'),
+    Query('order-by-two-columns', f'SELECT * FROM {TABLE_NAME} ORDER BY `date-iso`, `number` DESC LIMIT 100'),
+
+    # Aggregations
+    Query('count', f'SELECT COUNT(*) FROM {TABLE_NAME}', expected_rows=lambda n: 1),
+    Query('aggregate', f'SELECT SUM(`number`), AVG(`rate`), MAX(`date-iso`) FROM {TABLE_NAME}', expected_rows=lambda n: 1),
+    Query('group-by', f'SELECT `single-select`, COUNT(*), AVG(`number`) FROM {TABLE_NAME} GROUP BY `single-select`'),
+    Query('distinct', f'SELECT DISTINCT `single-select` FROM {TABLE_NAME}'),
+
+    # Parameterized queries, compare with filter-single-select and filter-rate
+    Query('param-equals', f'SELECT * FROM {TABLE_NAME} WHERE `single-select` = ? LIMIT 1000', parameters=('option-1',)),
+    Query('param-range', f'SELECT * FROM {TABLE_NAME} WHERE `rate` >= ? AND `rate` <= ? LIMIT 1000', parameters=(8, 10)),
+]
+
+# Run in this order, so that every iteration removes the row it inserted and the table keeps its size
+WRITE_QUERIES = [
+    Query('insert', f"INSERT INTO {TABLE_NAME} (`text`, `number`) VALUES ('bench-sql-write', 1)", seatable_only=True),
+    Query('update', f"UPDATE {TABLE_NAME} SET `number` = 2 WHERE `text` = 'bench-sql-write'", seatable_only=True),
+    Query('delete', f"DELETE FROM {TABLE_NAME} WHERE `text` = 'bench-sql-write'", seatable_only=True),
+]
+
+def test_sql_workload(base: Base):
+    create_table(base, TABLE_NAME, COLUMNS)
+    queries = [query for query in QUERIES + (WRITE_QUERIES if WRITES else []) if not (query.seatable_only and STANDIN_SERVER == 'True')]
+
+    results = []
+    row_count = 0
+    # The table only grows, so every row is added once
+    for target in ROW_COUNTS:
+        seed(base, row_count, target)
+        row_count = target
+
+        samples = {}
+        # Interleave the shapes, so that changing server load affects all of them alike
+        for _ in range(ITERATIONS):
+            for query in queries:
+                for convert_keys in ((True, False) if query.compare_convert_keys else (True,)):
+                    samples.setdefault((query, convert_keys), []).append(run(base, query, convert_keys))
+
+        for (query, convert_keys), runs in samples.items():
+            rows = runs[0]['rows']
+            if query.expected_rows is not None:
+                assert rows == query.expected_rows(row_count), f'{query.name} returned {rows} rows'
+
+            results.append({
+                'row_count': row_count,
+                'query': query.name,
+                'sql': query.sql,
+                'convert_keys': convert_keys,
+                'rows': rows,
+                'latency': distribution(tuple(run['seconds'] for run in runs)),
+                'response_bytes': runs[0]['response_bytes'],
+            })
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(f'{"query":<24} {"keys":<6} {"table rows":>10} {"rows":>6} {"p50 ms":>8} {"p95 ms":>8} {"bytes":>9}')
+    for result in sorted(results, key=lambda r: (r['query'], not r['convert_keys'], r['row_count'])):
+        print(
+            f'{result["query"]:<24} {"names" if result["convert_keys"] else "keys":<6} {result["row_count"]:>10} '
+            f'{result["rows"]:>6} {result["latency"]["p50"] * 1000:>8.1f} {result["latency"]["p95"] * 1000:>8.1f} '
+            f'{result["response_bytes"]:>9}'
+        )
+    print(f'Results: {OUTPUT_FILE}')
+
+def seed(base: Base, start: int, stop: int):
+    """Adds the rows with the numbers start..stop-1"""
+    seeder = Seeder(schemas, base.uuid, base.token)
+    generator = RowGenerator(COLUMNS)
+
+    if start < NORMAL_BACKEND_LIMIT:
+        seeder.seed(TABLE_NAME, generator.rows(min(stop, NORMAL_BACKEND_LIMIT) - start, start=start))
+    if stop > NORMAL_BACKEND_LIMIT:
+        big_data_start = max(start, NORMAL_BACKEND_LIMIT)
+        seeder.seed(TABLE_NAME, generator.rows(stop - big_data_start, start=big_data_start), big_data=True)
+
+def run(base: Base, query: Query, convert_keys: bool) -> dict[str, Any]:
+    """
+    Runs the query once and returns its latency, the number of returned rows and the response size.
+
+    The responses are not validated against the OpenAPI files, since validating up to 10,000 rows
+    would take longer than the query itself.
+    """
+    body = {'sql': query.sql, 'convert_keys': convert_keys}
+    if query.parameters:
+        body['parameters'] = list(query.parameters)
+    headers = {'Authorization': f'Bearer {base.token}'}
+
+    case = base_operations_schema.get_operation_by_id('querySQL') \
+        .make_case(path_parameters={'base_uuid': base.uuid}, body=body, headers=headers)
+
+    start = time.perf_counter()
+    response: Response = case.call()
+    # Set by TimingAdapter (see metrics.py), which does not include time spent waiting for the rate limits
+    seconds = response.timing[1] if hasattr(response, 'timing') else time.perf_counter() - start
+
+    assert response.status_code == 200, f'{query.name} failed: {response.text}'
+    data = response.json()
+    assert data.get('success', True), f'{query.name} failed: {data.get("error_message")}'
+
+    return {'seconds': seconds, 'rows': len(data.get('results') or []), 'response_bytes': len(response.content)}
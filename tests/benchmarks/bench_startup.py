@@ -0,0 +1,73 @@
+"""
+Startup-time benchmark for loading the OpenAPI specs.
+
+Run with: pytest benchmarks/bench_startup.py -s
+"""
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+RUNS = 3
+
+# What conftest.py and test_base_operations.py did before the schema registry existed:
+# ten from_path() calls (with meta schema validation) at import time
+EAGER = """
+import schemathesis
+for filename in [
+    'user_account_operations.yaml', 'system_admin_account_operations.yaml', 'authentication.yaml',
+    'base_operations_deprecated.yaml', 'base_operations.yaml', 'user_account_operations.yaml',
+    'user_account_operations.yaml', 'base_operations_deprecated.yaml', 'base_operations.yaml', 'file_operations.yaml',
+]:
+    schema = schemathesis.from_path(f'../{filename}', base_url='https://localhost', validate_schema=True)
+    if filename == 'base_operations.yaml':
+        base_operations = schema
+base_operations.get_operation_by_id('getRow')
+"""
+
+# What `pytest test_base_operations.py::test_getRow` needs now
+LAZY = """
+from schemas import SchemaRegistry
+schemas = SchemaRegistry(base_url='https://localhost')
+for filename in [
+    'user_account_operations.yaml', 'system_admin_account_operations.yaml', 'authentication.yaml',
+    'base_operations_deprecated.yaml', 'base_operations.yaml', 'file_operations.yaml',
+]:
+    schemas.get(filename)
+schemas.get('base_operations.yaml').get_operation_by_id('getRow')
+"""
+
+def measure(code: str, cache_dir: Path, runs: int = RUNS) -> float:
+    """Returns the median wall-clock time (in seconds) of running `code` in a fresh interpreter"""
+    timed = f'import time\nstart = time.perf_counter()\n{code}\nprint(time.perf_counter() - start)'
+    env = {**os.environ, 'SCHEMA_CACHE_DIR': str(cache_dir)}
+
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', timed], cwd=TESTS_DIR, env=env, capture_output=True, text=True, check=True)
+        durations.append(float(output.stdout.strip().splitlines()[-1]))
+
+    return statistics.median(durations)
+
+def test_startup(tmp_path: Path):
+    cold_cache_dir = tmp_path / 'cold'
+    warm_cache_dir = tmp_path / 'warm'
+
+    eager = measure(EAGER, tmp_path / 'unused')
+    # Use an empty cache directory for every run to measure the first run after a spec changed
+    cold = statistics.median(measure(LAZY, cold_cache_dir / str(i), runs=1) for i in range(RUNS))
+    warm = measure(LAZY, warm_cache_dir)
+
+    print()
+    print(f'{"scenario":<40} {"seconds":>8} {"speedup":>8}')
+    for name, duration in [
+        ('eager from_path() (before)', eager),
+        ('lazy registry, cold cache', cold),
+        ('lazy registry, warm cache', warm),
+    ]:
+        print(f'{name:<40} {duration:>8.3f} {eager / duration:>7.1f}x')
+
+    assert cold < eager
+    assert warm < eager
@@ -0,0 +1,57 @@
+"""
+Upload throughput of files streamed to the upload links of the file API.
+
+For every file size in BENCH_UPLOAD_SIZES_KB, BENCH_UPLOAD_FILES random files of that size are written to a temporary
+directory and uploaded with every concurrency in BENCH_UPLOAD_CONCURRENCY (see uploads.py). Files per second, megabytes
+per second and the number of upload links that were fetched are printed and written to BENCH_OUTPUT.
+
+Run with: BENCH_UPLOAD_FILES=50 BENCH_UPLOAD_SIZES_KB=16,1024 BENCH_UPLOAD_CONCURRENCY=1,4,8 pytest benchmarks/bench_uploads.py -s
+"""
+import json
+import os
+from conftest import Base, http_session, schemas
+from pathlib import Path
+from uploads import Uploader
+
+FILE_COUNT = int(os.environ.get('BENCH_UPLOAD_FILES', 50))
+SIZES_KB = sorted(int(size) for size in os.environ.get('BENCH_UPLOAD_SIZES_KB', '16,1024').split(','))
+CONCURRENCY = sorted(int(limit) for limit in os.environ.get('BENCH_UPLOAD_CONCURRENCY', '1,4,8').split(','))
+OUTPUT_FILE = Path(os.environ.get('BENCH_OUTPUT', Path(__file__).resolve().parent.parent / '.metrics' / 'uploads.json'))
+
+def test_uploads(base: Base, tmp_path: Path):
+    results = []
+
+    for size_kb in SIZES_KB:
+        paths = []
+        for i in range(FILE_COUNT):
+            path = tmp_path / f'bench-{size_kb}kb-{i}.bin'
+            path.write_bytes(os.urandom(size_kb * 1024))
+            paths.append(path)
+
+        for concurrency in CONCURRENCY:
+            # A new uploader per run, so every run fetches its own upload link
+            uploader = Uploader(schemas, http_session, base.api_token, base.workspace_id, concurrency=concurrency)
+            result = uploader.upload_many(paths, image=False)
+            assert [file.size for file in result.files] == [size_kb * 1024] * FILE_COUNT
+
+            results.append({
+                'size_kb': size_kb,
+                'files': FILE_COUNT,
+                'concurrency': concurrency,
+                'seconds': round(result.seconds, 4),
+                'files_per_second': round(result.files_per_second, 1),
+                'megabytes_per_second': round(result.megabytes_per_second, 2),
+                'upload_links': result.upload_links,
+            })
+
+    OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OUTPUT_FILE.write_text(json.dumps(results, indent=2))
+
+    print()
+    print(f'{"size KB":>8} {"files":>6} {"concurrency":>11} {"seconds":>8} {"files/s":>8} {"MB/s":>7} {"links":>6}')
+    for result in results:
+        print(
+            f'{result["size_kb"]:>8} {result["files"]:>6} {result["concurrency"]:>11} {result["seconds"]:>8.1f} '
+            f'{result["files_per_second"]:>8.1f} {result["megabytes_per_second"]:>7.2f} {result["upload_links"]:>6}'
+        )
+    print(f'Results: {OUTPUT_FILE}')
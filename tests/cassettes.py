@@ -0,0 +1,270 @@
+"""
+Record/replay of all requests made by the tests.
+
+In record mode, every request that goes through the shared session (schemathesis calls and file uploads) is stored
+together with its response. In replay mode, the stored responses are returned instead of contacting a server, so the
+snapshot tests run at memory speed without using any of the server's rate budget.
+
+Interactions are keyed by the operation ID and the normalized request (method, path, query and body). Values that change
+from run to run are masked before they are stored: tokens and timestamps in responses (similar to the path_type
+matchers of the snapshots), and credentials, timestamps and random suffixes in requests.
+"""
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import string
+import threading
+from pathlib import Path
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter, HTTPAdapter
+from schemas import SPEC_DIR, SchemaRegistry
+from typing import Any, Optional
+from urllib.parse import parse_qsl, quote_plus, urlencode, urlsplit
+from urllib3 import HTTPResponse
+
+MODES = ['off', 'record', 'replay']
+
+# Response fields whose values are replaced by placeholders (see placeholder(), they are used in later requests as well)
+TOKEN_FIELDS = {'token', 'access_token', 'api_token'}
+# Response fields that are replaced by a constant
+TIMESTAMP_FIELDS = {'_ctime', '_mtime'}
+MASKED_TIMESTAMP = '1970-01-01T00:00:00.000+00:00'
+
+# Request values that are generated by the tests (see conftest.py)
+VOLATILE_REQUEST_VALUES = [
+    (re.compile(r'\d{4}-\d{2}-\d{2} \d{2}-\d{2}-\d{2}'), '<timestamp>'),
+    (re.compile(r'\b(?:main|gw\d+)-[0-9a-f]{8}\b'), '<suffix>'),
+    (re.compile(r'"password": "[^"]*"'), '"password": "<password>"'),
+]
+
+# Response headers that are stored (all others are dropped to keep the cassettes small)
+STORED_HEADERS = {'content-type'}
+
+class CassetteMiss(Exception):
+    """Raised in replay mode if no interaction was recorded for a request"""
+
+class Cassette:
+    """
+    Stores interactions as {key: [response, ...]}, responses of the same key are replayed in the order they were recorded.
+
+    Responses are scoped to the test module that sent the request, since every module creates its own base. Every process
+    (pytest-xdist worker) records into its own file and replay loads all files in the directory, so a recording can be
+    replayed with a different number of workers as long as all tests of a module ran in the same worker.
+    """
+    def __init__(self, mode: str, directory: Path, schemas: SchemaRegistry, replacements: Optional[dict[str, str]] = None):
+        assert mode in MODES, f'Cassette mode must be one of {MODES}'
+        self.mode = mode
+        self.directory = directory
+        self.schemas = schemas
+        # Known values (e.g. credentials) -> placeholder, including their URL-encoded form (for form data)
+        self.replacements = dict(replacements or {})
+        self.replacements.update({quote_plus(value): placeholder for value, placeholder in self.replacements.items()})
+        self.interactions: dict[str, list[dict]] = {}
+        self._replayed: dict[tuple[str, str], int] = {}
+        self._operations: Optional[list[tuple[re.Pattern, str]]] = None
+        self._worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+        self._lock = threading.Lock()
+
+        if mode == 'replay':
+            self.load()
+
+    def key(self, request: PreparedRequest) -> str:
+        """Returns "<operation_id> <method> <path> <digest of query and body>" with all volatile values masked"""
+        url = urlsplit(self._mask_request(request.url))
+        query = urlencode(sorted(parse_qsl(url.query)))
+        body = self._mask_request(normalize_body(request))
+        digest = hashlib.sha256(f'{query}\n{body}'.encode()).hexdigest()[:16]
+
+        return f'{self.operation_id(request.method, url.path)} {request.method} {url.path} {digest}'
+
+    def record(self, request: PreparedRequest, response: Response):
+        key = self.key(request)
+        body = self._mask_response(response)
+
+        interaction = {
+            'scope': current_scope(),
+            'status': response.status_code,
+            'headers': {name: value for name, value in response.headers.items() if name.lower() in STORED_HEADERS},
+        }
+        try:
+            interaction['text'] = body.decode('utf-8')
+        except UnicodeDecodeError:
+            interaction['base64'] = base64.b64encode(body).decode()
+
+        with self._lock:
+            self.interactions.setdefault(key, []).append(interaction)
+
+    def replay(self, request: PreparedRequest) -> Response:
+        key = self.key(request)
+        scope = current_scope()
+
+        with self._lock:
+            responses = self.interactions.get(key)
+            if not responses:
+                raise CassetteMiss(f'No recorded interaction for {key} ({request.method} {request.url})')
+
+            # Session-scoped fixtures (e.g. account tokens) might run in a different module than during recording
+            if any(interaction['scope'] == scope for interaction in responses):
+                responses = [interaction for interaction in responses if interaction['scope'] == scope]
+
+            index = self._replayed.get((key, scope), 0)
+            self._replayed[(key, scope)] = index + 1
+
+        # Repeat the last response if a request is sent more often than during recording
+        interaction = responses[min(index, len(responses) - 1)]
+        body = interaction['text'].encode('utf-8') if 'text' in interaction else base64.b64decode(interaction['base64'])
+        raw = HTTPResponse(body=io.BytesIO(body), headers=interaction['headers'], status=interaction['status'], preload_content=False)
+
+        return HTTPAdapter().build_response(request, raw)
+
+    def operation_id(self, method: str, path: str) -> str:
+        if self._operations is None:
+            operations = []
+            for spec in sorted(SPEC_DIR.glob('*.yaml')):
+                for operation_id, (operation_method, template) in self.schemas.operation_paths(spec.name).items():
+                    pattern = re.escape(template.split('?')[0]).replace(r'\{', '{').replace(r'\}', '}')
+                    pattern = re.sub(r'{[^}/]+}', '[^/]+', pattern)
+                    operations.append((template.count('{'), re.compile(f'{operation_method.upper()} {pattern}$'), operation_id))
+
+            # Static segments win over parameters
+            self._operations = [(pattern, operation_id) for _, pattern, operation_id in sorted(operations, key=lambda o: o[0])]
+
+        for pattern, operation_id in self._operations:
+            if pattern.match(f'{method} {path}'):
+                return operation_id
+
+        return 'unknown'
+
+    def clear(self):
+        """Removes the cassettes of earlier recordings"""
+        for path in self.directory.glob('*.json.gz'):
+            path.unlink()
+
+    def load(self):
+        for path in sorted(self.directory.glob('*.json.gz')):
+            for key, responses in json.loads(gzip.decompress(path.read_bytes())).items():
+                self.interactions.setdefault(key, []).extend(responses)
+
+    def save(self):
+        if not self.interactions:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(self.interactions, separators=(',', ':'), sort_keys=True).encode()
+        (self.directory / f'{self._worker}.json.gz').write_bytes(gzip.compress(data))
+
+    def mount(self, session: Any) -> Any:
+        """Records or replays all requests of `session`, has to be called before any other adapters are mounted"""
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, CassetteAdapter(self, session.get_adapter(f'{prefix}example.org')))
+
+        return session
+
+    def _mask_request(self, text: str) -> str:
+        for value, placeholder in self.replacements.items():
+            text = text.replace(value, placeholder)
+        for pattern, placeholder in VOLATILE_REQUEST_VALUES:
+            text = pattern.sub(placeholder, text)
+
+        return text
+
+    def _mask_response(self, response: Response) -> bytes:
+        if 'json' not in response.headers.get('content-type', ''):
+            return response.content
+
+        try:
+            data = response.json()
+        except ValueError:
+            return response.content
+
+        return json.dumps(self._mask_value(data)).encode()
+
+    def _mask_value(self, value: Any, field: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            return {key: self._mask_value(item, key) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._mask_value(item, field) for item in value]
+        if not isinstance(value, str):
+            return value
+
+        if field in TIMESTAMP_FIELDS:
+            return MASKED_TIMESTAMP
+        if field in TOKEN_FIELDS:
+            with self._lock:
+                if value not in self.replacements:
+                    self.replacements[value] = placeholder(value, f'{field}-{self._worker}-{len(self.replacements)}')
+                return self.replacements[value]
+
+        return value
+
+class CassetteAdapter(BaseAdapter):
+    """Transport adapter that records the responses of `adapter` or replays them without sending the request"""
+    def __init__(self, cassette: Cassette, adapter: BaseAdapter):
+        super().__init__()
+        self.cassette = cassette
+        self.adapter = adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        if self.cassette.mode == 'replay':
+            return self.cassette.replay(request)
+
+        response = self.adapter.send(request, **kwargs)
+        if self.cassette.mode == 'record':
+            self.cassette.record(request, response)
+
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+def current_scope() -> str:
+    """Returns the file of the running test, e.g. "test_base_operations.py" (empty outside of tests)"""
+    return os.environ.get('PYTEST_CURRENT_TEST', '').split('::')[0]
+
+def placeholder(value: str, seed: str) -> str:
+    """
+    Returns a deterministic replacement for `value` with the same length and character classes.
+
+    The replayed responses are still validated against the OpenAPI specs (e.g. tokens of exactly 40 characters).
+    """
+    digest = hashlib.sha256(seed.encode()).digest()
+    characters = []
+
+    for index, character in enumerate(value):
+        byte = digest[index % len(digest)] + index
+        if character.isdigit():
+            characters.append(string.digits[byte % 10])
+        elif character.islower():
+            characters.append(string.ascii_lowercase[byte % 26])
+        elif character.isupper():
+            characters.append(string.ascii_uppercase[byte % 26])
+        else:
+            characters.append(character)
+
+    return ''.join(characters)
+
+def normalize_body(request: PreparedRequest) -> str:
+    body = request.body or b''
+    if isinstance(body, str):
+        body = body.encode()
+    elif not isinstance(body, bytes):
+        # Streamed body (e.g. uploads.MultipartFile), which can be read more than once
+        body = b''.join(body)
+
+    content_type = request.headers.get('Content-Type', '')
+    if 'json' in content_type:
+        try:
+            return json.dumps(json.loads(body), sort_keys=True)
+        except ValueError:
+            pass
+
+    # The multipart boundary is random
+    match = re.search(r'boundary=([^;]+)', content_type)
+    if match:
+        body = body.replace(match.group(1).encode(), b'<boundary>')
+
+    return body.decode('utf-8', errors='replace')
@@ -0,0 +1,238 @@
+"""
+Columns of every type, used by test_base_operations.py, the benchmarks and the generated rows of datagen.py and seeding.py
+"""
+
+COLUMNS = [
+    {
+        'column_name': 'text',
+        'column_type': 'text',
+    },
+    {
+        'column_name': 'long-text',
+        'column_type': 'long-text',
+    },
+    {
+        'column_name': 'number',
+        'column_type': 'number',
+    },
+    {
+        'column_name': 'number-decimal-dot-thousands-comma',
+        'column_type': 'number',
+        'column_data': {
+            'format': 'number',
+            'decimal': 'dot',
+            'thousands': 'comma',
+        },
+    },
+    {
+        'column_name': 'number-percent',
+        'column_type': 'number',
+        'column_data': {
+            'format': 'percent',
+            'decimal': 'comma',
+            'thousands': 'no',
+        },
+    },
+    {
+        'column_name': 'number-euro',
+        'column_type': 'number',
+        'column_data': {
+            'format': 'euro',
+            'decimal': 'comma',
+            'thousands': 'no',
+        },
+    },
+    {
+        'column_name': 'collaborator',
+        'column_type': 'collaborator',
+    },
+    {
+        'column_name': 'date-iso',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'YYYY-MM-DD'
+        }
+    },
+    {
+        'column_name': 'date-iso-hours-minutes',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'YYYY-MM-DD HH:mm'
+        }
+    },
+    {
+        'column_name': 'date-us',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'M/D/YYYY'
+        }
+    },
+    {
+        'column_name': 'date-us-hours-minutes',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'M/D/YYYY HH:mm'
+        }
+    },
+        {
+        'column_name': 'date-european',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'DD/MM/YYYY'
+        }
+    },
+    # FIXME: Fix this
+    # Also fails with insertColumn operation on api.seatable.io: {"error_type": "column_data_error", "error_message": "column_data: {\"format\":\"DD/MM/YYYY HH:mm\"} do not meet specifications."}
+    #{
+    #     'column_name': 'date-european-hours-minutes',
+    #     'column_type': 'date',
+    #     'column_data': {
+    #         'format': 'DD/MM/YYYY HH:mm'
+    #     }
+    #},
+    {
+        'column_name': 'date-german',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'DD.MM.YYYY'
+        }
+    },
+    {
+        'column_name': 'date-german-hours-minutes',
+        'column_type': 'date',
+        'column_data': {
+            'format': 'DD.MM.YYYY HH:mm'
+        }
+    },
+    {
+        'column_name': 'duration-hours-minutes',
+        'column_type': 'duration',
+        'column_data': {
+            'format': 'duration',
+            'duration_format': 'h:mm'
+        }
+    },
+    {
+        'column_name': 'duration-hours-minutes-seconds',
+        'column_type': 'duration',
+        'column_data': {
+            'format': 'duration',
+            'duration_format': 'h:mm:ss'
+        }
+    },
+    {
+        'column_name': 'single-select',
+        'column_type': 'single-select',
+        'column_data': {
+            'options': [
+               {'id': "0000", 'name': 'option-1', 'color': '#9860E5', 'textColor': '#000000'},
+               {'id': "ef3s", 'name': 'option-2', 'color': '#89D2EA', 'textColor': '#000000'},
+               {'id': "38d7", 'name': 'option-3', 'color': '#59CB74', 'textColor': '#000000'},
+            ]
+        }
+    },
+    {
+        'column_name': 'multiple-select',
+        'column_type': 'multiple-select',
+        'column_data': {
+            'options': [
+               {'id': "0000", 'name': 'option-1', 'color': '#9860E5', 'textColor': '#000000'},
+               {'id': "ef32", 'name': 'option-2', 'color': '#89D2EA', 'textColor': '#000000'},
+               {'id': "yze2", 'name': 'option-3', 'color': '#59CB74', 'textColor': '#000000'},
+            ]
+        }
+    },
+    {
+        'column_name': 'email',
+        'column_type': 'email',
+    },
+    {
+        'column_name': 'url',
+        'column_type': 'url',
+    },
+    {
+        'column_name': 'checkbox',
+        'column_type': 'checkbox',
+    },
+    {
+        'column_name': 'rate',
+        'column_type': 'rate',
+        'column_data': {
+            'rate_max_number': 10,
+        },
+    },
+    {
+        'column_name': 'formula',
+        'column_type': 'formula',
+        'column_data': {
+            'formula': "dateAdd({date-iso}, 1, 'year')"
+        }
+    },
+    {
+        'column_name': 'formula-integer-return-value',
+        'column_type': 'formula',
+        'column_data': {
+            'formula': '1 + 2',
+        },
+    },
+    {
+        'column_name': 'formula-float-return-value',
+        'column_type': 'formula',
+        'column_data': {
+            'formula': '1.3 + 2.6',
+        },
+    },
+    {
+        'column_name': 'formula-boolean-return-value',
+        'column_type': 'formula',
+        'column_data': {
+            'formula': 'and(true(), false())',
+        },
+    },
+    {
+        'column_name': 'geolocation-country-region',
+        'column_type': 'geolocation',
+        'column_data': {
+            'geo_format': 'country_region',
+            'lang': 'en',
+        },
+    },
+    {
+        'column_name': 'geolocation-lat-lon',
+        'column_type': 'geolocation',
+        'column_data': {
+            'geo_format': 'lng_lat',
+        },
+    },
+    {
+        'column_name': 'auto-number-integer',
+        'column_type': 'auto-number',
+        'column_data': {
+            'format': '0000',
+            'digits': 4,
+        },
+    },
+    {
+        'column_name': 'auto-number-string-prefix',
+        'column_type': 'auto-number',
+        'column_data': {
+            'format': '0000',
+            'digits': 4,
+            'prefix_type': 'string',
+            'prefix': 'row',
+        },
+    },
+    {
+        'column_name': 'auto-number-date-prefix',
+        'column_type': 'auto-number',
+        'column_data': {
+            'format': '0000',
+            'digits': 4,
+            'prefix_type': 'date',
+        },
+    },
+    {
+        'column_name': 'digital-sign',
+        'column_type': 'digital-sign',
+    },
+]
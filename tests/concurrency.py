@@ -0,0 +1,37 @@
+import anyio
+import os
+from functools import partial
+from typing import Any, Callable
+
+# Maximum number of requests that are sent at the same time by run_concurrently(), 1 sends them one after another
+MAX_CONCURRENT_REQUESTS = int(os.environ.get('MAX_CONCURRENT_REQUESTS', 4))
+
+def run_concurrently(*functions: Callable[[], Any], limit: int = MAX_CONCURRENT_REQUESTS) -> list[Any]:
+    """
+    Runs independent calls (e.g. helpers that use case.call_and_validate()) at the same time and returns their results in order.
+
+    Every call runs in a worker thread, so schemathesis still validates each response. At most `limit` calls run at once.
+    If a call fails, its exception is raised (the remaining calls are still awaited).
+    """
+    if limit <= 1 or len(functions) <= 1:
+        return [function() for function in functions]
+
+    return anyio.run(partial(gather, *functions, limit=limit))
+
+async def gather(*functions: Callable[[], Any], limit: int = MAX_CONCURRENT_REQUESTS) -> list[Any]:
+    """Async version of run_concurrently() for use inside an event loop"""
+    limiter = anyio.CapacityLimiter(limit)
+    results: list[Any] = [None] * len(functions)
+
+    async def run(index: int, function: Callable[[], Any]):
+        results[index] = await anyio.to_thread.run_sync(function, limiter=limiter)
+
+    try:
+        async with anyio.create_task_group() as task_group:
+            for index, function in enumerate(functions):
+                task_group.start_soon(run, index, function)
+    except BaseExceptionGroup as group:
+        # Raise the original exception, so that pytest shows the failed assertion
+        raise group.exceptions[0]
+
+    return results
@@ -1,23 +1,69 @@
+import baselines
+import json
 import os
 import pytest
 import schemathesis
 import secrets
 import string
-from dataclasses import dataclass, field
+import warnings
+from _pytest import junitxml
+from accounts import ADMIN_PASSWORD, ADMIN_USERNAME, BASE_URL, PASSWORD, USERNAME, Secret, fetch_account_token, fetch_api_token
+from cassettes import MODES as CASSETTE_MODES, Cassette
+from concurrency import run_concurrently
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
-from random import randint
+from filelock import FileLock
+from fuzz import FuzzStatistics, format_table as format_fuzz_table
+from metrics import Metrics, format_table, mount_timing
+from nplusone import CallLog, Finding, format_table as format_n_plus_one_table, write_json as write_n_plus_one_json
+from pathlib import Path
+from pool import POOL_FILE, BasePool
+from ratelimit import PROFILES, RateLimiter, default_profile
 from requests import Response
+from schemas import SchemaRegistry
 from schemathesis import Case
+from session import create_session, format_statistics, merge_statistics, pool_statistics
+from sweeper import Sweeper
 from syrupy.extensions.json import JSONSnapshotExtension
-from typing import Generator
-
-# TODO: Read from environment
-BASE_URL = os.environ.get('SEATABLE_SERVER')
-USERNAME = os.environ.get('SEATABLE_USERNAME')
-PASSWORD = os.environ.get('SEATABLE_PASSWORD')
-ADMIN_USERNAME = os.environ.get('SEATABLE_ADMIN_USERNAME')
-ADMIN_PASSWORD = os.environ.get('SEATABLE_ADMIN_PASSWORD')
-CLEANUP_AFTER_TESTS = os.environ.get('CLEANUP_AFTER_TESTS', True)
+from syrupy.location import PyTestLocation
+from templates import TEMPLATE_CACHE_DIR, Tables, TemplateProvisioner, create_tables
+from tokens import TokenCache
+from typing import Callable, Generator, Optional
+
+# Run the tests against an in-process stand-in server instead of a real SeaTable server (see standin.py)
+STANDIN_SERVER = os.environ.get('SEATABLE_STANDIN', 'False')
+assert STANDIN_SERVER in ["True", "False"], "SEATABLE_STANDIN environment variable must be either 'True' or 'False'"
+
+# How the provision fixture sets up tables: 'tables' creates them in the module's base, 'template' copies a golden base
+# with the tables into a new base (see templates.py)
+PROVISIONING = os.environ.get('SEATABLE_PROVISIONING', 'tables')
+assert PROVISIONING in ['tables', 'template'], "SEATABLE_PROVISIONING environment variable must be either 'tables' or 'template'"
+
+# Number of bases kept in the pool of warm bases that are reused across test runs (see pool.py), 0 creates a new base
+# for every test module
+BASE_POOL_SIZE = int(os.environ.get('BASE_POOL_SIZE', 0))
+
+# Record all requests into cassettes or replay them instead of contacting a server (see cassettes.py)
+CASSETTE_MODE = os.environ.get('SEATABLE_CASSETTE', 'off')
+assert CASSETTE_MODE in CASSETTE_MODES, f"SEATABLE_CASSETTE environment variable must be one of {CASSETTE_MODES}"
+
+CLEANUP_AFTER_TESTS = os.environ.get('CLEANUP_AFTER_TESTS', 'True')
+# Rate limits to stay within (see intro/limits.md): 'cloud', 'server' or 'off', the stand-in server and the replay of
+# cassettes have none
+RATE_LIMITS = os.environ.get(
+    'SEATABLE_RATE_LIMITS', 'off' if STANDIN_SERVER == 'True' or CASSETTE_MODE == 'replay' else default_profile(BASE_URL or '')
+)
+# Optional encrypted file to reuse account tokens across runs (requires the cryptography package)
+TOKEN_CACHE_FILE = os.environ.get('TOKEN_CACHE_FILE')
+TOKEN_CACHE_KEY = os.environ.get('TOKEN_CACHE_KEY')
+# Per-operation latency, payload sizes, status codes and retries are written to this file at the end of the run
+METRICS_FILE = Path(os.environ.get('METRICS_FILE', Path(__file__).resolve().parent / '.metrics' / 'operations.json'))
+# Repeated calls that a batch operation could replace (see nplusone.py) are written to this file at the end of the run
+N_PLUS_ONE_FILE = Path(os.environ.get('N_PLUS_ONE_FILE', Path(__file__).resolve().parent / '.metrics' / 'n_plus_one.json'))
+# Cassettes are stored per server, like the snapshots
+CASSETTE_DIR = Path(os.environ.get(
+    'CASSETTE_DIR', Path(__file__).resolve().parent / '__cassettes__' / ('standin' if STANDIN_SERVER == 'True' else '')
+))
 
 assert BASE_URL is not None, 'SEATABLE_SERVER environment variable is not set'
 assert USERNAME is not None, 'SEATABLE_USERNAME environment variable is not set'
@@ -25,16 +71,62 @@ assert PASSWORD is not None, 'SEATABLE_PASSWORD environment variable is not set'
 assert ADMIN_USERNAME is not None, 'SEATABLE_ADMIN_USERNAME environment variable is not set'
 assert ADMIN_PASSWORD is not None, 'SEATABLE_ADMIN_PASSWORD environment variable is not set'
 assert CLEANUP_AFTER_TESTS in ["True", "False"], "CLEANUP_AFTER_TESTS environment variable must be either 'True' or 'False'"
+assert RATE_LIMITS in PROFILES, f"SEATABLE_RATE_LIMITS environment variable must be one of {PROFILES}"
 
 # TODO: Make sure credentials are never logged to the console (in case of exceptions/assertion errors)
 # https://github.com/pytest-dev/pytest/issues/8613
 
-schema = schemathesis.from_path('../user_account_operations.yaml', base_url=BASE_URL, validate_schema=True)
-system_admin_account_operations = schemathesis.from_path('../system_admin_account_operations.yaml', base_url=BASE_URL, validate_schema=True)
-authentication_schema = schemathesis.from_path('../authentication.yaml', base_url=BASE_URL, validate_schema=True)
-base_operations_deprecated_schema= schemathesis.from_path('../base_operations_deprecated.yaml', base_url=BASE_URL, validate_schema=True)
-base_operations_schema = schemathesis.from_path('../base_operations.yaml', base_url=BASE_URL, validate_schema=True)
-user_account_operations = schemathesis.from_path('../user_account_operations.yaml', base_url=BASE_URL, validate_schema=True)
+# Every OpenAPI file is parsed and validated only once per process (and cached on disk across runs).
+# The files are loaded lazily on the first get_operation_by_id() call, so running a single test
+# only loads the specs this test actually needs.
+schemas = SchemaRegistry(base_url=BASE_URL)
+
+if STANDIN_SERVER == 'True' and CASSETTE_MODE != 'replay':
+    from standin import create_app, mount_streaming
+    from starlette_testclient import TestClient
+
+    # The stand-in server routes all operations of the specs, they are only parsed once for the server and the tests
+    standin_app = create_app(
+        users={USERNAME: (PASSWORD, False), ADMIN_USERNAME: (ADMIN_PASSWORD, True)},
+        base_url=BASE_URL,
+        registry=schemas,
+    )
+    # Sends requests to the stand-in server instead of the network
+    http_session = mount_streaming(TestClient(standin_app, base_url=BASE_URL))
+else:
+    standin_app = None
+    # Shared keep-alive connection pool for all requests
+    http_session = create_session()
+
+# create_app() only reads the paths of the operations, no schema has been loaded with a transport yet
+schemas.app = standin_app
+schemas.session = http_session
+
+# Credentials are replaced by placeholders in the cassettes
+cassette = Cassette(CASSETTE_MODE, CASSETTE_DIR, schemas, replacements={
+    USERNAME: '<username>', PASSWORD: '<password>', ADMIN_USERNAME: '<admin-username>', ADMIN_PASSWORD: '<admin-password>',
+})
+if CASSETTE_MODE != 'off':
+    cassette.mount(http_session)
+
+# Measures the time to first byte and the latency of each request (without time spent waiting for the rate limits)
+mount_timing(http_session)
+
+# All requests (schemathesis calls and file uploads) go through http_session, which waits for the rate limits
+# and retries responses with status 429
+rate_limiter = RateLimiter(RATE_LIMITS, workers=int(os.environ.get('PYTEST_XDIST_WORKER_COUNT', 1)))
+rate_limiter.mount(http_session)
+
+# Account, base and API tokens are fetched once and refreshed only if they expire soon or get rejected
+token_cache = TokenCache(path=Path(TOKEN_CACHE_FILE) if TOKEN_CACHE_FILE else None, key=TOKEN_CACHE_KEY)
+token_cache.mount(http_session)
+
+schema = schemas.get('user_account_operations.yaml')
+system_admin_account_operations = schemas.get('system_admin_account_operations.yaml')
+authentication_schema = schemas.get('authentication.yaml')
+base_operations_deprecated_schema = schemas.get('base_operations_deprecated.yaml')
+base_operations_schema = schemas.get('base_operations.yaml')
+user_account_operations = schemas.get('user_account_operations.yaml')
 
 @schemathesis.hook
 def after_call(context, case, response: Response):
@@ -43,6 +135,106 @@ def after_call(context, case, response: Response):
     # Log all request URLs. You have to run pytest with '-rA' in order to see these for successful tests.
     print(f'{response.request.method} {response.request.url}')
 
+    operation_id = case.operation.definition.raw.get('operationId', case.operation.verbose_name)
+    metrics.record(operation_id, response)
+    test_metrics.record(operation_id, response)
+    call_log.record(operation_id, case.path_parameters)
+
+metrics = Metrics()
+# Calls of the currently running test, compared with the performance baseline (see baselines.py)
+test_metrics = Metrics()
+# Sequence of calls per test, to find N+1 request patterns
+call_log = CallLog()
+
+def pytest_configure(config: pytest.Config):
+    # Only the controller process removes old recordings, every pytest-xdist worker records into its own file
+    if CASSETTE_MODE == 'record' and os.environ.get('PYTEST_XDIST_WORKER') is None:
+        cassette.clear()
+
+    # The interactions of a module are recorded and replayed in order by a single worker (see Cassette)
+    if CASSETTE_MODE != 'off' and getattr(config.option, 'dist', 'no') == 'load':
+        config.option.dist = 'loadfile'
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        '--perf-baseline-update', action='store_true', default=False,
+        help='Create or update the performance baselines stored next to the snapshots',
+    )
+
+# Connection pool statistics reported by pytest-xdist workers
+worker_pool_statistics: list[dict[str, int]] = []
+# Throughput of the fuzzing tests (see fuzzing/), appended by the tests and reported by pytest-xdist workers
+fuzz_statistics: list[FuzzStatistics] = []
+# N+1 request patterns of this process and of the pytest-xdist workers, set at the end of the session
+n_plus_one: list[Finding] = []
+
+# tryfirst: the JUnit properties have to be added before the junitxml plugin writes the report
+@pytest.hookimpl(tryfirst=True)
+def pytest_sessionfinish(session: pytest.Session):
+    if CASSETTE_MODE == 'record':
+        cassette.save()
+
+    # Hand the statistics of a pytest-xdist worker over to the controller process
+    if hasattr(session.config, 'workeroutput'):
+        session.config.workeroutput['pool_statistics'] = pool_statistics(http_session)
+        session.config.workeroutput['metrics'] = dict(metrics.samples)
+        session.config.workeroutput['fuzz_statistics'] = [statistics.as_dict() for statistics in fuzz_statistics]
+        session.config.workeroutput['n_plus_one'] = [asdict(finding) for finding in call_log.findings(schemas)]
+        return
+
+    n_plus_one.extend(call_log.findings(schemas))
+    n_plus_one.sort(key=lambda finding: (finding.scope, -finding.calls))
+    if n_plus_one:
+        write_n_plus_one_json(n_plus_one, N_PLUS_ONE_FILE)
+
+    if not metrics.samples:
+        return
+
+    metrics.write_json(METRICS_FILE)
+
+    # Same as the record_testsuite_property fixture, which cannot be used with pytest-xdist
+    xml = session.config.stash.get(junitxml.xml_key, None)
+    if xml is not None:
+        for operation_id, statistics in metrics.summary().items():
+            xml.add_global_property(f'{operation_id}.calls', statistics['count'])
+            for name, value in statistics['latency'].items():
+                xml.add_global_property(f'{operation_id}.latency_{name}', value)
+            xml.add_global_property(f'{operation_id}.ttfb_p95', statistics['ttfb']['p95'])
+            xml.add_global_property(f'{operation_id}.retries', statistics['retries'])
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    worker_pool_statistics.append(node.workeroutput.get('pool_statistics', {}))
+    metrics.merge(node.workeroutput.get('metrics', {}))
+    fuzz_statistics.extend(FuzzStatistics(**statistics) for statistics in node.workeroutput.get('fuzz_statistics', []))
+    n_plus_one.extend(Finding(**finding) for finding in node.workeroutput.get('n_plus_one', []))
+
+def pytest_terminal_summary(terminalreporter, config: pytest.Config):
+    if metrics.samples:
+        terminalreporter.write_sep('-', 'slowest operations')
+        for line in format_table(metrics.slowest()):
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f'All operations: {METRICS_FILE}')
+
+    if fuzz_statistics:
+        terminalreporter.write_sep('-', 'fuzzing throughput')
+        for line in format_fuzz_table(fuzz_statistics):
+            terminalreporter.write_line(line)
+
+    if n_plus_one:
+        terminalreporter.write_sep('-', 'N+1 requests')
+        for line in format_n_plus_one_table(n_plus_one):
+            terminalreporter.write_line(line)
+        terminalreporter.write_line(f'All findings: {N_PLUS_ONE_FILE}')
+
+    # The stand-in server does not use network connections
+    if STANDIN_SERVER == 'True':
+        return
+
+    statistics = merge_statistics(pool_statistics(http_session), *worker_pool_statistics)
+    terminalreporter.write_sep('-', 'HTTP connection pool')
+    terminalreporter.write_line(format_statistics(statistics))
+
 @dataclass
 class Base:
     """Class for storing base info"""
@@ -60,44 +252,111 @@ class TeamAdmin:
     # Hide base token from console output by setting repr=False
     account_token: str = field(repr=False)
 
-class Secret:
-    """
-    Class to store a secret, ensures that the value will not be printed (e.g. if an assertion fails)
-    Based on https://github.com/pytest-dev/pytest/issues/8613#issuecomment-830011874
-    """
-    def __init__(self, value: str):
-        self.value = value
-
-    def __repr__(self):
-        return "Secret(********)"
-
-    def __str___(self):
-        return "*******"
+class StandinSnapshotExtension(JSONSnapshotExtension):
+    """Stores snapshots in __snapshots__/standin to keep them apart from the snapshots of a real server"""
+    @classmethod
+    def dirname(cls, *, test_location) -> str:
+        dirname = Path(super().dirname(test_location=test_location))
+        return str(dirname.parent / 'standin' / dirname.name)
 
 @pytest.fixture
 def snapshot_json(snapshot):
     # https://github.com/tophat/syrupy#jsonsnapshotextension
-    return snapshot.use_extension(JSONSnapshotExtension)
+    return snapshot.use_extension(snapshot_extension())
 
-# scope='module' ensures that this functions runs only once for all tests in this module
-@pytest.fixture(scope='module')
-def account_token() -> str:
-    body = {"username": USERNAME, "password": PASSWORD}
+def snapshot_extension() -> type[JSONSnapshotExtension]:
+    return StandinSnapshotExtension if STANDIN_SERVER == 'True' else JSONSnapshotExtension
 
-    operation = authentication_schema.get_operation_by_id('getAccountTokenfromUsername')
-    case: Case = operation.make_case(body=body)
-    response = case.call_and_validate()
+@pytest.fixture(autouse=True)
+def performance_baseline(request: pytest.FixtureRequest):
+    """Compares the latency of the calls made by the test with the baseline stored next to its snapshots"""
+    test_metrics.samples.clear()
 
-    assert response.status_code == 200
+    yield
 
-    account_token = response.json()['token']
-    assert isinstance(account_token, str)
+    summary = test_metrics.summary()
+    if not summary:
+        return
 
-    return Secret(account_token)
+    snapshot_dir = Path(snapshot_extension().dirname(test_location=PyTestLocation(request.node)))
+    path = baselines.baseline_path(snapshot_dir, request.node.name)
+
+    if request.config.getoption('--perf-baseline-update'):
+        baselines.write_baseline(path, summary)
+        return
+
+    baseline = baselines.read_baseline(path)
+    if baseline is None:
+        return
+
+    regressions = baselines.find_regressions(baseline, summary)
+    if not regressions:
+        return
+
+    message = 'Performance regression compared to ' + path.name + ':\n' + '\n'.join(regressions)
+    if baselines.MODE == 'fail':
+        pytest.fail(message, pytrace=False)
+    else:
+        warnings.warn(baselines.PerformanceRegressionWarning(message))
+
+# scope='session' ensures that this functions runs only once per worker,
+# the token is shared between all workers if the tests run in parallel
+@pytest.fixture(scope='session')
+def account_token(tmp_path_factory: pytest.TempPathFactory) -> Secret:
+    return cached_account_token(tmp_path_factory, 'account_token', USERNAME, PASSWORD)
+
+@pytest.fixture(scope='session')
+def sweeper(account_token: Secret) -> Generator[Sweeper, None, None]:
+    """Deletes all groups, bases and teams created by the tests (and stale ones of earlier runs) at the end of the session"""
+    sweeper = Sweeper(schemas)
+
+    yield sweeper
+
+    if CLEANUP_AFTER_TESTS == 'True':
+        # Not part of the test that happens to be torn down last
+        with call_log.scoped('session'):
+            result = sweeper.sweep()
+        assert not result.failed, f'Cleanup failed: {result.failed}'
+
+@pytest.fixture(scope='session')
+def base_pool(account_token: Secret) -> Optional[BasePool]:
+    if BASE_POOL_SIZE == 0:
+        return None
+
+    return BasePool(
+        schemas, BASE_URL, BASE_POOL_SIZE,
+        create_base=lambda group_name: create_base(account_token, group_name),
+        base_token=lambda workspace_id, base_name: get_base_token(account_token, workspace_id, base_name).value,
+        # Pooled bases cannot outlive the stand-in server, and cassettes have to contain the requests that create them
+        path=POOL_FILE if STANDIN_SERVER == 'False' and CASSETTE_MODE == 'off' else None,
+    )
 
 @pytest.fixture(scope='module')
-def base(account_token: Secret):
-    group_name = f'Automated Tests {datetime.today().strftime("%Y-%m-%d %H-%M-%S")}'
+def base(account_token: Secret, sweeper: Sweeper, base_pool: Optional[BasePool]) -> Generator[Base, None, None]:
+    pooled = base_pool.checkout() if base_pool is not None else None
+    if pooled is not None:
+        workspace_id, base_uuid, base_name = pooled.workspace_id, pooled.uuid, pooled.name
+    else:
+        group_name = f'Automated Tests {datetime.today().strftime("%Y-%m-%d %H-%M-%S")} {unique_suffix()}'
+        group_id, workspace_id, base_uuid, base_name = create_base(account_token, group_name)
+        # The group is deleted together with the base at the end of the session
+        sweeper.track_group(group_id, account_token)
+
+    # Get base token and API token (for file uploads) at the same time
+    base_token, api_token = run_concurrently(
+        lambda: get_base_token(account_token, workspace_id, base_name),
+        lambda: get_api_token(account_token, workspace_id, base_name),
+    )
+
+    # Yield back to the test function
+    yield Base(workspace_id=workspace_id, uuid=base_uuid, token=base_token.value, api_token=api_token.value)
+
+    if pooled is not None:
+        # Deletes the tables created by the tests and returns the base to the pool
+        base_pool.checkin(pooled)
+
+def create_base(account_token: Secret, group_name: str) -> tuple[int, int, str, str]:
+    """Creates a group with a base and returns (group_id, workspace_id, base_uuid, base_name)"""
     group_id, workspace_id = create_group(account_token=account_token, group_name=group_name)
 
     base_name = 'Automated Tests'
@@ -111,92 +370,96 @@ def base(account_token: Secret):
     base_uuid = response.json()["table"]["uuid"]
     assert isinstance(base_uuid, str)
 
-    path_parameters = {'workspace_id': workspace_id, 'base_name': base_name}
-    headers = {'Authorization': f'Bearer {account_token.value}'}
-
-    operation = authentication_schema.get_operation_by_id('getBaseTokenWithAccountToken')
-    case: Case = operation.make_case(path_parameters=path_parameters, headers=headers)
-    response = case.call_and_validate()
-
-    assert response.status_code == 200
-
-    base_token = response.json()['access_token']
-    assert isinstance(base_token, str)
+    return group_id, workspace_id, base_uuid, base_name
 
-    # Get API token for file uploads
-    api_token = get_api_token(account_token, workspace_id, base_name)
+def get_base_token(account_token: Secret, workspace_id: int, base_name: str) -> Secret:
+    def fetch() -> str:
+        path_parameters = {'workspace_id': workspace_id, 'base_name': base_name}
+        headers = {'Authorization': f'Bearer {account_token.value}'}
 
-    # Yield back to the test function
-    yield Base(workspace_id=workspace_id, uuid=base_uuid, token=base_token, api_token=api_token.value)
+        operation = authentication_schema.get_operation_by_id('getBaseTokenWithAccountToken')
+        case: Case = operation.make_case(path_parameters=path_parameters, headers=headers)
+        response = case.call_and_validate()
 
-    if CLEANUP_AFTER_TESTS == 'True':
-        # Delete base to not cause any issues on future test runs
-        path_parameters = {'workspace_id': workspace_id}
-        body = {'name': base_name}
+        assert response.status_code == 200
 
-        case: Case = schema.get_operation_by_id('deleteBase').make_case(path_parameters=path_parameters, body=body)
-        response = case.call_and_validate(headers={"Authorization": f"Bearer {account_token.value}"})
+        base_token = response.json()['access_token']
+        assert isinstance(base_token, str)
 
-        assert response.status_code == 200
+        return base_token
 
-        delete_group(account_token, group_id)
+    return Secret(token_cache.get('base', f'{BASE_URL} {workspace_id}/{base_name}', fetch))
 
 def get_api_token(account_token: Secret, workspace_id: int, base_name: str) -> Secret:
-    path_parameters = {'workspace_id': workspace_id, 'base_name': base_name}
-    headers = {'Authorization': f'Bearer {account_token.value}'}
-    case: Case = authentication_schema.get_operation_by_id('createTempApiToken').make_case(path_parameters=path_parameters, headers=headers)
-    response = case.call_and_validate()
+    fetch = lambda: fetch_api_token(schemas, account_token, workspace_id, base_name)
 
-    assert response.status_code == 200
+    return Secret(token_cache.get('api', f'{BASE_URL} {workspace_id}/{base_name}', fetch))
 
-    api_token = response.json()['api_token']
-    assert isinstance(api_token, str)
+@pytest.fixture(scope='session')
+def template_provisioner(account_token: Secret, sweeper: Sweeper) -> Generator[TemplateProvisioner, None, None]:
+    provisioner = TemplateProvisioner(
+        schemas, account_token.value, BASE_URL,
+        create_workspace=lambda group_name: create_group(account_token, group_name)[1],
+        base_token=lambda workspace_id, base_name: get_base_token(account_token, workspace_id, base_name).value,
+        # Golden bases cannot outlive the stand-in server, and cassettes have to contain the requests that build them
+        cache_dir=TEMPLATE_CACHE_DIR if STANDIN_SERVER == 'False' and CASSETTE_MODE == 'off' else None,
+    )
 
-    return Secret(api_token)
+    yield provisioner
 
-@pytest.fixture(scope='module')
-def workspace_id(account_token: Secret) -> Generator[int, None, None]:
-    base_name = "automated-testing-ahSh2sot"
+    # Golden bases that were not used for a while are deleted by the sweeper
+    sweeper.keep_templates(provisioner.workspace_ids(), provisioner.last_used())
 
-    group_name = f'Automated Tests {datetime.today().strftime("%Y-%m-%d %H-%M-%S")} {randint(1, 100)}'
-    group_id, workspace_id = create_group(account_token=account_token, group_name=group_name)
+@pytest.fixture
+def provision(request: pytest.FixtureRequest) -> Callable[[Tables], Base]:
+    """
+    Returns a function that provides a base with the given tables (table name -> (columns, rows)).
 
-    yield workspace_id
+    With SEATABLE_PROVISIONING=tables, the tables are created in the module's base. With SEATABLE_PROVISIONING=template,
+    every call returns a new base, copied from a golden base with these tables in a single request.
+    """
+    def provision_tables(tables: Tables) -> Base:
+        base: Base = request.getfixturevalue('base')
+        create_tables(schemas, base.uuid, base.token, tables)
+        return base
 
-    if CLEANUP_AFTER_TESTS == 'True':
-        # Delete base to not cause any issues on future test runs
-        path_parameters = {'workspace_id': workspace_id}
-        body = {'name': base_name}
+    def provision_template(tables: Tables) -> Base:
+        account_token: Secret = request.getfixturevalue('account_token')
+        workspace_id: int = request.getfixturevalue('workspace_id')
 
-        case: Case = schema.get_operation_by_id('deleteBase').make_case(path_parameters=path_parameters, body=body)
-        response = case.call_and_validate(headers={"Authorization": f"Bearer {account_token.value}"})
+        dtable = request.getfixturevalue('template_provisioner').provision(tables, workspace_id)
+        base_token, api_token = run_concurrently(
+            lambda: get_base_token(account_token, workspace_id, dtable['name']),
+            lambda: get_api_token(account_token, workspace_id, dtable['name']),
+        )
 
-        assert response.status_code == 200
+        return Base(workspace_id=workspace_id, uuid=dtable['uuid'], token=base_token.value, api_token=api_token.value)
 
-        delete_group(account_token=account_token, group_id=group_id)
+    return provision_template if PROVISIONING == 'template' else provision_tables
 
-# scope='module' ensures that this functions runs only once for all tests in this module
 @pytest.fixture(scope='module')
-def system_admin_account_token() -> Secret:
-    body = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
-
-    operation = authentication_schema.get_operation_by_id('getAccountTokenfromUsername')
-    case: Case = operation.make_case(body=body)
-    response = case.call_and_validate()
-
-    assert response.status_code == 200
+def workspace_id(account_token: Secret, sweeper: Sweeper) -> int:
+    group_name = f'Automated Tests {datetime.today().strftime("%Y-%m-%d %H-%M-%S")} {unique_suffix()}'
+    group_id, workspace_id = create_group(account_token=account_token, group_name=group_name)
+    # The group is deleted together with the bases created by the tests at the end of the session
+    sweeper.track_group(group_id, account_token)
 
-    account_token = response.json()['token']
-    assert isinstance(account_token, str)
+    return workspace_id
 
-    return Secret(account_token)
+@pytest.fixture(scope='session')
+def system_admin_account_token(tmp_path_factory: pytest.TempPathFactory) -> Secret:
+    return cached_account_token(tmp_path_factory, 'system_admin_account_token', ADMIN_USERNAME, ADMIN_PASSWORD)
 
 @pytest.fixture
-def team(system_admin_account_token: Secret) -> Generator[int, None, None]:
-    team_name = f'automated-testing-org-{randint(1, 10000)}'
-    team_admin_email = 'automated-testing-team-admin@seatable.io'
+def team(system_admin_account_token: Secret, sweeper: Sweeper) -> TeamAdmin:
+    suffix = unique_suffix()
+    team_name = f'automated-testing-org-{suffix}'
+    # The email address has to be unique in the system, so parallel workers cannot share the same team admin
+    team_admin_email = f'automated-testing-team-admin+{suffix}@seatable.io'
     team_admin_password = generate_password()
 
+    sweeper.track_team(team_name, system_admin_account_token)
+
     body = {
         'org_name': team_name,
         'admin_email': team_admin_email,
@@ -213,44 +476,59 @@ def team(system_admin_account_token: Secret) -> Generator[int, None, None]:
     assert isinstance(team_id, int)
 
     # Fetch account token for team admin
-    body = {"username": team_admin_email, "password": team_admin_password}
-    operation = authentication_schema.get_operation_by_id('getAccountTokenfromUsername')
-    case: Case = operation.make_case(body=body)
-    response = case.call_and_validate()
+    account_token = get_account_token(team_admin_email, team_admin_password)
 
-    assert response.status_code == 200
+    return TeamAdmin(team_id=team_id, account_token=account_token)
+
+@pytest.fixture
+def team_name(system_admin_account_token: Secret, sweeper: Sweeper) -> str:
+    team_name = f'automated-testing-org-{unique_suffix()}'
+    # The test creates the team, it is deleted at the end of the session
+    sweeper.track_team(team_name, system_admin_account_token)
 
-    account_token = response.json()['token']
-    assert isinstance(account_token, str)
+    return team_name
 
-    yield TeamAdmin(team_id=team_id, account_token=account_token)
+def get_account_token(username: str, password: str) -> str:
+    return fetch_account_token(schemas, username, password)
 
-    if CLEANUP_AFTER_TESTS == 'True':
-        path_parameters = {'org_id': team_id}
-        case: Case = system_admin_account_operations.get_operation_by_id('deleteTeam').make_case(path_parameters=path_parameters)
-        response = case.call_and_validate(headers={'Authorization': f'Bearer {system_admin_account_token.value}'})
+def cached_account_token(tmp_path_factory: pytest.TempPathFactory, name: str, username: str, password: str) -> Secret:
+    """Returns the account token from the token cache, fetches it only once for all parallel workers"""
+    subject = f'{BASE_URL} {username}'
+    fetch = lambda: get_account_token(username, password)
 
-@pytest.fixture
-def team_name(system_admin_account_token: Secret) -> Generator[str, None, None]:
-    team_name = f'automated-testing-org-{randint(1, 10000)}'
+    account_token = share_between_workers(
+        tmp_path_factory, name, lambda: token_cache.get('account', subject, fetch, persistent=True)
+    )
+    # Other workers need to know the token (and how to fetch a new one) as well
+    token_cache.add('account', subject, account_token, fetch, persistent=True)
 
-    yield team_name
+    return Secret(account_token)
 
-    if CLEANUP_AFTER_TESTS == 'True':
-        # Remove team to not cause issues on future test runs
-        case: Case = system_admin_account_operations.get_operation_by_id('listTeams').make_case()
-        response = case.call_and_validate(headers={'Authorization': f'Bearer {system_admin_account_token.value}'})
-        data = response.json()
+def unique_suffix() -> str:
+    """Returns a suffix for names of groups, bases and teams that is unique across parallel workers (pytest-xdist)"""
+    worker = os.environ.get('PYTEST_XDIST_WORKER', 'main')
+    return f'{worker}-{secrets.token_hex(4)}'
 
-        assert response.status_code == 200
+def share_between_workers(tmp_path_factory: pytest.TempPathFactory, name: str, fetch: Callable[[], str]) -> str:
+    """
+    Calls fetch() only once per test run and shares the result with all parallel workers (pytest-xdist).
+
+    Values are not shared when using the stand-in server, since every worker runs its own stand-in server.
+    """
+    if os.environ.get('PYTEST_XDIST_WORKER') is None or STANDIN_SERVER == 'True':
+        return fetch()
 
-        # Find the organization we want to delete
-        org_id = next((team['org_id'] for team in data['organizations'] if team['org_name'] == team_name), None)
-        assert isinstance(org_id, int)
+    # getbasetemp() is specific to the worker, its parent directory is shared by all workers of this run
+    path = tmp_path_factory.getbasetemp().parent / f'{name}.json'
 
-        path_parameters = {'org_id': org_id}
-        case: Case = system_admin_account_operations.get_operation_by_id('deleteTeam').make_case(path_parameters=path_parameters)
-        response = case.call_and_validate(headers={'Authorization': f'Bearer {system_admin_account_token.value}'})
+    with FileLock(f'{path}.lock'):
+        if path.is_file():
+            return json.loads(path.read_text())
+
+        value = fetch()
+        path.write_text(json.dumps(value))
+
+        return value
 
 def generate_password() -> str:
     alphabet = string.ascii_letters + string.digits
@@ -283,14 +561,3 @@ def create_group(account_token: Secret, group_name: str) -> tuple[int, int]:
     assert isinstance(workspace_id, int)
 
     return (group_id, workspace_id)
-
-def delete_group(account_token: Secret, group_id: int):
-
-    if CLEANUP_AFTER_TESTS == 'True':
-        path_parameters = {'group_id': group_id}
-        headers = {'Authorization': f'Bearer {account_token.value}'}
-        case: Case = user_account_operations.get_operation_by_id('deleteGroup') \
-            .make_case(path_parameters=path_parameters, headers=headers)
-        response = case.call_and_validate()
-
-        assert response.status_code == 200
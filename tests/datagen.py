@@ -0,0 +1,218 @@
+"""
+Deterministic generator of synthetic rows for the column definitions of createTable (e.g. COLUMNS in columns.py).
+
+Every column gets a pool of valid values that takes its column_data into account (select options, rate_max_number,
+number and date formats, geolocation formats). Rows are generated in batches of BATCH_SIZE rows and column by column:
+one random.choices() call per column and batch picks the values from the pool, so no Python code runs per cell.
+For JSONL output, the pools are encoded once and every line is joined from the encoded values.
+Batch n only depends on the seed and n, so the output is reproducible and any range of rows can be generated on its own.
+
+Computed columns (formula, link-formula, auto-number) and columns that need other objects (image, file, link, button)
+are left empty. Collaborator columns are only filled if the email addresses of collaborators are given.
+
+Can also be run on its own:
+
+    python datagen.py --count 1000000 --seed 1 --output rows.jsonl
+"""
+import argparse
+import itertools
+import json
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+# Rows per batch, changing it changes the generated rows
+BATCH_SIZE = 1000
+# Distinct values per column, large enough to avoid obvious repetitions
+POOL_SIZE = 4096
+
+# Generated dates lie in these years
+FIRST_DATE = datetime(2000, 1, 1)
+DATE_RANGE_MINUTES = 50 * 365 * 24 * 60
+
+COUNTRIES = ['Germany', 'France', 'Italy', 'Spain', 'Netherlands', 'Austria', 'Switzerland', 'Poland', 'Sweden', 'Japan']
+WORDS = [
+    'alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot', 'golf', 'hotel', 'india', 'juliett', 'kilo', 'lima',
+    'mike', 'november', 'oscar', 'papa', 'quebec', 'romeo', 'sierra', 'tango', 'uniform', 'victor', 'whiskey', 'yankee',
+]
+SIGN_IMAGE_URL = 'https://admin.seatable.io/assets/SeaTable256-256.png'
+
+class RowGenerator:
+    def __init__(self, columns: list[dict], seed: int = 0, collaborators: Optional[list[str]] = None):
+        """`columns` uses the format of createTable (column_name, column_type, column_data)"""
+        self.seed = seed
+        self.collaborators = list(collaborators or [])
+        rng = random.Random(f'{seed}:pools')
+
+        # (column name, pool of values), columns without a pool are left empty
+        self.pools: list[tuple[str, list]] = []
+        for column in columns:
+            pool = value_pool(column, rng, self.collaborators)
+            if pool:
+                self.pools.append((column['column_name'], pool))
+
+        # The same pools as '"name":value' JSON fragments, so that rows can be written without encoding every cell
+        encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+        self.encoded_pools = [[f'{encode(name)}:{encode(value)}' for value in pool] for name, pool in self.pools]
+
+    def batch(self, index: int) -> list[dict]:
+        """Returns the rows index * BATCH_SIZE to (index + 1) * BATCH_SIZE - 1"""
+        rng = random.Random(f'{self.seed}:{index}')
+        names = [name for name, _ in self.pools]
+        columns = [rng.choices(pool, k=BATCH_SIZE) for _, pool in self.pools]
+
+        return list(map(dict, map(zip, itertools.repeat(names), zip(*columns))))
+
+    def batch_jsonl(self, index: int) -> list[str]:
+        """Same rows as batch(), as JSON lines"""
+        rng = random.Random(f'{self.seed}:{index}')
+        columns = [rng.choices(pool, k=BATCH_SIZE) for pool in self.encoded_pools]
+
+        return list(map('{%s}\n'.__mod__, map(','.join, zip(*columns))))
+
+    def rows(self, count: int, start: int = 0) -> Iterator[dict]:
+        """Yields `count` rows starting with row number `start`, one batch is held in memory at a time"""
+        return self._slice(self.batch, count, start)
+
+    def write_jsonl(self, file: Any, count: int, start: int = 0):
+        """Writes `count` rows starting with row number `start` to a text file object, one row per line"""
+        for lines in self._batches(self.batch_jsonl, count, start):
+            file.writelines(lines)
+
+    def _slice(self, batch: Callable[[int], list], count: int, start: int) -> Iterator:
+        for items in self._batches(batch, count, start):
+            yield from items
+
+    def _batches(self, batch: Callable[[int], list], count: int, start: int) -> Iterator[list]:
+        stop = start + count
+        for index in range(start // BATCH_SIZE, -(-stop // BATCH_SIZE)):
+            offset = index * BATCH_SIZE
+            yield batch(index)[max(start - offset, 0):stop - offset]
+
+def value_pool(column: dict, rng: random.Random, collaborators: list[str]) -> list:
+    """Returns POOL_SIZE valid values for the column (an empty list if the column is not filled)"""
+    column_type = column['column_type']
+    data = column.get('column_data') or {}
+
+    generator = VALUE_GENERATORS.get(column_type)
+    if generator is None:
+        return []
+    if column_type == 'collaborator' and not collaborators:
+        return []
+
+    return [generator(rng, data, collaborators) for _ in range(POOL_SIZE)]
+
+def text(rng: random.Random, data: dict, collaborators: list[str]) -> str:
+    return ' '.join(rng.choices(WORDS, k=rng.randint(1, 4)))
+
+def long_text(rng: random.Random, data: dict, collaborators: list[str]) -> str:
+    items = '\n'.join(f'- {text(rng, data, collaborators)}' for _ in range(rng.randint(1, 4)))
+    return f'## {text(rng, data, collaborators).title()}\n{items}'
+
+def number(rng: random.Random, data: dict, collaborators: list[str]) -> float:
+    number_format = data.get('format', 'number')
+    if number_format == 'percent':
+        return round(rng.uniform(0, 100), 2)
+    if number_format in ('euro', 'dollar', 'yuan'):
+        return round(rng.uniform(0, 10_000), 2)
+
+    return rng.choice([rng.randint(-1000, 1_000_000), round(rng.uniform(-1000, 1_000_000), 3)])
+
+def date(rng: random.Random, data: dict, collaborators: list[str]) -> str:
+    # SeaTable accepts ISO dates for every date format, the format only changes the display
+    value = FIRST_DATE + timedelta(minutes=rng.randrange(DATE_RANGE_MINUTES))
+    return value.strftime('%Y-%m-%d %H:%M' if 'HH:mm' in data.get('format', '') else '%Y-%m-%d')
+
+def duration(rng: random.Random, data: dict, collaborators: list[str]) -> int:
+    # Values are in seconds, h:mm only shows full minutes
+    seconds = rng.randrange(100 * 3600)
+    return seconds if data.get('duration_format') == 'h:mm:ss' else seconds - seconds % 60
+
+def single_select(rng: random.Random, data: dict, collaborators: list[str]) -> Optional[str]:
+    options = [option['name'] for option in data.get('options', [])]
+    return rng.choice(options) if options else None
+
+def multiple_select(rng: random.Random, data: dict, collaborators: list[str]) -> Optional[list[str]]:
+    options = [option['name'] for option in data.get('options', [])]
+    return rng.sample(options, rng.randint(1, len(options))) if options else None
+
+def email(rng: random.Random, data: dict, collaborators: list[str]) -> str:
+    return f'{rng.choice(WORDS)}.{rng.randrange(10_000)}@example.com'
+
+def url(rng: random.Random, data: dict, collaborators: list[str]) -> str:
+    return f'https://{rng.choice(WORDS)}.example.com/{"".join(rng.choices(string.ascii_lowercase, k=8))}'
+
+def checkbox(rng: random.Random, data: dict, collaborators: list[str]) -> bool:
+    return rng.random() < 0.5
+
+def rate(rng: random.Random, data: dict, collaborators: list[str]) -> int:
+    return rng.randint(1, data.get('rate_max_number', 5))
+
+def geolocation(rng: random.Random, data: dict, collaborators: list[str]) -> dict:
+    if data.get('geo_format') == 'country_region':
+        return {'country_region': rng.choice(COUNTRIES)}
+
+    return {'lng': round(rng.uniform(-180, 180), 6), 'lat': round(rng.uniform(-90, 90), 6)}
+
+def collaborator(rng: random.Random, data: dict, collaborators: list[str]) -> list[str]:
+    return rng.sample(collaborators, rng.randint(1, len(collaborators)))
+
+def digital_sign(rng: random.Random, data: dict, collaborators: list[str]) -> dict:
+    signed_at = FIRST_DATE + timedelta(minutes=rng.randrange(DATE_RANGE_MINUTES))
+    return {
+        'username': rng.choice(collaborators) if collaborators else email(rng, data, collaborators),
+        'sign_image_url': SIGN_IMAGE_URL,
+        'sign_time': signed_at.strftime('%Y-%m-%dT%H:%M:00.000+00:00'),
+    }
+
+# column_type -> function returning a random value for a column
+VALUE_GENERATORS: dict[str, Callable[[random.Random, dict, list[str]], Any]] = {
+    'text': text,
+    'long-text': long_text,
+    'number': number,
+    'date': date,
+    'duration': duration,
+    'single-select': single_select,
+    'multiple-select': multiple_select,
+    'email': email,
+    'url': url,
+    'checkbox': checkbox,
+    'rate': rate,
+    'geolocation': geolocation,
+    'collaborator': collaborator,
+    'digital-sign': digital_sign,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes synthetic rows as JSONL')
+    parser.add_argument('--columns', type=Path, help='JSON file with the columns of createTable (default: COLUMNS of columns.py)')
+    parser.add_argument('--count', type=int, required=True, help='Number of rows')
+    parser.add_argument('--seed', type=int, default=0, help='Same seed, same rows (default: %(default)s)')
+    parser.add_argument('--start', type=int, default=0, help='Number of the first row (default: %(default)s)')
+    parser.add_argument('--collaborator', action='append', default=[], help='Email address used in collaborator columns')
+    parser.add_argument('--output', type=Path, help='Output file (default: standard output)')
+    args = parser.parse_args()
+
+    if args.columns:
+        columns = json.loads(args.columns.read_text())
+    else:
+        from columns import COLUMNS as columns
+
+    generator = RowGenerator(columns, seed=args.seed, collaborators=args.collaborator)
+
+    start = time.perf_counter()
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            generator.write_jsonl(file, args.count, start=args.start)
+    else:
+        generator.write_jsonl(sys.stdout, args.count, start=args.start)
+    seconds = time.perf_counter() - start
+
+    print(f'Generated {args.count} rows in {seconds:.1f} seconds ({args.count / seconds:.0f} rows/s)', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
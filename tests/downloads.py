@@ -0,0 +1,301 @@
+"""
+Exports the images and files of a base to disk.
+
+AssetExporter walks the image and file cells of all tables (listRows, 1,000 rows per page) and collects the assets they
+refer to. Download links (getFileDownloadLink) are resolved for `batch_size` assets at a time, concurrently, since there
+is no batch endpoint; the files of a batch are downloaded right afterwards, `concurrency` at a time, while the links are
+still valid. Files are written in chunks of CHUNK_SIZE bytes and hashed (SHA-256) while they are written.
+
+Interrupted downloads are kept as "<name>.part" and resumed with a Range request; the part that is already on disk is
+hashed first. Sizes are checked against Content-Length/Content-Range and against the size stored in file cells. Size and
+checksum of every finished file are recorded in MANIFEST_FILE, so a later export only downloads files that are missing
+or whose checksum does not match anymore.
+
+Can also be run on its own:
+
+    python downloads.py --workspace-id 1 --base-name "My Base" --output export/
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from concurrency import MAX_CONCURRENT_REQUESTS, run_concurrently
+from dataclasses import dataclass, field
+from pathlib import Path
+from schemas import SchemaRegistry
+from typing import Any, Iterator, Optional
+from urllib.parse import unquote, urlsplit
+
+CHUNK_SIZE = 64 * 1024
+# Download links are resolved for this many assets before their files are downloaded
+BATCH_SIZE = 100
+# listRows returns at most 1,000 rows
+PAGE_SIZE = 1000
+MANIFEST_FILE = 'manifest.json'
+
+# /workspace/{workspace_id}/asset/{base_uuid}/images/2021-03/test.png -> /images/2021-03/test.png
+ASSET_URL = re.compile(r'/asset/[^/]+(/(?:images|files)/.+)$')
+
+@dataclass(frozen=True)
+class Asset:
+    # Path as expected by getFileDownloadLink, e.g. /images/2021-03/test.png
+    path: str
+    # Only known for files (from the file cell)
+    size: Optional[int] = None
+
+@dataclass
+class DownloadedFile:
+    asset: Asset
+    path: Path
+    size: int
+    sha256: str
+    # Bytes that were already on disk (resumed download or unchanged file)
+    reused_bytes: int = 0
+    # Unchanged since the last export, not downloaded again
+    skipped: bool = False
+
+@dataclass
+class ExportResult:
+    files: list[DownloadedFile] = field(default_factory=list)
+    download_links: int = 0
+    seconds: float = 0
+
+    @property
+    def downloaded_bytes(self) -> int:
+        return sum(file.size - file.reused_bytes for file in self.files)
+
+    @property
+    def files_per_second(self) -> float:
+        return sum(not file.skipped for file in self.files) / self.seconds if self.seconds else 0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.downloaded_bytes / 1_000_000 / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        skipped = sum(file.skipped for file in self.files)
+        return (
+            f'{len(self.files)} files ({skipped} unchanged, {self.downloaded_bytes / 1_000_000:.1f} MB downloaded) '
+            f'in {self.seconds:.1f} seconds ({self.files_per_second:.1f} files/s, {self.megabytes_per_second:.1f} MB/s)'
+        )
+
+class DownloadError(Exception):
+    """Raised if a downloaded file does not have the expected size"""
+
+def asset_path(url: str) -> Optional[str]:
+    """Returns the path of an image/file URL as expected by getFileDownloadLink, None for URLs outside the asset folder"""
+    match = ASSET_URL.search(urlsplit(url).path)
+    return unquote(match.group(1)) if match else None
+
+def cell_assets(rows: list[dict], columns: list[dict]) -> Iterator[Asset]:
+    """Yields the assets in the image and file cells of rows (with column names as keys)"""
+    for column in columns:
+        if column['type'] not in ('image', 'file'):
+            continue
+
+        for row in rows:
+            for value in row.get(column['name']) or []:
+                url, size = (value, None) if column['type'] == 'image' else (value.get('url', ''), value.get('size'))
+                path = asset_path(url)
+                if path is not None:
+                    yield Asset(path=path, size=size)
+
+def sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            hasher.update(chunk)
+
+    return hasher.hexdigest()
+
+class AssetExporter:
+    """Downloads the assets of a base to `directory`, keeping the paths of the asset folder (images/..., files/...)"""
+    def __init__(self, schemas: SchemaRegistry, session: Any, base_uuid: str, base_token: str, api_token: str, directory: Path,
+                 concurrency: int = MAX_CONCURRENT_REQUESTS, batch_size: int = BATCH_SIZE):
+        self.schemas = schemas
+        self.session = session
+        self.base_uuid = base_uuid
+        self.base_token = base_token
+        self.api_token = api_token
+        self.directory = directory
+        self.concurrency = max(concurrency, 1)
+        self.batch_size = max(batch_size, 1)
+        # asset path -> {'size': ..., 'sha256': ...}
+        self.manifest: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def assets(self, table_names: Optional[list[str]] = None) -> list[Asset]:
+        """Returns the assets in the image and file cells of the given tables (default: all tables), without duplicates"""
+        base_operations = self.schemas.get('base_operations.yaml')
+        path_parameters = {'base_uuid': self.base_uuid}
+        headers = {'Authorization': f'Bearer {self.base_token}'}
+
+        if table_names is None:
+            response = base_operations.get_operation_by_id('getMetadata') \
+                .make_case(path_parameters=path_parameters, headers=headers).call_and_validate()
+            assert response.status_code == 200, f'getMetadata failed: {response.text}'
+            table_names = [table['name'] for table in response.json()['metadata']['tables']]
+
+        assets: dict[str, Asset] = {}
+        for table_name in table_names:
+            start = 0
+            while True:
+                query = {'table_name': table_name, 'start': start, 'limit': PAGE_SIZE, 'convert_keys': True}
+                # Not validated against the OpenAPI file, which would take longer than the request for large pages
+                response = base_operations.get_operation_by_id('listRows') \
+                    .make_case(path_parameters=path_parameters, query=query, headers=headers).call()
+                assert response.status_code == 200, f'listRows failed: {response.text}'
+
+                data = response.json()
+                for asset in cell_assets(data['rows'], data['metadata']):
+                    # Keep the size if any cell has it
+                    if asset.path not in assets or assets[asset.path].size is None:
+                        assets[asset.path] = asset
+
+                if len(data['rows']) < PAGE_SIZE:
+                    break
+                start += PAGE_SIZE
+
+        return list(assets.values())
+
+    def export(self, assets: list[Asset]) -> ExportResult:
+        """Downloads all assets that are missing or changed on disk and updates the manifest"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        manifest_file = self.directory / MANIFEST_FILE
+        self.manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+
+        result = ExportResult()
+        start = time.perf_counter()
+
+        for i in range(0, len(assets), self.batch_size):
+            batch = []
+            for asset in assets[i:i + self.batch_size]:
+                unchanged = self.unchanged(asset)
+                if unchanged is not None:
+                    result.files.append(unchanged)
+                else:
+                    batch.append(asset)
+
+            links = run_concurrently(*(lambda asset=asset: self.download_link(asset) for asset in batch), limit=self.concurrency)
+            result.download_links += len(links)
+
+            downloads = zip(batch, links)
+            result.files.extend(run_concurrently(*(lambda d=d: self.download(*d) for d in downloads), limit=self.concurrency))
+
+            # Written after every batch, so an interrupted export only repeats the current batch
+            manifest_file.write_text(json.dumps(self.manifest, indent=2, sort_keys=True))
+
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def target(self, asset: Asset) -> Path:
+        return self.directory / asset.path.lstrip('/')
+
+    def unchanged(self, asset: Asset) -> Optional[DownloadedFile]:
+        """Returns the file on disk if it matches the size and checksum in the manifest"""
+        entry = self.manifest.get(asset.path)
+        target = self.target(asset)
+        if entry is None or not target.exists() or target.stat().st_size != entry['size']:
+            return None
+        if asset.size is not None and asset.size != entry['size']:
+            return None
+        if sha256_file(target) != entry['sha256']:
+            return None
+
+        return DownloadedFile(asset, target, entry['size'], entry['sha256'], reused_bytes=entry['size'], skipped=True)
+
+    def download_link(self, asset: Asset) -> str:
+        headers = {'Authorization': f'Bearer {self.api_token}'}
+        response = self.schemas.get('file_operations.yaml').get_operation_by_id('getFileDownloadLink') \
+            .make_case(query={'path': asset.path}, headers=headers).call_and_validate()
+        assert response.status_code == 200, f'getFileDownloadLink failed for {asset.path}: {response.text}'
+
+        return response.json()['download_link']
+
+    def download(self, asset: Asset, link: str) -> DownloadedFile:
+        """Downloads a single file to "<target>.part" (resuming a previous attempt) and renames it once it is complete"""
+        target = self.target(asset)
+        part = target.with_name(f'{target.name}.part')
+        target.parent.mkdir(parents=True, exist_ok=True)
+
+        offset = part.stat().st_size if part.exists() else 0
+        headers = {'Range': f'bytes={offset}-'} if offset else {}
+        response = self.session.get(link, headers=headers, stream=True)
+
+        if response.status_code == 416:
+            # The part is not shorter than the file, start over
+            response.close()
+            offset = 0
+            response = self.session.get(link, stream=True)
+
+        with response:
+            assert response.status_code in (200, 206), f'Download of {asset.path} failed: {response.status_code} {response.text}'
+            if response.status_code == 200:
+                # The server ignored the Range header
+                offset = 0
+
+            hasher = hashlib.sha256()
+            if offset:
+                with open(part, 'rb') as file:
+                    while chunk := file.read(CHUNK_SIZE):
+                        hasher.update(chunk)
+
+            expected = self.expected_size(response, offset)
+            with open(part, 'ab' if offset else 'wb') as file:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    hasher.update(chunk)
+                    file.write(chunk)
+
+        size = part.stat().st_size
+        for expected_size in (expected, asset.size):
+            if expected_size is not None and size != expected_size:
+                part.unlink()
+                raise DownloadError(f'{asset.path}: got {size} bytes, expected {expected_size}')
+
+        part.replace(target)
+        sha256 = hasher.hexdigest()
+        with self._lock:
+            self.manifest[asset.path] = {'size': size, 'sha256': sha256}
+
+        return DownloadedFile(asset, target, size, sha256, reused_bytes=offset)
+
+    @staticmethod
+    def expected_size(response: Any, offset: int) -> Optional[int]:
+        """Size of the whole file according to the response headers"""
+        match = re.match(r'^bytes \d+-\d+/(\d+)$', response.headers.get('Content-Range', ''))
+        if match:
+            return int(match.group(1))
+        if 'Content-Length' in response.headers and not response.headers.get('Content-Encoding'):
+            return offset + int(response.headers['Content-Length'])
+
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Downloads all images and files of a base')
+    parser.add_argument('--workspace-id', type=int, required=True)
+    parser.add_argument('--base-name', required=True)
+    parser.add_argument('--output', type=Path, required=True, help='Directory, files that are already there are only checked')
+    parser.add_argument('--table', action='append', help='Only export the assets of this table (can be repeated)')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_REQUESTS, help='Downloads in flight (default: %(default)s)')
+    args = parser.parse_args()
+
+    # Uses the same configuration (environment variables) as the tests
+    from accounts import connect, get_api_token, login
+
+    schemas, http_session = connect()
+    account_token = login(schemas)
+    api_token = get_api_token(schemas, account_token, args.workspace_id, args.base_name)
+    path_parameters = {'workspace_id': args.workspace_id, 'base_name': args.base_name}
+    response = schemas.get('authentication.yaml').get_operation_by_id('getBaseTokenWithAccountToken') \
+        .make_case(path_parameters=path_parameters, headers={'Authorization': f'Bearer {account_token.value}'}).call_and_validate()
+    assert response.status_code == 200, f'Could not get a base token: {response.text}'
+
+    exporter = AssetExporter(schemas, http_session, response.json()['dtable_uuid'], response.json()['access_token'], api_token.value,
+                             args.output, concurrency=args.concurrency)
+    result = exporter.export(exporter.assets(args.table))
+    print(f'Exported {result}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""
+Stateful fuzzing of the row operations in base_operations.yaml.
+
+Schemathesis builds a Hypothesis state machine from OpenAPI links: every call to createTable, appendRows, listRows,
+updateRow and deleteRow is generated from the schema, and the links feed the table names and row IDs returned by one
+call into the next one. The links are only added to a private copy of the schema (see add_links()).
+
+Examples that Hypothesis finds interesting (failures and the slowest call sequences, see hypothesis.target()) are
+kept in DATABASE_DIR, so the next run starts from them instead of from scratch.
+"""
+import hypothesis
+import math
+import os
+import secrets
+import time
+from dataclasses import asdict, dataclass
+from hypothesis.database import DirectoryBasedExampleDatabase
+from hypothesis.stateful import multiple
+from pathlib import Path
+from schemathesis.checks import not_a_server_error
+from schemathesis.specs.openapi.checks import response_schema_conformance
+from schemathesis.specs.openapi.schemas import BaseOpenAPISchema
+from schemathesis.stateful import run_state_machine_as_test
+from typing import Any
+
+# Seconds every fuzzing test may run in each worker, checked before every sequence and every call
+TIME_BUDGET = float(os.environ.get('FUZZ_TIME_BUDGET', 60))
+BATCH_SIZE = int(os.environ.get('FUZZ_BATCH_SIZE', 10))
+# Maximum number of calls per generated sequence
+STEP_COUNT = int(os.environ.get('FUZZ_STEP_COUNT', 10))
+
+# Hypothesis example database, shared by all workers and kept between runs (e.g. cache this directory in CI)
+DATABASE_DIR = Path(os.environ.get('FUZZ_DATABASE_DIR', Path(__file__).resolve().parent / '.hypothesis' / 'fuzzing'))
+
+# (source, target, parameters): the response of source (status 200) provides these parameters of target
+LINKS = [
+    ('createTable', 'appendRows', {'body.table_name': '$response.body#/name'}),
+    ('createTable', 'listRows', {'query.table_name': '$response.body#/name'}),
+    ('appendRows', 'listRows', {'query.table_name': '$request.body#/table_name'}),
+    ('appendRows', 'updateRow', {'body.table_name': '$request.body#/table_name'}),
+    ('appendRows', 'deleteRow', {'body.table_name': '$request.body#/table_name'}),
+    ('listRows', 'updateRow', {'body.table_name': '$request.query.table_name'}),
+    ('listRows', 'deleteRow', {'body.table_name': '$request.query.table_name'}),
+    ('updateRow', 'listRows', {'query.table_name': '$request.body#/table_name'}),
+    ('deleteRow', 'listRows', {'query.table_name': '$request.body#/table_name'}),
+]
+
+CHECKS = (not_a_server_error, response_schema_conformance)
+
+@dataclass
+class FuzzStatistics:
+    """Throughput of a fuzzing test in one worker"""
+    test: str
+    worker: str
+    # Sequences that sent at least one call, Hypothesis also discards many drawn sequences before any call
+    examples: int = 0
+    calls: int = 0
+    seconds: float = 0
+
+    @property
+    def examples_per_second(self) -> float:
+        return self.examples / self.seconds if self.seconds else 0
+
+    @property
+    def calls_per_second(self) -> float:
+        return self.calls / self.seconds if self.seconds else 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+class TimeBudgetExhausted(KeyboardInterrupt):
+    """
+    Stops a run from within Hypothesis once its time budget is spent.
+
+    Hypothesis treats a KeyboardInterrupt as an interrupted run: the current example is neither reported as a failure
+    nor recorded, so the example database and the runs replaying it are not affected.
+    """
+
+def add_links(schema: BaseOpenAPISchema):
+    for source, target, parameters in LINKS:
+        schema.add_link(
+            source=schema.get_operation_by_id(source),
+            target=schema.get_operation_by_id(target),
+            status_code='200',
+            parameters=parameters,
+        )
+
+def create_state_machine(schema: BaseOpenAPISchema, base_uuid: str, base_token: str, statistics: FuzzStatistics) -> type:
+    """Returns a state machine that sends all calls to the given base"""
+    class RowWorkflow(schema.as_state_machine()):
+        # time.monotonic() at which the run stops, set by run()
+        deadline = math.inf
+
+        def setup(self):
+            self.check_deadline()
+            self.calls = 0
+            self.latency = 0.0
+            # Tables created by this example
+            self.table_names: list[str] = []
+
+        def teardown(self):
+            # Every example starts with the same tables, otherwise Hypothesis cannot replay examples reliably
+            for table_name in self.table_names:
+                schema.get_operation_by_id('deleteTable') \
+                    .make_case(path_parameters={'base_uuid': base_uuid}, body={'table_name': table_name}) \
+                    .call(headers={'Authorization': f'Bearer {base_token}'})
+
+            if self.calls:
+                statistics.examples += 1
+
+            # Steers Hypothesis towards slow call sequences, the slowest ones are kept in the example database
+            hypothesis.target(self.latency, label='sequence latency')
+
+        def transform(self, result, direction, case):
+            # The request body is optional, but the links fill in body.table_name
+            if not isinstance(case.body, dict):
+                case.body = {}
+
+            return super().transform(result, direction, case)
+
+        def check_deadline(self):
+            if time.monotonic() >= self.deadline:
+                raise TimeBudgetExhausted()
+
+        def before_call(self, case):
+            self.check_deadline()
+            case.path_parameters = {**(case.path_parameters or {}), 'base_uuid': base_uuid}
+            case.headers = {**(case.headers or {}), 'Authorization': f'Bearer {base_token}'}
+
+            # A replayed example must not fail because the table already exists
+            if operation_id(case) == 'createTable' and isinstance(case.body, dict) and isinstance(case.body.get('table_name'), str):
+                case.body['table_name'] = f'{case.body["table_name"]} {secrets.token_hex(4)}'
+
+            # Links can only copy single values, so the row IDs of the previous response are filled in here
+            if case.source is not None and isinstance(case.body, dict):
+                row_ids = response_row_ids(case.source.response)
+                if row_ids and operation_id(case) == 'updateRow':
+                    updates = [update for update in case.body.get('updates') or [] if isinstance(update, dict)] or [{}]
+                    case.body['updates'] = [{**update, 'row_id': row_id} for update, row_id in zip(updates * len(row_ids), row_ids)]
+                if row_ids and operation_id(case) == 'deleteRow':
+                    case.body['row_ids'] = row_ids[:max(len(case.body.get('row_ids') or []), 1)]
+
+        def after_call(self, response, case):
+            statistics.calls += 1
+            self.calls += 1
+            self.latency += response.elapsed.total_seconds()
+
+            if operation_id(case) == 'createTable' and response.status_code == 200:
+                self.table_names.append(case.body['table_name'])
+
+        def validate_response(self, response, case):
+            case.validate_response(response, checks=CHECKS)
+
+        def store_result(self, response, case, elapsed):
+            # All links start at status 200. Other responses would make the next rules draw from a bundle without a
+            # usable response, and Hypothesis would discard almost every generated sequence.
+            if response.status_code != 200:
+                return multiple()
+
+            return super().store_result(response, case, elapsed)
+
+        def bundle(self, name):
+            # Schemathesis only checks whether a bundle exists before it draws from it, so empty bundles are not created
+            return self.bundles.get(name, [])
+
+    return RowWorkflow
+
+def operation_id(case: Any) -> str:
+    return case.operation.definition.raw.get('operationId', case.operation.verbose_name)
+
+def response_row_ids(response: Any) -> list[str]:
+    """Returns the row IDs contained in an appendRows or listRows response"""
+    try:
+        data = response.json()
+    except ValueError:
+        return []
+
+    if not isinstance(data, dict):
+        return []
+
+    rows = data.get('row_ids') or data.get('rows') or []
+    return [row['_id'] for row in rows if isinstance(row, dict) and isinstance(row.get('_id'), str)]
+
+def settings() -> hypothesis.settings:
+    return hypothesis.settings(
+        max_examples=BATCH_SIZE,
+        stateful_step_count=STEP_COUNT,
+        deadline=None,
+        database=DirectoryBasedExampleDatabase(str(DATABASE_DIR)),
+        # Links only apply to successful responses, so many drawn sequences are discarded
+        suppress_health_check=[hypothesis.HealthCheck.filter_too_much, hypothesis.HealthCheck.too_slow],
+    )
+
+def run(state_machine: type, statistics: FuzzStatistics, time_budget: float = TIME_BUDGET):
+    """
+    Runs batches of BATCH_SIZE examples until `time_budget` seconds have passed.
+
+    Hypothesis has no time limit of its own, so the state machine checks the clock before every sequence and every
+    call and stops the run with TimeBudgetExhausted. A call that already started is finished. Every batch starts with
+    the examples from the database and continues with a new random seed, so the batches explore different call
+    sequences.
+    """
+    start = time.monotonic()
+    state_machine.deadline = start + time_budget
+    try:
+        while time.monotonic() < state_machine.deadline:
+            run_state_machine_as_test(state_machine, settings=settings())
+    except TimeBudgetExhausted:
+        pass
+    finally:
+        statistics.seconds = time.monotonic() - start
+
+def format_table(statistics: list[FuzzStatistics]) -> list[str]:
+    lines = [f'{"test":<40} {"worker":<8} {"examples":>8} {"calls":>7} {"seconds":>8} {"examples/s":>10} {"calls/s":>8}']
+    for item in sorted(statistics, key=lambda s: (s.test, s.worker)):
+        lines.append(
+            f'{item.test:<40} {item.worker:<8} {item.examples:>8} {item.calls:>7} {item.seconds:>8.1f} '
+            f'{item.examples_per_second:>10.2f} {item.calls_per_second:>8.2f}'
+        )
+
+    return lines
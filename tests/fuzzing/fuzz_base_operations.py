@@ -0,0 +1,35 @@
+"""
+Stateful fuzzing of createTable, appendRows, listRows, updateRow and deleteRow (see fuzz.py).
+
+Run with: pytest fuzzing/fuzz_base_operations.py -n 4
+
+Every worker fuzzes its own base for FUZZ_TIME_BUDGET seconds, the throughput of each worker is reported at the end.
+"""
+import fuzz
+import os
+import pytest
+from conftest import BASE_URL, Base, fuzz_statistics, http_session, standin_app
+from fuzz import FuzzStatistics, add_links, create_state_machine
+from schemas import SchemaRegistry
+
+# One shard per worker, so that every worker fuzzes at the same time
+SHARDS = int(os.environ.get('FUZZ_SHARDS', os.environ.get('PYTEST_XDIST_WORKER_COUNT', 1)))
+
+# add_links() changes the schema, so the schema used by the other tests is not touched
+registry = SchemaRegistry(base_url=BASE_URL, app=standin_app, session=http_session)
+
+@pytest.fixture(scope='module')
+def schema():
+    schema = registry.load('base_operations.yaml')
+    add_links(schema)
+    return schema
+
+@pytest.mark.parametrize('shard', range(SHARDS))
+def test_fuzz_rows(base: Base, schema, shard: int):
+    statistics = FuzzStatistics(test='test_fuzz_rows', worker=os.environ.get('PYTEST_XDIST_WORKER', 'main'))
+    state_machine = create_state_machine(schema, base.uuid, base.token, statistics)
+
+    try:
+        fuzz.run(state_machine, statistics)
+    finally:
+        fuzz_statistics.append(statistics)
@@ -0,0 +1,105 @@
+"""
+Builds n:m link graphs between two tables with the batch link endpoints.
+
+link_graph() picks the linked rows for every row, reproducible from a seed. Linker sends the graph in batches of
+`batch_size` rows, `concurrency` requests at a time, with one of the batch endpoints:
+
+- createRowLink (adds links, fails for links that already exist)
+- updateRowLink (replaces the links of the given rows)
+- updateRowLinksDeprecated (/batch-update-links/, replaces the links of the given rows)
+"""
+import random
+import time
+from concurrency import MAX_CONCURRENT_REQUESTS, run_concurrently
+from dataclasses import dataclass
+from schemas import SchemaRegistry
+from typing import Iterator
+
+# Rows per request. The batch endpoints do not document a limit, this keeps the request bodies small.
+MAX_BATCH_ROWS = 1000
+
+# operation_id -> OpenAPI file
+OPERATIONS = {
+    'createRowLink': 'base_operations.yaml',
+    'updateRowLink': 'base_operations.yaml',
+    'updateRowLinksDeprecated': 'base_operations_deprecated.yaml',
+}
+
+@dataclass
+class LinkResult:
+    rows: int = 0
+    links: int = 0
+    requests: int = 0
+    seconds: float = 0
+
+    @property
+    def links_per_second(self) -> float:
+        return self.links / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return f'{self.links} links of {self.rows} rows in {self.requests} requests, {self.seconds:.1f} seconds ({self.links_per_second:.0f} links/s)'
+
+def link_graph(row_ids: list[str], other_row_ids: list[str], links_per_row: int, seed: int = 0) -> Iterator[tuple[str, list[str]]]:
+    """
+    Yields (row ID, linked row IDs) for every row. Each row is linked to `links_per_row` different rows of the other table,
+    chosen at random, so every row of the other table is linked to about links_per_row * len(row_ids) / len(other_row_ids) rows.
+    """
+    rng = random.Random(seed)
+    count = min(links_per_row, len(other_row_ids))
+
+    for row_id in row_ids:
+        yield row_id, [other_row_ids[i] for i in rng.sample(range(len(other_row_ids)), count)]
+
+class Linker:
+    """Links the rows of two tables through an existing link column"""
+    def __init__(self, schemas: SchemaRegistry, base_uuid: str, base_token: str, table_id: str, other_table_id: str, link_id: str,
+                 batch_size: int = MAX_BATCH_ROWS, concurrency: int = MAX_CONCURRENT_REQUESTS):
+        self.schemas = schemas
+        self.base_uuid = base_uuid
+        self.base_token = base_token
+        self.table_id = table_id
+        self.other_table_id = other_table_id
+        self.link_id = link_id
+        self.batch_size = batch_size
+        self.concurrency = max(concurrency, 1)
+
+    def link(self, graph: Iterator[tuple[str, list[str]]], operation_id: str = 'createRowLink') -> LinkResult:
+        """Sends the whole graph and returns the number of rows, links and requests"""
+        assert operation_id in OPERATIONS, f'operation_id must be one of {list(OPERATIONS)}'
+
+        batches = []
+        batch: dict[str, list[str]] = {}
+        for row_id, other_row_ids in graph:
+            batch[row_id] = other_row_ids
+            if len(batch) == self.batch_size:
+                batches.append(batch)
+                batch = {}
+        if batch:
+            batches.append(batch)
+
+        start = time.perf_counter()
+        run_concurrently(*(lambda batch=batch: self.send(operation_id, batch) for batch in batches), limit=self.concurrency)
+
+        return LinkResult(
+            rows=sum(len(batch) for batch in batches),
+            links=sum(len(other_row_ids) for batch in batches for other_row_ids in batch.values()),
+            requests=len(batches),
+            seconds=time.perf_counter() - start,
+        )
+
+    def send(self, operation_id: str, other_rows_ids_map: dict[str, list[str]]):
+        """Sends a single batch"""
+        body = {
+            'table_id': self.table_id,
+            'other_table_id': self.other_table_id,
+            'link_id': self.link_id,
+            'other_rows_ids_map': other_rows_ids_map,
+        }
+        if operation_id == 'updateRowLinksDeprecated':
+            body['row_id_list'] = list(other_rows_ids_map)
+
+        headers = {'Authorization': f'Bearer {self.base_token}'}
+        response = self.schemas.get(OPERATIONS[operation_id]).get_operation_by_id(operation_id) \
+            .make_case(path_parameters={'base_uuid': self.base_uuid}, body=body, headers=headers).call_and_validate()
+
+        assert response.status_code == 200, f'{operation_id} failed: {response.text}'
@@ -0,0 +1,137 @@
+import json
+import math
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from typing import Any, Optional
+
+PERCENTILES = (50, 95, 99)
+
+# Fields of a sample, samples are stored as plain tuples so that pytest-xdist workers can send them to the controller
+FIELDS = ('latency', 'ttfb', 'request_bytes', 'response_bytes', 'status_code', 'retries')
+
+class Metrics:
+    """Collects latency, payload sizes, status codes and retries per operation ID"""
+    def __init__(self):
+        # operation_id -> list of samples (see FIELDS)
+        self.samples: dict[str, list[tuple]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(self, operation_id: str, response: Response):
+        # Set by TimingAdapter, falls back to the time until the headers arrived
+        ttfb, latency = getattr(response, 'timing', (response.elapsed.total_seconds(),) * 2)
+        body = response.request.body or b''
+
+        sample = (
+            latency,
+            ttfb,
+            len(body.encode() if isinstance(body, str) else body),
+            len(response.content),
+            response.status_code,
+            getattr(response, 'retries', 0),
+        )
+
+        with self._lock:
+            self.samples[operation_id].append(sample)
+
+    def merge(self, samples: dict[str, list]):
+        with self._lock:
+            for operation_id, values in samples.items():
+                self.samples[operation_id].extend(tuple(value) for value in values)
+
+    def summary(self) -> dict[str, dict[str, Any]]:
+        """Returns statistics per operation ID, sorted by operation ID"""
+        summary = {}
+
+        for operation_id, samples in sorted(self.samples.items()):
+            columns = dict(zip(FIELDS, zip(*samples)))
+            status_codes = defaultdict(int)
+            for status_code in columns['status_code']:
+                status_codes[str(status_code)] += 1
+
+            summary[operation_id] = {
+                'count': len(samples),
+                'latency': distribution(columns['latency']),
+                'ttfb': distribution(columns['ttfb']),
+                'request_bytes': sum(columns['request_bytes']),
+                'response_bytes': sum(columns['response_bytes']),
+                'status_codes': dict(sorted(status_codes.items())),
+                'retries': sum(columns['retries']),
+            }
+
+        return summary
+
+    def slowest(self, limit: int = 10) -> list[tuple[str, dict[str, Any]]]:
+        """Returns the operations with the highest p95 latency"""
+        return sorted(self.summary().items(), key=lambda item: item[1]['latency']['p95'], reverse=True)[:limit]
+
+    def write_json(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.summary(), indent=2))
+
+class TimingAdapter(BaseAdapter):
+    """
+    Transport adapter that measures the time to first byte and the total latency of a request.
+
+    Mounted directly on top of the adapter that talks to the server, so time spent waiting for the rate limiter
+    is not included.
+    """
+    def __init__(self, adapter: BaseAdapter):
+        super().__init__()
+        self.adapter = adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        start = time.perf_counter()
+        response = self.adapter.send(request, **kwargs)
+        ttfb = time.perf_counter() - start
+
+        if not kwargs.get('stream'):
+            # Download the body here to include it in the latency (requests would read it right afterwards anyway)
+            response.content
+
+        response.timing = (ttfb, time.perf_counter() - start)
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+def mount_timing(session: Any) -> Any:
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, TimingAdapter):
+            session.mount(prefix, TimingAdapter(adapter))
+
+    return session
+
+def distribution(values: tuple) -> dict[str, float]:
+    result = {f'p{p}': round(percentile(values, p), 4) for p in PERCENTILES}
+    result['max'] = round(max(values), 4)
+    return result
+
+def percentile(values: tuple, p: float) -> Optional[float]:
+    """Nearest-rank percentile"""
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+def format_table(rows: list[tuple[str, dict[str, Any]]]) -> list[str]:
+    """Formats (operation_id, statistics) pairs as a table, latencies in milliseconds"""
+    header = ('operation', 'calls', 'p50 ms', 'p95 ms', 'p99 ms', 'ttfb p95 ms', 'resp. bytes', 'retries')
+    lines = [header]
+
+    for operation_id, statistics in rows:
+        lines.append((
+            operation_id,
+            str(statistics['count']),
+            *(f'{statistics["latency"][f"p{p}"] * 1000:.1f}' for p in PERCENTILES),
+            f'{statistics["ttfb"]["p95"] * 1000:.1f}',
+            str(statistics['response_bytes']),
+            str(statistics['retries']),
+        ))
+
+    widths = [max(len(line[i]) for line in lines) for i in range(len(header))]
+    return ['  '.join(value.ljust(width) if i == 0 else value.rjust(width) for i, (value, width) in enumerate(zip(line, widths))) for line in lines]
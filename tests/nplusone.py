@@ -0,0 +1,175 @@
+"""
+Finds N+1 request patterns: a test or fixture that calls the same operation again and again where a batch operation
+could do the work in a single call.
+
+CallLog records every schemathesis call (see after_call in conftest.py) with the test and phase it belongs to (setup for
+fixtures, call for the test itself, teardown). At least MIN_CALLS calls of the same operation with the same path
+parameters, each less than WINDOW seconds after the previous one, are reported together with the batch operations the
+OpenAPI file offers for the same resource:
+
+- operations on "batch-<verb>-<resource>/" with the same method (e.g. insertColumnDeprecated -> appendColumnsDeprecated)
+- operations with the same method on the same resource that accept an array of items (e.g. addRowDeprecated -> appendRows)
+- list operations for operations on a single item (e.g. getRow -> listRows)
+
+Operations of a deprecated file (e.g. base_operations_deprecated.yaml) may also be replaced by the operations of its
+current file (e.g. base_operations.yaml). Big data operations only replace other big data operations, the rows they work
+on are stored in a different backend.
+
+Operations that already accept an array of items are not reported, repeating them is how large batches are split up
+(e.g. appendRows in seeding.py). Neither are operations without a batch operation (e.g. paging through listRows).
+"""
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from schemas import SPEC_DIR, SchemaRegistry
+from typing import Iterator, Optional
+
+MIN_CALLS = int(os.environ.get('N_PLUS_ONE_MIN_CALLS', 3))
+WINDOW = float(os.environ.get('N_PLUS_ONE_WINDOW', 2))
+
+# Verbs used in the paths of batch operations, per HTTP method
+VERBS = {'post': ('append', 'insert', 'add', 'create'), 'put': ('update',), 'delete': ('delete',)}
+
+@dataclass
+class Finding:
+    # e.g. "test_base_operations.py::test_listRows_links[listRows] (call)"
+    scope: str
+    operation_id: str
+    path_parameters: dict
+    calls: int
+    seconds: float
+    batch_operations: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        batch = ', '.join(self.batch_operations)
+        return f'{self.scope}: {self.calls} x {self.operation_id} in {self.seconds:.1f} seconds -> {batch}'
+
+class CallLog:
+    """Records the operation and path parameters of every call, in the order they were sent"""
+    def __init__(self):
+        # (scope, operation_id, path parameters as JSON) -> times of the calls
+        self.calls: dict[tuple[str, str, str], list[float]] = {}
+        # Overrides the scope of the running test, see scoped()
+        self._scope: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def record(self, operation_id: str, path_parameters: Optional[dict], scope: Optional[str] = None):
+        scope = scope if scope is not None else self._scope or os.environ.get('PYTEST_CURRENT_TEST', '')
+        key = (scope, operation_id, json.dumps(path_parameters or {}, sort_keys=True, default=str))
+
+        with self._lock:
+            self.calls.setdefault(key, []).append(time.monotonic())
+
+    @contextmanager
+    def scoped(self, scope: str) -> Iterator[None]:
+        """Records all calls (of all threads) under `scope`, e.g. the calls of the sweeper at the end of the session"""
+        self._scope = scope
+        try:
+            yield
+        finally:
+            self._scope = None
+
+    def findings(self, schemas: SchemaRegistry) -> list[Finding]:
+        """Returns the longest run of calls within WINDOW of each other, for every scope, operation and path parameters"""
+        findings = []
+        alternatives: Optional[dict[str, Optional[list[str]]]] = None
+
+        with self._lock:
+            calls = dict(self.calls)
+
+        for (scope, operation_id, path_parameters), times in calls.items():
+            if len(times) < MIN_CALLS:
+                continue
+
+            # Longest run of calls that are less than WINDOW apart
+            count, start, run_start = 1, 0, 0
+            for i in range(1, len(times)):
+                if times[i] - times[i - 1] >= WINDOW:
+                    run_start = i
+                if i - run_start + 1 > count:
+                    count, start = i - run_start + 1, run_start
+            if count < MIN_CALLS:
+                continue
+
+            # Only look at the OpenAPI files if there is something to report
+            if alternatives is None:
+                alternatives = batch_operations(schemas)
+            # None: accepts an array of items itself, []: there is nothing to replace the calls with
+            batch = alternatives.get(operation_id, [])
+            if not batch:
+                continue
+
+            findings.append(Finding(
+                scope=scope,
+                operation_id=operation_id,
+                path_parameters=json.loads(path_parameters),
+                calls=count,
+                seconds=round(times[start + count - 1] - times[start], 3),
+                batch_operations=batch,
+            ))
+
+        return sorted(findings, key=lambda f: (f.scope, -f.calls))
+
+def batch_operations(schemas: SchemaRegistry) -> dict[str, Optional[list[str]]]:
+    """Returns {operation_id: batch operations} for all operations, None for operations that accept arrays of items"""
+    operations = {}
+    for spec in sorted(SPEC_DIR.glob('*.yaml')):
+        for operation_id, (method, path, definition) in schemas.operation_definitions(spec.name).items():
+            operations[operation_id] = (spec.name, method, path, accepts_array(definition))
+
+    result = {}
+    for operation_id, (filename, method, path, is_batch) in operations.items():
+        if is_batch:
+            result[operation_id] = None
+            continue
+
+        resource = resource_name(path)
+        batch_resources = {f'batch-{verb}-{resource}' for verb in VERBS.get(method, ())}
+        # /rows/{row_id}/ -> /rows/
+        list_path = re.sub(r'{[^}/]+}/?$', '', path) if method == 'get' else None
+
+        # e.g. base_operations_deprecated.yaml -> base_operations.yaml
+        filenames = {filename, filename.replace('_deprecated.yaml', '.yaml')}
+        big_data = is_big_data(operation_id)
+
+        result[operation_id] = [
+            other_id for other_id, (other_filename, other_method, other_path, other_is_batch) in operations.items()
+            if other_id != operation_id and other_method == method and other_filename in filenames
+            and is_big_data(other_id) == big_data and (
+                resource_name(other_path) in batch_resources
+                or (other_is_batch and resource_name(other_path) == resource)
+                or (list_path not in (None, path) and other_path == list_path)
+            )
+        ]
+
+    return result
+
+def is_big_data(operation_id: str) -> bool:
+    """Whether the operation works on the big data backend, e.g. insertBigDataRowsDeprecated"""
+    return 'BigData' in operation_id
+
+def resource_name(path: str) -> str:
+    """Last path segment that is not a parameter, e.g. "rows" for /api/v2/dtables/{base_uuid}/rows/{row_id}/"""
+    segments = [segment for segment in path.split('?')[0].split('/') if segment and not segment.startswith('{')]
+    return segments[-1] if segments else ''
+
+def accepts_array(definition: dict) -> bool:
+    """Whether a top-level property of the request body is an array (e.g. rows of appendRows)"""
+    for content in definition.get('requestBody', {}).get('content', {}).values():
+        properties = content.get('schema', {}).get('properties', {})
+        if any(isinstance(schema, dict) and schema.get('type') == 'array' for schema in properties.values()):
+            return True
+
+    return False
+
+def format_table(findings: list[Finding]) -> list[str]:
+    return [str(finding) for finding in findings]
+
+def write_json(findings: list[Finding], path: Path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps([asdict(finding) for finding in findings], indent=2))
@@ -0,0 +1,273 @@
+"""
+Pool of warm bases that are reused across test runs instead of being created and deleted for every test module.
+
+Each pooled base lives in its own group "Automated Tests Pool <n>", which the sweeper leaves alone. The pool is recorded
+in POOL_FILE (per server), and every base carries a lease while a test module uses it. The lease is renewed in the
+background until the base is checked in. checkout() hands out a free base, or one whose lease expired (its holder
+crashed or was killed), and only creates a new base as long as the pool
+has less than `size` bases. checkin() resets the base by deleting all tables that were not there when the base was
+created, and releases the lease. A base that was not returned (expired lease) is reset when it is checked out again.
+If all bases are leased, checkout() returns None and the caller creates a base of its own.
+
+The pool file is locked while it is read and written, so parallel workers (pytest-xdist) and parallel runs on the same
+machine share the pool. New bases are created without holding the lock: checkout() reserves a slot in the pool, creates
+the base and then records it.
+
+Can also be run on its own:
+
+    python pool.py [--drain]
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from filelock import FileLock
+from pathlib import Path
+from schemas import SchemaRegistry
+from sweeper import SweepResult, Sweeper
+from typing import Callable, Iterator, Optional
+
+POOL_FILE = Path(os.environ.get('BASE_POOL_FILE', Path(__file__).resolve().parent / '.pool' / 'bases.json'))
+# Leases are renewed while a base is checked out, leases that were not renewed for this long are reclaimed
+LEASE_SECONDS = float(os.environ.get('BASE_POOL_LEASE_MINUTES', 10)) * 60
+
+GROUP_NAME_PREFIX = 'Automated Tests Pool'
+
+@dataclass
+class PooledBase:
+    group_id: int
+    workspace_id: int
+    uuid: str
+    name: str
+    # Tables of the freshly created base, these are kept when the base is reset
+    initial_tables: list[str] = field(default_factory=list)
+    # "<holder> <expires at>" while the base is checked out
+    lease: Optional[str] = None
+    # Set once a test used the base, cleared by reset()
+    dirty: bool = False
+    # "Automated Tests Pool <n>", empty in pool files written before it was recorded
+    group_name: str = ''
+
+    def lease_expired(self, now: float) -> bool:
+        return self.lease is not None and float(self.lease.rsplit(' ', 1)[1]) < now
+
+    @property
+    def pending(self) -> bool:
+        """A slot reserved by checkout() while it creates the base"""
+        return not self.uuid
+
+class BasePool:
+    """
+    Hands out pooled bases.
+
+    `create_base(group_name)` creates a group with a base and returns (group_id, workspace_id, base_uuid, base_name).
+    `base_token(workspace_id, base_name)` returns a base token. Without `path`, the pool only lives in this process.
+    """
+    def __init__(self, schemas: SchemaRegistry, server: str, size: int, create_base: Callable[[str], tuple[int, int, str, str]],
+                 base_token: Callable[[int, str], str], path: Optional[Path] = POOL_FILE, lease_seconds: float = LEASE_SECONDS):
+        self.schemas = schemas
+        self.server = server
+        self.size = size
+        self.create_base = create_base
+        self.base_token = base_token
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.holder = f'{os.environ.get("PYTEST_XDIST_WORKER", "main")}-{os.getpid()}'
+        # Base UUID -> event that stops the renewal of its lease
+        self._heartbeats: dict[str, threading.Event] = {}
+        # Used instead of the pool file if there is no path
+        self._bases: list[PooledBase] = []
+        self._lock = threading.Lock()
+
+    def checkout(self) -> Optional[PooledBase]:
+        """Leases a base, None if the pool is exhausted"""
+        now = time.time()
+        lease = self._lease(now)
+        with self._locked() as bases:
+            # Reservations of holders that crashed while creating their base
+            bases[:] = [b for b in bases if not (b.pending and b.lease_expired(now))]
+
+            base = next((b for b in bases if b.lease is None), None) \
+                or next((b for b in bases if b.lease_expired(now) and not b.pending), None)
+
+            if base is None:
+                if len(bases) >= self.size:
+                    return None
+                # The base is created without holding the lock, the reserved slot keeps other holders from exceeding size
+                # Numbers of drained bases and dropped reservations are not reused while later bases still exist
+                number = max([len(bases), *(group_number(b.group_name) for b in bases)]) + 1
+                group_name = f'{GROUP_NAME_PREFIX} {number}'
+                bases.append(PooledBase(0, 0, '', '', lease=lease, group_name=group_name))
+            else:
+                group_name = None
+                # Left behind by a holder that did not return it
+                needs_reset = base.dirty
+                base.lease = lease
+                base.dirty = True
+                leased = PooledBase(**asdict(base))
+
+        if group_name is not None:
+            leased = self._create(group_name, lease)
+            needs_reset = False
+
+        self._heartbeats[leased.uuid] = self._heartbeat(leased)
+        if needs_reset:
+            self.reset(leased)
+
+        return leased
+
+    def _create(self, group_name: str, lease: str) -> PooledBase:
+        """Creates a base for the slot reserved with `lease` and records it in the pool"""
+        def release_slot(bases: list[PooledBase]):
+            bases[:] = [b for b in bases if not (b.pending and b.lease == lease)]
+
+        try:
+            group_id, workspace_id, uuid, name = self.create_base(group_name)
+            base = PooledBase(group_id, workspace_id, uuid, name, initial_tables=self.table_names(workspace_id, name, uuid),
+                              lease=lease, dirty=True, group_name=group_name)
+        except BaseException:
+            with self._locked() as bases:
+                release_slot(bases)
+            raise
+
+        with self._locked() as bases:
+            release_slot(bases)
+            bases.append(base)
+
+        return PooledBase(**asdict(base))
+
+    def checkin(self, base: PooledBase):
+        """Resets the base and releases its lease"""
+        heartbeat = self._heartbeats.pop(base.uuid, None)
+        if heartbeat is not None:
+            heartbeat.set()
+
+        self.reset(base)
+
+        with self._locked() as bases:
+            for pooled in bases:
+                if pooled.uuid == base.uuid and pooled.lease == base.lease:
+                    pooled.lease = None
+                    pooled.dirty = False
+
+    def renew(self, base: PooledBase) -> bool:
+        """Extends the lease of a checked out base, False if the lease was taken over or released"""
+        lease = self._lease(time.time())
+        with self._locked() as bases:
+            pooled = next((b for b in bases if b.uuid == base.uuid and b.lease == base.lease), None)
+            if pooled is None:
+                return False
+            pooled.lease = base.lease = lease
+
+        return True
+
+    def _heartbeat(self, base: PooledBase) -> threading.Event:
+        """Renews the lease of the base in the background until the returned event is set"""
+        stopped = threading.Event()
+
+        def renew():
+            while not stopped.wait(self.lease_seconds / 4):
+                if not self.renew(base):
+                    return
+
+        threading.Thread(target=renew, name=f'lease {base.uuid}', daemon=True).start()
+        return stopped
+
+    def _lease(self, now: float) -> str:
+        return f'{self.holder} {now + self.lease_seconds}'
+
+    def reset(self, base: PooledBase):
+        """Deletes all tables except the initial ones"""
+        headers = {'Authorization': f'Bearer {self.base_token(base.workspace_id, base.name)}'}
+        operation = self.schemas.get('base_operations.yaml').get_operation_by_id('deleteTable')
+
+        for table_name in self.table_names(base.workspace_id, base.name, base.uuid):
+            if table_name in base.initial_tables:
+                continue
+
+            response = operation.make_case(path_parameters={'base_uuid': base.uuid}, body={'table_name': table_name}, headers=headers) \
+                .call_and_validate()
+            assert response.status_code == 200, f'deleteTable {table_name} failed: {response.text}'
+
+        base.dirty = False
+
+    def table_names(self, workspace_id: int, base_name: str, base_uuid: str) -> list[str]:
+        headers = {'Authorization': f'Bearer {self.base_token(workspace_id, base_name)}'}
+        response = self.schemas.get('base_operations.yaml').get_operation_by_id('getMetadata') \
+            .make_case(path_parameters={'base_uuid': base_uuid}, headers=headers).call_and_validate()
+        assert response.status_code == 200, f'getMetadata failed: {response.text}'
+
+        return [table['name'] for table in response.json()['metadata']['tables']]
+
+    def bases(self) -> list[PooledBase]:
+        with self._locked() as bases:
+            return [PooledBase(**asdict(base)) for base in bases]
+
+    def drain(self) -> list[PooledBase]:
+        """Removes all bases that are not leased from the pool and returns them (the caller deletes their groups)"""
+        now = time.time()
+        with self._locked() as bases:
+            drained = [b for b in bases if not b.pending and (b.lease is None or b.lease_expired(now))]
+            bases[:] = [b for b in bases if b not in drained]
+
+        return drained
+
+    @contextmanager
+    def _locked(self) -> Iterator[list[PooledBase]]:
+        """Yields the bases of this server and saves them afterwards"""
+        with self._lock:
+            if self.path is None:
+                yield self._bases
+                return
+
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with FileLock(f'{self.path}.lock'):
+                records = json.loads(self.path.read_text()) if self.path.is_file() else {}
+                bases = [PooledBase(**record) for record in records.get(self.server, [])]
+
+                yield bases
+
+                records[self.server] = [asdict(base) for base in bases]
+                self.path.write_text(json.dumps(records, indent=2))
+
+def group_number(group_name: str) -> int:
+    """Returns n of "Automated Tests Pool <n>", 0 for other names"""
+    number = group_name.removeprefix(GROUP_NAME_PREFIX).strip()
+    return int(number) if number.isdigit() else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Shows the pooled bases of SEATABLE_SERVER')
+    parser.add_argument('--drain', action='store_true', help='Delete all bases that are not leased (and their groups)')
+    args = parser.parse_args()
+
+    # Uses the same configuration (environment variables) as the tests
+    from accounts import BASE_URL, connect, login
+
+    schemas, _ = connect()
+    pool = BasePool(schemas, BASE_URL, size=0, create_base=lambda name: None, base_token=lambda workspace_id, name: '')
+
+    now = time.time()
+    for base in pool.bases():
+        state = 'free' if base.lease is None else ('expired' if base.lease_expired(now) else f'leased by {base.lease.split()[0]}')
+        if base.pending:
+            state = f'being created by {base.lease.split()[0]}'
+
+        print(f'{base.workspace_id:>8} {base.uuid} {state}')
+
+    if args.drain:
+        # Taken out of the pool first, so that no test leases them while they are deleted
+        group_ids = {base.group_id for base in pool.drain()}
+        sweeper = Sweeper(schemas)
+        sweeper.account_token = login(schemas)
+
+        result = SweepResult()
+        sweeper.delete_workspaces([w for w in sweeper.workspaces() if w.get('group_id') in group_ids], result)
+        for failure in result.failed:
+            print(f'Failed: {failure}')
+        print(f'Deleted {result}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,245 @@
+import backoff
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from pyrate_limiter import Duration, InMemoryBucket, Limiter, Rate
+from requests import PreparedRequest, Response, Session
+from requests.adapters import BaseAdapter
+from typing import Optional
+from urllib.parse import urlsplit
+
+# Rate limits as documented in intro/limits.md
+# "cloud" applies to SeaTable Cloud, "server" to SeaTable Dedicated and self-hosted servers
+PROFILES = ['cloud', 'server', 'off']
+
+# Give up if a request would have to wait longer than this for its turn (e.g. because a daily budget is used up)
+MAX_WAIT = int(os.environ.get('RATE_LIMIT_MAX_WAIT', 300))
+
+# Number of retries for responses with status 429
+MAX_RETRIES = int(os.environ.get('RATE_LIMIT_MAX_RETRIES', 8))
+
+# Matches the base UUID in paths like /dtable-server/api/v1/dtables/{base_uuid}/rows/
+BASE_UUID = re.compile(r'/(?:dtables|query|bases)/([0-9a-f]{8}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{4}-?[0-9a-f]{12})/')
+
+@dataclass(frozen=True)
+class EndpointClass:
+    """A group of endpoints that share a rate limit"""
+    name: str
+    pattern: re.Pattern
+    # None matches all methods
+    methods: Optional[frozenset[str]]
+    cloud: tuple[Rate, ...]
+    server: tuple[Rate, ...]
+    # Limits are counted per base if the path contains a base UUID, per IP address otherwise
+    per_base: bool = True
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.methods is None or method in self.methods) and self.pattern.match(path) is not None
+
+def per_minute(limit: int) -> Rate:
+    return Rate(limit, Duration.MINUTE)
+
+def per_hour(limit: int) -> Rate:
+    return Rate(limit, Duration.HOUR)
+
+def per_day(limit: int) -> Rate:
+    return Rate(limit, Duration.DAY)
+
+# A request counts against every class it matches (e.g. listing rows also counts as a base operation)
+ENDPOINT_CLASSES = [
+    EndpointClass(
+        'auth-token', re.compile(r'/api2/auth-token/'), None,
+        cloud=(per_minute(60),), server=(), per_base=False,
+    ),
+    EndpointClass(
+        'base-token', re.compile(r'/api/v2\.1/(dtable/app-access-token/|workspace/[^/]+/dtable/[^/]+/access-token/)'), None,
+        cloud=(per_minute(60),), server=(), per_base=False,
+    ),
+    EndpointClass(
+        'web', re.compile(r'/api/v2\.1/'), None,
+        cloud=(per_minute(300),), server=(), per_base=False,
+    ),
+    EndpointClass(
+        'list-rows', re.compile(r'/dtable-server/api/v1/dtables/[^/]+/rows/$'), frozenset({'GET'}),
+        cloud=(per_minute(60), per_hour(600)), server=(per_minute(100), per_hour(6000)),
+    ),
+    EndpointClass(
+        'filtered-rows', re.compile(r'/dtable-server/api/v1/.*/filtered-rows/$'), frozenset({'POST'}),
+        cloud=(per_minute(60), per_hour(600)), server=(per_minute(100), per_hour(6000)),
+    ),
+    EndpointClass(
+        'dtable-server', re.compile(r'/dtable-server/api/v1/'), None,
+        cloud=(per_minute(300), per_day(5000)), server=(per_minute(600), per_day(5000)),
+    ),
+    EndpointClass(
+        'dtable-db', re.compile(r'/dtable-db/api/v1/'), None,
+        cloud=(per_minute(300), per_day(5000)), server=(),
+    ),
+    EndpointClass(
+        'api-gateway', re.compile(r'/api-gateway/api/v2/'), None,
+        cloud=(per_minute(300), per_day(5000)), server=(),
+    ),
+]
+
+class RateLimitExceeded(Exception):
+    """Raised if a request cannot be sent within MAX_WAIT seconds without exceeding a rate limit"""
+
+class RateLimiter:
+    """
+    Schedules requests so that they stay within the documented rate limits.
+
+    Every endpoint class gets one token bucket per base (or one in total for endpoints that are counted per IP).
+    Requests wait until all of their buckets have room. The x-ratelimit-* headers returned by /api-gateway are
+    used to pause until the reset time once the server reports that the budget is used up, and responses with
+    status 429 are retried with exponential backoff.
+    """
+    def __init__(self, profile: str, workers: int = 1):
+        assert profile in PROFILES, f'Rate limit profile must be one of {PROFILES}'
+        self.profile = profile
+        # Parallel workers (pytest-xdist) share the server's budget, so each worker only gets its share
+        self.workers = max(workers, 1)
+        self._limiters: dict[tuple[str, str], Limiter] = {}
+        # Bucket key -> time.time() until which the server told us to wait (x-ratelimit-reset)
+        self._paused_until: dict[tuple[str, str], float] = {}
+        self._lock = threading.Lock()
+        self.retries = 0
+
+    def rates(self, endpoint_class: EndpointClass) -> list[Rate]:
+        if self.profile == 'off':
+            return []
+
+        rates = endpoint_class.cloud if self.profile == 'cloud' else endpoint_class.server
+        return [Rate(max(rate.limit // self.workers, 1), rate.interval) for rate in rates]
+
+    def buckets(self, method: str, url: str) -> list[tuple[EndpointClass, str]]:
+        """Returns (endpoint_class, key) for all buckets the request counts against"""
+        path = urlsplit(url).path
+        match = BASE_UUID.search(path)
+        base_uuid = match.group(1).replace('-', '') if match else ''
+
+        return [
+            (endpoint_class, base_uuid if endpoint_class.per_base else '')
+            for endpoint_class in ENDPOINT_CLASSES
+            if endpoint_class.matches(method, path) and self.rates(endpoint_class)
+        ]
+
+    def acquire(self, method: str, url: str):
+        """Blocks until the request can be sent"""
+        for endpoint_class, key in self.buckets(method, url):
+            self._wait_for_reset((endpoint_class.name, key))
+
+            if not self._limiter(endpoint_class, key).try_acquire(f'{endpoint_class.name}:{key}'):
+                raise RateLimitExceeded(
+                    f'Rate limit for {endpoint_class.name} endpoints would be exceeded for more than {MAX_WAIT} seconds'
+                )
+
+    def update(self, method: str, url: str, response: Response):
+        """Adapts to the x-ratelimit-* headers of a response"""
+        remaining = response.headers.get('x-ratelimit-remaining')
+        reset = response.headers.get('x-ratelimit-reset')
+
+        if remaining is None or reset is None:
+            return
+
+        try:
+            remaining, reset = int(remaining), float(reset)
+        except ValueError:
+            return
+
+        # Only pause once the budget is used up, the local buckets take care of the rest
+        if remaining <= 0:
+            with self._lock:
+                for endpoint_class, key in self.buckets(method, url):
+                    self._paused_until[(endpoint_class.name, key)] = reset
+
+    def send(self, adapter: BaseAdapter, request: PreparedRequest, **kwargs) -> Response:
+        """Sends the request through `adapter`, retrying responses with status 429"""
+        attempts = 0
+
+        @backoff.on_predicate(retry_delays, lambda response: response.status_code == 429, max_tries=MAX_RETRIES + 1, jitter=None, on_backoff=self._on_backoff)
+        def send():
+            nonlocal attempts
+            attempts += 1
+
+            self.acquire(request.method, request.url)
+            response = adapter.send(request, **kwargs)
+            self.update(request.method, request.url, response)
+            return response
+
+        response = send()
+        # Reported by the metrics (see metrics.py)
+        response.retries = attempts - 1
+
+        return response
+
+    def mount(self, session: Session) -> Session:
+        """Routes all requests of `session` through the rate limiter"""
+        for prefix, adapter in list(session.adapters.items()):
+            if not isinstance(adapter, RateLimitAdapter):
+                session.mount(prefix, RateLimitAdapter(self, adapter))
+
+        return session
+
+    def _limiter(self, endpoint_class: EndpointClass, key: str) -> Limiter:
+        with self._lock:
+            if (endpoint_class.name, key) not in self._limiters:
+                bucket = InMemoryBucket(self.rates(endpoint_class))
+                self._limiters[(endpoint_class.name, key)] = Limiter(bucket, raise_when_fail=False, max_delay=MAX_WAIT * 1000)
+
+            return self._limiters[(endpoint_class.name, key)]
+
+    def _wait_for_reset(self, bucket: tuple[str, str]):
+        with self._lock:
+            paused_until = self._paused_until.pop(bucket, None)
+
+        if paused_until is None:
+            return
+
+        delay = paused_until - time.time()
+        if delay > MAX_WAIT:
+            raise RateLimitExceeded(f'Rate limit for {bucket[0]} endpoints resets in {delay:.0f} seconds')
+        if delay > 0:
+            time.sleep(delay)
+
+    def _on_backoff(self, details: dict):
+        with self._lock:
+            self.retries += 1
+
+class RateLimitAdapter(BaseAdapter):
+    """Transport adapter that sends requests through a RateLimiter, wraps the adapter that was mounted before"""
+    def __init__(self, limiter: RateLimiter, adapter: BaseAdapter):
+        super().__init__()
+        self.limiter = limiter
+        self.adapter = adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        return self.limiter.send(self.adapter, request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+def retry_delays():
+    """
+    Wait generator for backoff: honors Retry-After if the server sends it, otherwise waits 1, 2, 4, ... seconds.
+
+    The 429 responses of SeaTable have no body and usually no Retry-After header, so the delay mostly doubles
+    until the sliding window of the server has room again.
+    """
+    response = yield
+    attempt = 0
+
+    while True:
+        delay = min(2 ** attempt, 60)
+        retry_after = response.headers.get('retry-after', '') if response is not None else ''
+        if retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+
+        attempt += 1
+        response = yield delay
+
+def default_profile(base_url: str) -> str:
+    """SeaTable Cloud has stricter limits than self-hosted servers"""
+    host = urlsplit(base_url).hostname or ''
+    return 'cloud' if host == 'seatable.io' or host.endswith('.seatable.io') else 'server'
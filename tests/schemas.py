@@ -0,0 +1,204 @@
+import hashlib
+import itertools
+import os
+import pickle
+import schemathesis
+from pathlib import Path
+from schemathesis.constants import HTTP_METHODS
+from schemathesis.specs.openapi.loaders import load_yaml
+from schemathesis.specs.openapi.references import RECURSION_DEPTH_LIMIT
+from schemathesis.specs.openapi.schemas import BaseOpenAPISchema, OperationDefinition
+from schemathesis.transports import RequestsTransport
+from typing import Any, Optional
+
+# The OpenAPI files live in the repository root, one level above the tests
+SPEC_DIR = Path(__file__).resolve().parent.parent
+
+# Parsed, validated and resolved specs are stored here, keyed by the hash of the file contents
+CACHE_DIR = Path(os.environ.get('SCHEMA_CACHE_DIR', Path(__file__).resolve().parent / '.schema_cache'))
+
+# Bump this whenever the layout of the cached data changes
+CACHE_FORMAT = 1
+
+class LazySchema:
+    """
+    Stand-in for a schemathesis schema that only loads the OpenAPI file once an operation is requested.
+
+    Only the requested operation is turned into an APIOperation, the other (already resolved) operation
+    definitions stay plain dictionaries until they are needed.
+    """
+    def __init__(self, registry: 'SchemaRegistry', filename: str):
+        self.registry = registry
+        self.filename = filename
+        self._operations: dict[str, Any] = {}
+
+    @property
+    def schema(self) -> BaseOpenAPISchema:
+        """The underlying schemathesis schema (loads the file if necessary)"""
+        return self.registry.load(self.filename)
+
+    def get_operation_by_id(self, operation_id: str) -> Any:
+        if operation_id not in self._operations:
+            schema = self.schema
+            resolved = self.registry._resolved_operations[self.filename].get(operation_id)
+
+            if resolved is None:
+                # Let schemathesis raise its usual error (including suggestions for similar operation IDs)
+                return schema.get_operation_by_id(operation_id)
+
+            self._operations[operation_id] = make_operation(schema, *resolved)
+
+        return self._operations[operation_id]
+
+    def __repr__(self):
+        return f'LazySchema({self.filename!r})'
+
+class SchemaRegistry:
+    """
+    Loads every OpenAPI file at most once per process.
+
+    Parsing ~25k lines of YAML, validating them against the OpenAPI meta schema and resolving all $refs
+    takes several seconds. The result only depends on the file contents, so it is pickled to CACHE_DIR and
+    reused on the next run as long as the file does not change.
+    """
+    def __init__(self, base_url: str, app: Any = None, cache_dir: Optional[Path] = CACHE_DIR, session: Any = None):
+        self.base_url = base_url
+        # ASGI application to send requests to (instead of the network), see standin.py
+        self.app = app
+        # requests.Session used for all calls (e.g. to apply rate limits), see SessionTransport
+        self.session = session
+        self.cache_dir = cache_dir
+        self._schemas: dict[str, BaseOpenAPISchema] = {}
+        self._raw_schemas: dict[str, dict] = {}
+        self._resolved_operations: dict[str, dict[str, tuple]] = {}
+        self._lazy_schemas: dict[str, LazySchema] = {}
+
+    def get(self, filename: str) -> LazySchema:
+        """Returns a lazy accessor, the file is not read until the first get_operation_by_id() call"""
+        if filename not in self._lazy_schemas:
+            self._lazy_schemas[filename] = LazySchema(self, filename)
+
+        return self._lazy_schemas[filename]
+
+    def load(self, filename: str) -> BaseOpenAPISchema:
+        if filename not in self._schemas:
+            self._schemas[filename] = self._load(SPEC_DIR / filename)
+
+        return self._schemas[filename]
+
+    def resolve(self, filename: str):
+        """Parses, validates and resolves the file (or reads it from the cache) without creating a schemathesis schema"""
+        if filename not in self._resolved_operations:
+            path = SPEC_DIR / filename
+            content = path.read_bytes()
+            cached = self._read_cache(path, content)
+
+            if cached is None:
+                raw_schema = load_yaml(content.decode('utf-8'))
+                schema = self._from_dict(path, raw_schema, validate_schema=True)
+                cached = {'raw_schema': raw_schema, 'operations': resolve_operations(schema)}
+                self._write_cache(path, content, cached)
+
+            self._raw_schemas[filename] = cached['raw_schema']
+            self._resolved_operations[filename] = cached['operations']
+
+    def is_loaded(self, filename: str) -> bool:
+        return filename in self._schemas
+
+    def operation_paths(self, filename: str) -> dict[str, tuple[str, str]]:
+        """Returns {operation_id: (method, path)} for all operations in the file"""
+        self.resolve(filename)
+        return {operation_id: (method, path) for operation_id, (path, method, *_) in self._resolved_operations[filename].items()}
+
+    def operation_definitions(self, filename: str) -> dict[str, tuple[str, str, dict]]:
+        """Returns {operation_id: (method, path, resolved definition)} for all operations in the file"""
+        self.resolve(filename)
+        return {operation_id: (method, path, definition) for operation_id, (path, method, definition, _) in self._resolved_operations[filename].items()}
+
+    def _load(self, path: Path) -> BaseOpenAPISchema:
+        self.resolve(path.name)
+        # Validation already happened in resolve()
+        schema = self._from_dict(path, self._raw_schemas[path.name], validate_schema=False)
+
+        if self.session is not None:
+            schema.transport = SessionTransport(self.session)
+
+        return schema
+
+    def _from_dict(self, path: Path, raw_schema: dict, validate_schema: bool) -> BaseOpenAPISchema:
+        return schemathesis.from_dict(
+            raw_schema, app=self.app, base_url=self.base_url, location=path.as_uri(), validate_schema=validate_schema
+        )
+
+    def _cache_path(self, path: Path, content: bytes) -> Path:
+        digest = hashlib.sha256(content)
+        digest.update(f'{schemathesis.__version__}:{CACHE_FORMAT}'.encode())
+        return self.cache_dir / f'{path.stem}-{digest.hexdigest()[:16]}.pickle'
+
+    def _read_cache(self, path: Path, content: bytes) -> Optional[dict]:
+        if self.cache_dir is None:
+            return None
+
+        try:
+            with open(self._cache_path(path, content), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _write_cache(self, path: Path, content: bytes, cached: dict):
+        if self.cache_dir is None:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_path = self._cache_path(path, content)
+
+        # Remove entries for previous versions of the same file
+        for stale in self.cache_dir.glob(f'{path.stem}-*.pickle'):
+            stale.unlink(missing_ok=True)
+
+        # Write to a temporary file first so that concurrent runs never read a partially written file
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(cached, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+
+class SessionTransport(RequestsTransport):
+    """Sends all requests through the same requests.Session instead of creating a new session for every call"""
+    def __init__(self, session: Any):
+        self.session = session
+
+    def send(self, case: Any, *, session: Any = None, **kwargs: Any) -> Any:
+        return super().send(case, session=session or self.session, **kwargs)
+
+def resolve_operations(schema: BaseOpenAPISchema) -> dict[str, tuple[str, str, dict, list]]:
+    """Returns {operation_id: (path, method, resolved_definition, common_parameters)} for all operations"""
+    operations = {}
+
+    # Mirrors BaseOpenAPISchema._group_operations_by_id(), but keeps the plain (picklable) dictionaries
+    for path, methods in schema.raw_schema['paths'].items():
+        scope, _ = schema._resolve_methods(methods)
+        common_parameters = schema.resolver.resolve_all(methods.get('parameters', []), RECURSION_DEPTH_LIMIT - 8)
+
+        for method, definition in methods.items():
+            if method not in HTTP_METHODS or 'operationId' not in definition:
+                continue
+
+            schema.resolver.push_scope(scope)
+            try:
+                resolved_definition = schema.resolver.resolve_all(definition, RECURSION_DEPTH_LIMIT - 8)
+            finally:
+                schema.resolver.pop_scope()
+
+            operations[resolved_definition['operationId']] = (path, method, resolved_definition, common_parameters)
+
+    return operations
+
+def make_operation(schema: BaseOpenAPISchema, path: str, method: str, resolved_definition: dict, common_parameters: list) -> Any:
+    """Builds a schemathesis APIOperation from an already resolved operation definition"""
+    scope, raw_methods = schema._resolve_methods(schema.raw_schema['paths'][path])
+    parameters = schema.collect_parameters(
+        itertools.chain(resolved_definition.get('parameters', ()), common_parameters), resolved_definition
+    )
+    definition = OperationDefinition(raw_methods[method], resolved_definition, scope, parameters)
+
+    return schema.make_operation(path, method, parameters, definition)
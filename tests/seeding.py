@@ -0,0 +1,179 @@
+"""
+Appends large numbers of rows to a table.
+
+Rows are read lazily from any iterable (e.g. a generator, read_jsonl() or read_csv()), split into batches of at most
+MAX_BATCH_ROWS rows and sent concurrently. Only `concurrency` batches are in flight at any time and the next batch is
+read once one of them finished, so memory use does not depend on the number of rows. Requests go through the shared
+session, so they wait for the rate limits and retry responses with status 429 (see ratelimit.py).
+
+Can also be run on its own:
+
+    python seeding.py --workspace-id 1 --base-name "My Base" --table Table1 --jsonl rows.jsonl [--row-ids row_ids.txt]
+"""
+import argparse
+import csv
+import itertools
+import json
+import time
+from collections import deque
+from concurrency import MAX_CONCURRENT_REQUESTS
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from schemas import SchemaRegistry
+from typing import Callable, Iterable, Iterator, Optional
+
+# appendRows and addBigDataRows accept at most 1,000 rows per request
+MAX_BATCH_ROWS = 1000
+
+@dataclass
+class SeedResult:
+    rows: int = 0
+    requests: int = 0
+    seconds: float = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return f'{self.rows} rows in {self.requests} requests, {self.seconds:.1f} seconds ({self.rows_per_second:.0f} rows/s)'
+
+class Seeder:
+    """Appends rows to the tables of a base, either to the normal backend (appendRows) or to big data (addBigDataRows)"""
+    def __init__(self, schemas: SchemaRegistry, base_uuid: str, base_token: str,
+                 batch_size: int = MAX_BATCH_ROWS, concurrency: int = MAX_CONCURRENT_REQUESTS):
+        assert 0 < batch_size <= MAX_BATCH_ROWS, f'batch_size must be between 1 and {MAX_BATCH_ROWS}'
+        self.base_operations = schemas.get('base_operations.yaml')
+        self.base_uuid = base_uuid
+        self.base_token = base_token
+        self.batch_size = batch_size
+        self.concurrency = max(concurrency, 1)
+
+    def seed(self, table_name: str, rows: Iterable[dict], big_data: bool = False,
+             on_row_ids: Optional[Callable[[list[str]], None]] = None) -> SeedResult:
+        """
+        Appends all rows and returns the number of rows and requests.
+
+        on_row_ids() receives the IDs of the appended rows batch by batch, in the order of `rows`.
+        addBigDataRows does not return row IDs, so it is not called for big data.
+        """
+        result = SeedResult()
+        start = time.perf_counter()
+
+        def collect(future: Future):
+            row_ids, count = future.result()
+            result.rows += count
+            result.requests += 1
+            if on_row_ids is not None and not big_data:
+                on_row_ids(row_ids)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending: deque[Future] = deque()
+            for batch in batches(rows, self.batch_size):
+                pending.append(executor.submit(self.append, table_name, batch, big_data))
+                # Wait for the oldest batch before reading the next one, this also keeps the row IDs in order
+                if len(pending) >= self.concurrency:
+                    collect(pending.popleft())
+
+            while pending:
+                collect(pending.popleft())
+
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def append(self, table_name: str, rows: list[dict], big_data: bool = False) -> tuple[list[str], int]:
+        """Sends a single batch and returns (row IDs, number of inserted rows)"""
+        operation_id = 'addBigDataRows' if big_data else 'appendRows'
+
+        path_parameters = {'base_uuid': self.base_uuid}
+        body = {'table_name': table_name, 'rows': rows}
+        headers = {'Authorization': f'Bearer {self.base_token}'}
+
+        case = self.base_operations.get_operation_by_id(operation_id) \
+            .make_case(path_parameters=path_parameters, body=body, headers=headers)
+        response = case.call_and_validate()
+
+        assert response.status_code == 200, f'{operation_id} failed: {response.text}'
+
+        data = response.json()
+        assert data['inserted_row_count'] == len(rows)
+
+        return [row['_id'] for row in data.get('row_ids', [])], data['inserted_row_count']
+
+def batches(rows: Iterable[dict], size: int) -> Iterator[list[dict]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    """Yields one row per line"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+def read_csv(path: Path) -> Iterator[dict]:
+    """Yields the rows of a CSV file whose first line contains the column names, empty cells are left out"""
+    with open(path, newline='', encoding='utf-8') as file:
+        for row in csv.DictReader(file):
+            yield {name: value for name, value in row.items() if value != ''}
+
+def main():
+    parser = argparse.ArgumentParser(description='Appends rows from a file to a table')
+    parser.add_argument('--workspace-id', type=int, required=True)
+    parser.add_argument('--base-name', required=True)
+    parser.add_argument('--table', required=True, help='Name of the table, has to exist unless --create-table is given')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--jsonl', type=Path, help='File with one JSON object (row) per line')
+    source.add_argument('--csv', type=Path, help='CSV file whose first line contains the column names')
+    source.add_argument('--generate', type=int, metavar='COUNT', help='Append COUNT synthetic rows for the columns of columns.py')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic rows (default: %(default)s)')
+    parser.add_argument('--create-table', action='store_true', help='Create the table with the columns of columns.py')
+    parser.add_argument('--big-data', action='store_true', help='Append the rows to the big data backend (addBigDataRows)')
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_ROWS, help='Rows per request (default: %(default)s)')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_REQUESTS, help='Requests in flight (default: %(default)s)')
+    parser.add_argument('--row-ids', type=Path, help='Write the IDs of the appended rows to this file, one per line')
+    args = parser.parse_args()
+
+    # Uses the same configuration (environment variables) as the tests
+    from accounts import connect, login
+
+    schemas, _ = connect()
+    headers = {'Authorization': f'Bearer {login(schemas).value}'}
+    path_parameters = {'workspace_id': args.workspace_id, 'base_name': args.base_name}
+    response = schemas.get('authentication.yaml').get_operation_by_id('getBaseTokenWithAccountToken') \
+        .make_case(path_parameters=path_parameters, headers=headers).call_and_validate()
+    assert response.status_code == 200, f'Could not get a base token: {response.text}'
+    base_uuid, base_token = response.json()['dtable_uuid'], response.json()['access_token']
+
+    if args.create_table:
+        from columns import COLUMNS
+
+        body = {'table_name': args.table, 'columns': COLUMNS}
+        response = schemas.get('base_operations.yaml').get_operation_by_id('createTable') \
+            .make_case(path_parameters={'base_uuid': base_uuid}, body=body, headers={'Authorization': f'Bearer {base_token}'}) \
+            .call_and_validate()
+        assert response.status_code == 200, f'Could not create the table: {response.text}'
+
+    if args.jsonl:
+        rows = read_jsonl(args.jsonl)
+    elif args.csv:
+        rows = read_csv(args.csv)
+    else:
+        from datagen import RowGenerator
+        from columns import COLUMNS
+        rows = RowGenerator(COLUMNS, seed=args.seed).rows(args.generate)
+
+    seeder = Seeder(schemas, base_uuid, base_token, batch_size=args.batch_size, concurrency=args.concurrency)
+
+    if args.row_ids:
+        with open(args.row_ids, 'w', encoding='utf-8') as file:
+            result = seeder.seed(args.table, rows, big_data=args.big_data, on_row_ids=lambda ids: file.writelines(f'{i}\n' for i in ids))
+    else:
+        result = seeder.seed(args.table, rows, big_data=args.big_data)
+
+    print(f'Appended {result}')
+
+if __name__ == '__main__':
+    main()
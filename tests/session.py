@@ -0,0 +1,59 @@
+import os
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any
+
+# Number of hosts to keep connection pools for, and number of keep-alive connections per host
+POOL_SIZE = int(os.environ.get('HTTP_POOL_SIZE', 10))
+
+def create_session() -> requests.Session:
+    """
+    Returns the session used for all requests of the tests.
+
+    Connections are kept alive and reused for later requests to the same host, so the TLS handshake happens
+    once per connection instead of once per call.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+
+    return session
+
+def pool_statistics(session: requests.Session) -> dict[str, int]:
+    """Returns the number of requests sent and connections opened by the connection pools of `session`"""
+    statistics = {'requests': 0, 'connections_opened': 0}
+
+    # The same adapter is mounted for http and https
+    adapters: set[Any] = {unwrap(adapter) for adapter in session.adapters.values()}
+
+    for adapter in adapters:
+        poolmanager = getattr(adapter, 'poolmanager', None)
+        if poolmanager is None:
+            continue
+
+        for key in poolmanager.pools.keys():
+            pool = poolmanager.pools[key]
+            statistics['requests'] += pool.num_requests
+            statistics['connections_opened'] += pool.num_connections
+
+    return statistics
+
+def unwrap(adapter: Any) -> Any:
+    """Returns the innermost adapter of adapters that wrap other adapters (e.g. RateLimitAdapter)"""
+    while hasattr(adapter, 'adapter'):
+        adapter = adapter.adapter
+
+    return adapter
+
+def merge_statistics(*statistics: dict[str, int]) -> dict[str, int]:
+    merged = {'requests': 0, 'connections_opened': 0}
+    for s in statistics:
+        for key in merged:
+            merged[key] += s.get(key, 0)
+
+    return merged
+
+def format_statistics(statistics: dict[str, int]) -> str:
+    reused = max(statistics['requests'] - statistics['connections_opened'], 0)
+    return f'{statistics["requests"]} requests, {statistics["connections_opened"]} connections opened, {reused} reused'
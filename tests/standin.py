@@ -0,0 +1,1428 @@
+"""
+In-process stand-in for a SeaTable server.
+
+The routes are generated from the operation definitions in the OpenAPI files: every path/method pair of SPEC_FILES
+becomes a route, and the operations registered with @operation() below are backed by an in-memory model of users,
+groups, bases, tables, rows and links. Operations without a handler answer with 501.
+
+The stand-in is meant to be used through schemathesis' ASGI transport (see SchemaRegistry's `app` argument) or
+through a starlette TestClient, so no sockets are involved.
+"""
+import ast
+import base64
+import calendar
+import copy
+import io
+import itertools
+import json
+import math
+import random
+import re
+import secrets
+import sqlite3
+import string
+import threading
+import uuid
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta, timezone
+from requests import PreparedRequest, Response as HTTPResponse
+from requests.adapters import BaseAdapter
+from schemas import SchemaRegistry
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from typing import Any, Callable, Optional
+from urllib.parse import quote
+from werkzeug.formparser import FormDataParser
+from werkzeug.http import parse_options_header
+
+SPEC_FILES = [
+    'authentication.yaml',
+    'user_account_operations.yaml',
+    'base_operations.yaml',
+    'base_operations_deprecated.yaml',
+    'file_operations.yaml',
+    'system_admin_account_operations.yaml',
+]
+
+# Base tokens are valid for three days, temporary API tokens for one hour
+BASE_TOKEN_LIFETIME = timedelta(days=3)
+API_TOKEN_LIFETIME = timedelta(hours=1)
+
+# querySQL returns 100 rows without a LIMIT clause and never more than 10,000 rows
+SQL_DEFAULT_LIMIT = 100
+SQL_MAX_LIMIT = 10_000
+
+# appendRows and addBigDataRows accept at most 1,000 rows per request
+MAX_APPEND_ROWS = 1000
+
+# listRowLinks returns 10 linked rows per row unless a limit is given
+LINKED_ROWS_DEFAULT_LIMIT = 10
+
+ROW_ID_ALPHABET = string.ascii_letters + string.digits + '-'
+KEY_ALPHABET = string.ascii_letters + string.digits
+
+# Column types whose cell values are lists or objects
+JSON_COLUMN_TYPES = {'multiple-select', 'collaborator', 'geolocation', 'digital-sign', 'image', 'file', 'link'}
+
+# Column types that are computed when a row is read
+COMPUTED_COLUMN_TYPES = {'formula', 'link-formula', 'auto-number'}
+
+HANDLERS: dict[str, tuple[Callable, Optional[str], int]] = {}
+
+# Default of request parameters that have to be present
+REQUIRED = object()
+
+def operation(operation_id: str, auth: Optional[str] = None, status: int = 200):
+    """
+    Registers the handler for an operationId.
+
+    `auth` is the kind of token the operation expects in the Authorization header ('account', 'admin', 'base' or 'api').
+    """
+    def decorator(handler: Callable) -> Callable:
+        HANDLERS[operation_id] = (handler, auth, status)
+        return handler
+
+    return decorator
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+@dataclass
+class Call:
+    """A single request, as passed to the operation handlers"""
+    state: 'State'
+    path_params: dict
+    query: dict
+    body: Any
+    files: dict
+    # The account email or base UUID the token belongs to
+    subject: Optional[str] = None
+    base_url: str = ''
+
+    def body_param(self, name: str, kind: Any = str, default: Any = REQUIRED) -> Any:
+        """Returns a field of the request body, rejects the request with 400 if it is missing or invalid"""
+        value = self.body.get(name) if isinstance(self.body, dict) else None
+        return param(name, value, kind, default)
+
+    def query_param(self, name: str, kind: Any = str, default: Any = REQUIRED) -> Any:
+        return param(name, self.query.get(name), kind, default)
+
+    def path_param(self, name: str, kind: Any = str) -> Any:
+        return param(name, self.path_params.get(name), kind)
+
+def param(name: str, value: Any, kind: Any = str, default: Any = REQUIRED) -> Any:
+    """
+    Checks a request parameter against `kind` (a type or a tuple of types), numbers in strings (e.g. query parameters)
+    are converted to int. Missing parameters (None) get the default.
+    """
+    if value is None:
+        if default is REQUIRED:
+            raise ApiError(400, f'{name} is required')
+        return default
+
+    if kind is int and isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    elif isinstance(value, kind) and not (isinstance(value, bool) and kind is int):
+        return value
+
+    raise ApiError(400, f'{name} is invalid')
+
+def param_items(name: str, values: list, kind: Any = str) -> list:
+    """Checks every item of a list parameter"""
+    return [param(name, value, kind) for value in values]
+
+@dataclass
+class Table:
+    id: str
+    name: str
+    columns: list[dict] = field(default_factory=list)
+    # Rows (keyed by row ID) in insertion order, values are keyed by column key
+    rows: dict[str, dict] = field(default_factory=dict)
+    # Rows in the big data backend, only returned by SQL queries
+    big_data_rows: dict[str, dict] = field(default_factory=dict)
+    auto_number: int = 0
+
+    def column(self, name_or_key: str) -> dict:
+        column = next((c for c in self.columns if name_or_key in (c['name'], c['key'])), None)
+        if column is None:
+            raise ApiError(404, f'column {name_or_key} not found')
+
+        return column
+
+@dataclass
+class Link:
+    link_id: str
+    table_id: str
+    other_table_id: str
+    # row_id -> linked row IDs, for both directions of the link
+    # The inner dicts are used as ordered sets to keep the links in insertion order
+    rows: dict[str, dict[str, None]] = field(default_factory=dict)
+    other_rows: dict[str, dict[str, None]] = field(default_factory=dict)
+
+    def linked_row_ids(self, table_id: str, row_id: str) -> list[str]:
+        return list((self.rows if table_id == self.table_id else self.other_rows).get(row_id, ()))
+
+    def add(self, table_id: str, row_id: str, other_row_id: str):
+        if table_id != self.table_id:
+            row_id, other_row_id = other_row_id, row_id
+
+        self.rows.setdefault(row_id, {})[other_row_id] = None
+        self.other_rows.setdefault(other_row_id, {})[row_id] = None
+
+    def replace(self, table_id: str, row_id: str, other_row_ids: list[str]):
+        """Replaces all links of a row with links to other_row_ids"""
+        links, backlinks = (self.rows, self.other_rows) if table_id == self.table_id else (self.other_rows, self.rows)
+        for linked_row_id in links.pop(row_id, ()):
+            backlinks[linked_row_id].pop(row_id, None)
+
+        for other_row_id in other_row_ids:
+            self.add(table_id, row_id, other_row_id)
+
+    def remove_row(self, row_id: str):
+        for links, backlinks in ((self.rows, self.other_rows), (self.other_rows, self.rows)):
+            for linked_row_id in links.pop(row_id, ()):
+                backlinks[linked_row_id].pop(row_id, None)
+
+@dataclass
+class Base:
+    id: int
+    uuid: str
+    name: str
+    workspace_id: int
+    owner: str
+    created_at: str
+    tables: list[Table] = field(default_factory=list)
+    links: dict[str, Link] = field(default_factory=dict)
+    # Incremented on every write, used to invalidate the SQL view of the base
+    version: int = 0
+    # (version, connection, names of columns holding booleans)
+    sql_cache: Optional[tuple[int, sqlite3.Connection, set[str]]] = None
+
+    def table(self, name_or_id: str) -> Table:
+        table = next((t for t in self.tables if name_or_id in (t.name, t.id)), None)
+        if table is None:
+            raise ApiError(404, f'table {name_or_id} not found')
+
+        return table
+
+    def table_by_id(self, table_id: str) -> Table:
+        table = next((t for t in self.tables if t.id == table_id), None)
+        if table is None:
+            raise ApiError(404, f'table {table_id} not found')
+
+        return table
+
+class State:
+    """All data held by the stand-in server"""
+    def __init__(self, users: dict[str, tuple[str, bool]]):
+        # email -> (password, is_admin)
+        self.users = dict(users)
+        # token -> (kind, subject, expires_at)
+        self.tokens: dict[str, tuple[str, str, Optional[datetime]]] = {}
+        self.groups: dict[int, dict] = {}
+        self.workspaces: dict[int, dict] = {}
+        self.bases: dict[str, Base] = {}
+        self.teams: dict[int, dict] = {}
+        self.upload_links: dict[str, str] = {}
+        # Download link token -> asset path
+        self.download_links: dict[str, str] = {}
+        # (base_uuid, day) -> number of /api-gateway requests, reported in the x-ratelimit-* headers
+        self.gateway_usage: dict[tuple[str, str], int] = {}
+        # Uploaded assets: path -> content
+        self.assets: dict[str, bytes] = {}
+        self.lock = threading.RLock()
+        self._ids = 0
+
+    def next_id(self) -> int:
+        self._ids += 1
+        return self._ids
+
+    def issue_token(self, kind: str, subject: str, lifetime: Optional[timedelta] = None) -> str:
+        if lifetime is None:
+            token = secrets.token_hex(20)
+            expires_at = None
+        else:
+            expires_at = now() + lifetime
+            token = make_jwt({'exp': int(expires_at.timestamp()), 'dtable_uuid': subject, 'permission': 'rw'})
+
+        self.tokens[token] = (kind, subject, expires_at)
+        return token
+
+    def authenticate(self, authorization: Optional[str], kind: str) -> str:
+        """Returns the subject of the token or raises a 401/403"""
+        match = re.match(r'^(?:Bearer|Token)\s+(\S+)$', authorization or '')
+        if match is None or match.group(1) not in self.tokens:
+            raise ApiError(401, 'Invalid token')
+
+        token_kind, subject, expires_at = self.tokens[match.group(1)]
+        if expires_at is not None and expires_at < now():
+            raise ApiError(401, 'Token expired')
+
+        if kind == 'admin':
+            if token_kind != 'account' or not self.users[subject][1]:
+                raise ApiError(403, 'Permission denied.')
+        elif token_kind != kind:
+            raise ApiError(403, 'Permission denied.')
+
+        return subject
+
+    def personal_workspace(self, email: str) -> dict:
+        workspace = next((w for w in self.workspaces.values() if w.get('owner') == email), None)
+        if workspace is None:
+            workspace = {'id': self.next_id(), 'name': 'personal', 'type': 'personal', 'owner': email}
+            self.workspaces[workspace['id']] = workspace
+
+        return workspace
+
+    def workspace_bases(self, workspace_id: int) -> list[Base]:
+        return [b for b in self.bases.values() if b.workspace_id == workspace_id]
+
+def now() -> datetime:
+    return datetime.now(timezone.utc).replace(microsecond=0)
+
+def timestamp() -> str:
+    return now().isoformat()
+
+def stable_key(*seed: Any, length: int = 4, alphabet: str = KEY_ALPHABET) -> str:
+    """
+    Returns a random looking key that only depends on `seed`.
+
+    Keys and IDs are derived from table/column names instead of a global random generator, so responses
+    (and therefore snapshots) do not depend on which tests ran before.
+    """
+    generator = random.Random(':'.join(str(s) for s in seed))
+    return ''.join(generator.choice(alphabet) for _ in range(length))
+
+def make_jwt(payload: dict) -> str:
+    def encode(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+    header = encode(json.dumps({'typ': 'JWT', 'alg': 'HS256'}).encode())
+    return f'{header}.{encode(json.dumps(payload).encode())}.{encode(secrets.token_bytes(32))}'
+
+# Cell values
+
+DATE_INPUT_FORMATS = {
+    # Day first
+    True: ['%d/%m/%Y %H:%M', '%d/%m/%Y', '%d.%m.%Y %H:%M', '%d.%m.%Y'],
+    # Month first
+    False: ['%m/%d/%Y %H:%M', '%m/%d/%Y'],
+}
+
+def parse_date(column: dict, value: str) -> str:
+    value = value.strip()
+    date_format = (column.get('data') or {}).get('format', 'YYYY-MM-DD')
+    with_time = 'HH:mm' in date_format
+
+    candidates = ['%Y-%m-%d %H:%M', '%Y-%m-%d', '%Y/%m/%d %H:%M', '%Y/%m/%d', '%Y-%m-%dT%H:%M:%S%z', '%Y-%m-%dT%H:%M:%S']
+    candidates += DATE_INPUT_FORMATS[date_format.startswith('DD')]
+    for candidate in candidates:
+        try:
+            parsed = datetime.strptime(value, candidate)
+        except ValueError:
+            continue
+
+        return parsed.strftime('%Y-%m-%d %H:%M' if with_time else '%Y-%m-%d')
+
+    raise ApiError(400, f'invalid date value for column {column["name"]}: {value}')
+
+def to_cell(column: dict, value: Any) -> Any:
+    """Converts an input value into the stored representation"""
+    column_type = column['type']
+
+    if value is None or value == '' or column_type in COMPUTED_COLUMN_TYPES:
+        return None
+    if column_type == 'number':
+        return value if isinstance(value, (int, float)) else number(column, value)
+    if column_type == 'date':
+        return parse_date(column, str(value))
+    if column_type in ('duration', 'rate'):
+        return int(number(column, value))
+    if column_type == 'checkbox':
+        return value if isinstance(value, bool) else str(value).lower() == 'true'
+    if column_type in ('multiple-select', 'collaborator', 'image') and not isinstance(value, list):
+        return [value]
+
+    return value
+
+def number(column: dict, value: Any) -> float:
+    if isinstance(value, (int, float, str)):
+        try:
+            result = float(value)
+        except ValueError:
+            pass
+        else:
+            if math.isfinite(result):
+                return result
+
+    raise ApiError(400, f'invalid number for column {column["name"]}: {value!r}')
+
+# Formulas
+
+FORMULA_FUNCTIONS: dict[str, Callable] = {
+    'true': lambda: True,
+    'false': lambda: False,
+    '_and': lambda *args: all(args),
+    '_or': lambda *args: any(args),
+    '_not': lambda value: not value,
+    '_if': lambda condition, then, otherwise='': then if condition else otherwise,
+    'abs': abs,
+    'round': lambda value, digits=0: round(value, int(digits)),
+    'concatenate': lambda *args: ''.join('' if a is None else str(a) for a in args),
+    'len': lambda value: len(value or ''),
+    'upper': lambda value: (value or '').upper(),
+    'lower': lambda value: (value or '').lower(),
+}
+
+def date_add(date: Optional[str], count: float, unit: str = 'days') -> Optional[str]:
+    if not date:
+        return None
+
+    with_time = len(date) > 10
+    parsed = datetime.strptime(date[:16], '%Y-%m-%d %H:%M' if with_time else '%Y-%m-%d')
+    unit = unit.rstrip('s')
+    count = int(count)
+
+    if unit in ('year', 'month'):
+        months = parsed.month - 1 + count * (12 if unit == 'year' else 1)
+        year, month = parsed.year + months // 12, months % 12 + 1
+        # e.g. Jan 31 + 1 month is Feb 28 (or 29)
+        parsed = parsed.replace(year=year, month=month, day=min(parsed.day, calendar.monthrange(year, month)[1]))
+    else:
+        parsed += timedelta(**{f'{unit}s': count})
+
+    return parsed.strftime('%Y-%m-%d %H:%M' if with_time else '%Y-%m-%d')
+
+FORMULA_FUNCTIONS['dateadd'] = date_add
+
+FORMULA_BINARY_OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Mod: lambda a, b: a % b,
+    ast.Pow: lambda a, b: a ** b,
+}
+
+FORMULA_COMPARISONS = {
+    ast.Eq: lambda a, b: a == b,
+    ast.NotEq: lambda a, b: a != b,
+    ast.Lt: lambda a, b: a < b,
+    ast.LtE: lambda a, b: a <= b,
+    ast.Gt: lambda a, b: a > b,
+    ast.GtE: lambda a, b: a >= b,
+}
+
+def evaluate_formula(formula: str, values: dict[str, Any]) -> Any:
+    """
+    Evaluates a (small) subset of the SeaTable formula language.
+
+    Column references ({Column}) are looked up in `values` (keyed by column name). Unsupported formulas evaluate to None.
+    """
+    references: list[str] = []
+
+    def reference(match: re.Match) -> str:
+        references.append(match.group(1))
+        return f'_ref{len(references) - 1}'
+
+    expression = re.sub(r'\{([^}]+)\}', reference, formula)
+    # `and`, `or`, `not` and `if` are Python keywords
+    expression = re.sub(r'\b(and|or|not|if)\s*\(', lambda m: f'_{m.group(1).lower()}(', expression, flags=re.IGNORECASE)
+    expression = expression.replace('<>', '!=').replace('&', '+')
+    expression = re.sub(r'(?<![=!<>])=(?!=)', '==', expression)
+
+    def visit(node: ast.AST) -> Any:
+        if isinstance(node, ast.Expression):
+            return visit(node.body)
+        if isinstance(node, ast.Constant):
+            return node.value
+        if isinstance(node, ast.Name) and node.id.startswith('_ref'):
+            return values.get(references[int(node.id[4:])])
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -visit(node.operand)
+        if isinstance(node, ast.BinOp) and type(node.op) in FORMULA_BINARY_OPERATORS:
+            return FORMULA_BINARY_OPERATORS[type(node.op)](visit(node.left), visit(node.right))
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in FORMULA_COMPARISONS:
+            return FORMULA_COMPARISONS[type(node.ops[0])](visit(node.left), visit(node.comparators[0]))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            function = FORMULA_FUNCTIONS.get(node.func.id.lower()) or FORMULA_FUNCTIONS.get(node.func.id)
+            if function is not None:
+                return function(*[visit(arg) for arg in node.args])
+
+        raise ValueError(f'Unsupported formula: {formula}')
+
+    try:
+        result = visit(ast.parse(expression, mode='eval'))
+    except (SyntaxError, ValueError, TypeError, ZeroDivisionError):
+        return None
+
+    if isinstance(result, float):
+        # Hide floating point noise such as 3.9000000000000004
+        return round(result, 8)
+
+    return result
+
+def summarize(values: list, method: str) -> Any:
+    numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+
+    if method == 'concatenate':
+        return ', '.join(str(v) for v in values if v is not None)
+    if method == 'count':
+        return len(values)
+    if not numbers:
+        return None
+    if method == 'sum':
+        return round(sum(numbers), 8)
+    if method == 'average':
+        return round(sum(numbers) / len(numbers), 8)
+    if method == 'max':
+        return max(numbers)
+    if method == 'min':
+        return min(numbers)
+
+    return None
+
+def linked_table(base: Base, table: Table, column: dict) -> Table:
+    """Returns the table on the other side of a link column"""
+    link = base.links[column['data']['link_id']]
+    return base.table_by_id(link.other_table_id if table.id == link.table_id else link.table_id)
+
+def linked_rows(base: Base, table: Table, row: dict, column: dict) -> list[dict]:
+    link = base.links[column['data']['link_id']]
+    other_table = linked_table(base, table, column)
+
+    return [other_table.rows[row_id] for row_id in link.linked_row_ids(table.id, row['_id']) if row_id in other_table.rows]
+
+def link_formula_value(base: Base, table: Table, row: dict, column: dict) -> Any:
+    data = column.get('data') or {}
+    link_column = table.column(data['link_column'])
+    rows = linked_rows(base, table, row, link_column)
+    other_table = linked_table(base, table, link_column)
+
+    def linked_values(column_name: str) -> list:
+        key = other_table.column(column_name)['key']
+        return [r.get(key) for r in rows]
+
+    formula = data.get('formula')
+    if formula == 'lookup':
+        return linked_values(data['level1_linked_column'])
+    if formula == 'count_links':
+        return len(rows)
+    if formula == 'rollup':
+        return summarize(linked_values(data['summary_column']), data.get('summary_method', 'sum'))
+    if formula in ('findmax', 'findmin'):
+        comparison_key = other_table.column(data['comparison_column'])['key']
+        searched_key = other_table.column(data['searched_column'])['key']
+        candidates = [r for r in rows if r.get(comparison_key) is not None]
+        if not candidates:
+            return None
+        pick = max if formula == 'findmax' else min
+        return pick(candidates, key=lambda r: r[comparison_key]).get(searched_key)
+
+    return None
+
+def auto_number_value(column: dict, number: int, created_at: str) -> str:
+    data = column.get('data') or {}
+    value = str(number).zfill(int(data.get('digits', 4)))
+
+    if data.get('prefix_type') == 'string':
+        return f'{data.get("prefix", "")}-{value}'
+    if data.get('prefix_type') == 'date':
+        return f'{created_at[:10].replace("-", "")}-{value}'
+
+    return value
+
+def render_row(base: Base, table: Table, row: dict, by_name: bool = True, link_objects: bool = True) -> dict:
+    """Converts a stored row into its API representation (including computed columns)"""
+    result = {name: row[name] for name in ('_id', '_ctime', '_mtime', '_creator', '_last_modifier')}
+    values_by_name = {c['name']: row.get(c['key']) for c in table.columns}
+
+    for column in table.columns:
+        column_type = column['type']
+
+        if column_type == 'formula':
+            value = evaluate_formula((column.get('data') or {}).get('formula', ''), values_by_name)
+        elif column_type == 'link-formula':
+            value = link_formula_value(base, table, row, column)
+        elif column_type == 'auto-number':
+            value = auto_number_value(column, row['_auto_number'], row['_ctime'])
+        elif column_type == 'link':
+            rows = linked_rows(base, table, row, column)
+            if link_objects:
+                other_table = linked_table(base, table, column)
+                display_key = other_table.columns[0]['key'] if other_table.columns else None
+                value = [{'row_id': r['_id'], 'display_value': r.get(display_key)} for r in rows]
+            else:
+                value = [r['_id'] for r in rows]
+        else:
+            value = row.get(column['key'])
+
+        if value is None or value == []:
+            # Empty cells are omitted, just like the real server does
+            continue
+
+        result[column['name'] if by_name else column['key']] = value
+
+    return result
+
+def make_column(table: Table, column_name: str, column_type: str, column_data: Optional[dict]) -> dict:
+    if any(c['name'] == column_name for c in table.columns):
+        raise ApiError(400, f'column {column_name} exists')
+
+    keys = {c['key'] for c in table.columns}
+    key = '0000' if not keys else stable_key(table.name, column_name)
+    attempt = 0
+    while key in keys:
+        attempt += 1
+        key = stable_key(table.name, column_name, attempt)
+
+    return {
+        'key': key,
+        'type': column_type,
+        'name': column_name,
+        'editable': True,
+        'width': 200,
+        'resizable': True,
+        'draggable': True,
+        'data': column_data,
+        'permission_type': '',
+        'permitted_users': [],
+    }
+
+def add_rows(base: Base, table: Table, rows: list[dict], creator: str, big_data: bool = False) -> list[dict]:
+    if len(rows) > MAX_APPEND_ROWS:
+        raise ApiError(400, f'Number of rows exceeds {MAX_APPEND_ROWS}')
+
+    created_at = timestamp()
+    stored_rows = []
+
+    for values in rows:
+        table.auto_number += 1
+        row = {
+            '_id': stable_key(table.name, table.auto_number, length=22, alphabet=ROW_ID_ALPHABET),
+            '_ctime': created_at,
+            '_mtime': created_at,
+            '_creator': creator,
+            '_last_modifier': creator,
+            '_auto_number': table.auto_number,
+        }
+        for name, value in values.items():
+            column = next((c for c in table.columns if name in (c['name'], c['key'])), None)
+            # Unknown columns are silently ignored by SeaTable
+            if column is not None:
+                row[column['key']] = to_cell(column, value)
+
+        (table.big_data_rows if big_data else table.rows)[row['_id']] = row
+        stored_rows.append(row)
+
+    base.version += 1
+    return stored_rows
+
+def table_payload(table: Table) -> dict:
+    return {
+        '_id': table.id,
+        'name': table.name,
+        'is_header_locked': False,
+        'summary_configs': {},
+        'columns': table.columns,
+        'rows': [],
+        'views': [{
+            '_id': '0000',
+            'name': 'Default View',
+            'type': 'table',
+            'is_locked': False,
+            'filter_conjunction': 'And',
+            'filters': [],
+            'sorts': [],
+            'groupbys': [],
+            'group_rows': [],
+            'groups': [],
+            'colorbys': {},
+            'hidden_columns': [],
+            'rows': [],
+            'formula_rows': {},
+            'link_rows': {},
+            'summaries': {},
+            'colors': {},
+        }],
+        'id_row_map': {},
+    }
+
+def as_bool(value: Any) -> bool:
+    return value if isinstance(value, bool) else str(value).lower() == 'true'
+
+# SQL
+
+def sql_connection(base: Base) -> tuple[sqlite3.Connection, set[str]]:
+    """
+    Returns an SQLite database holding the (rendered) rows of all tables, rebuilt whenever the base changes.
+
+    SQLite stores booleans as integers, so the names of the columns holding booleans are returned as well.
+    """
+    if base.sql_cache is not None and base.sql_cache[0] == base.version:
+        return base.sql_cache[1], base.sql_cache[2]
+
+    connection = sqlite3.connect(':memory:', check_same_thread=False)
+    boolean_columns = set()
+    for table in base.tables:
+        names = ['_id', '_ctime', '_mtime', '_creator', '_last_modifier'] + [c['name'] for c in table.columns]
+        quoted = ', '.join(f'"{n}"' for n in names)
+        connection.execute(f'CREATE TABLE "{table.name}" ({quoted})')
+
+        records = []
+        for row in itertools.chain(table.rows.values(), table.big_data_rows.values()):
+            rendered = render_row(base, table, row, link_objects=False)
+            boolean_columns.update(n for n, v in rendered.items() if isinstance(v, bool))
+            records.append([
+                json.dumps(v) if isinstance(v, (list, dict)) else v
+                for v in (rendered.get(n) for n in names)
+            ])
+        connection.executemany(f'INSERT INTO "{table.name}" VALUES ({", ".join("?" * len(names))})', records)
+
+    base.sql_cache = (base.version, connection, boolean_columns)
+    return connection, boolean_columns
+
+def query_sql(base: Base, sql: str, parameters: list, convert_keys: bool) -> dict:
+    statement = sql.strip().rstrip(';')
+
+    if not re.match(r'^\s*select\b', statement, re.IGNORECASE):
+        raise ApiError(400, 'Only SELECT statements are supported by the stand-in server')
+    if not re.search(r'\blimit\b', statement, re.IGNORECASE):
+        statement += f' LIMIT {SQL_DEFAULT_LIMIT}'
+
+    connection, boolean_columns = sql_connection(base)
+    try:
+        cursor = connection.execute(statement, parameters)
+    except sqlite3.Error as e:
+        raise ApiError(400, str(e))
+
+    names = [d[0] for d in cursor.description]
+    rows = cursor.fetchmany(SQL_MAX_LIMIT)
+
+    columns = {}
+    for table in base.tables:
+        for column in table.columns:
+            columns.setdefault(column['name'], column)
+
+    metadata = []
+    for name in names:
+        if name.startswith('_'):
+            continue
+        column = columns.get(name)
+        if column is None:
+            metadata.append({'key': name, 'name': name, 'type': 'number', 'data': None})
+        else:
+            metadata.append({'key': column['key'], 'name': name, 'type': column['type'], 'data': column['data']})
+
+    results = []
+    for row in rows:
+        result = {}
+        for name, value in zip(names, row):
+            column = columns.get(name)
+            if value is None:
+                continue
+            if column is not None and column['type'] in JSON_COLUMN_TYPES | {'link-formula'} and isinstance(value, str):
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass
+            if name in boolean_columns:
+                value = bool(value)
+            result[column['key'] if column is not None and not convert_keys else name] = value
+        results.append(result)
+
+    return {'metadata': metadata, 'results': results, 'success': True}
+
+# Authentication
+
+@operation('getAccountTokenfromUsername')
+def get_account_token(call: Call):
+    username = call.body_param('username', default='')
+    user = call.state.users.get(username)
+
+    if user is None or user[0] != call.body_param('password', default=''):
+        raise ApiError(400, 'Unable to login with provided credentials.')
+
+    call.state.personal_workspace(username)
+    return {'token': call.state.issue_token('account', username)}
+
+def find_base(call: Call) -> Base:
+    workspace_id = call.path_param('workspace_id', int)
+    base_name = call.path_param('base_name')
+
+    base = next((b for b in call.state.workspace_bases(workspace_id) if b.name == base_name), None)
+    if base is None:
+        raise ApiError(404, f'dtable {base_name} not found.')
+
+    return base
+
+@operation('getBaseTokenWithAccountToken', auth='account')
+def get_base_token(call: Call):
+    base = find_base(call)
+
+    return {
+        'app_name': '',
+        'access_token': call.state.issue_token('base', base.uuid, BASE_TOKEN_LIFETIME),
+        'dtable_uuid': base.uuid,
+        'dtable_server': f'{call.base_url}/dtable-server/',
+        'dtable_socket': f'{call.base_url}/',
+        'workspace_id': base.workspace_id,
+        'dtable_name': base.name,
+    }
+
+@operation('createTempApiToken', auth='account')
+def create_temp_api_token(call: Call):
+    base = find_base(call)
+    return {'api_token': call.state.issue_token('api', base.uuid, API_TOKEN_LIFETIME)}
+
+# User account operations
+
+@operation('createGroup', auth='account', status=201)
+def create_group(call: Call):
+    group_id = call.state.next_id()
+    group = {
+        'id': group_id,
+        'name': call.body_param('name'),
+        'owner': call.subject,
+        'created_at': timestamp(),
+        'admins': [call.subject],
+        'wiki_enabled': False,
+    }
+    call.state.groups[group_id] = group
+
+    workspace_id = call.state.next_id()
+    call.state.workspaces[workspace_id] = {'id': workspace_id, 'name': group['name'], 'type': 'group', 'group_id': group_id}
+
+    return group
+
+@operation('listWorkspaces', auth='account')
+def list_workspaces(call: Call):
+    personal = call.state.personal_workspace(call.subject)
+    workspaces = [personal] + [w for w in call.state.workspaces.values() if w['type'] == 'group']
+
+    return {
+        'workspace_list': [
+            {
+                **{k: v for k, v in w.items() if k != 'owner'},
+                'table_list': [base_payload(b) for b in call.state.workspace_bases(w['id'])],
+            }
+            for w in workspaces
+        ],
+    }
+
+@operation('deleteGroup', auth='account')
+def delete_group(call: Call):
+    group_id = call.path_param('group_id', int)
+    if call.state.groups.pop(group_id, None) is None:
+        raise ApiError(404, 'Group not found.')
+
+    for workspace in [w for w in call.state.workspaces.values() if w.get('group_id') == group_id]:
+        del call.state.workspaces[workspace['id']]
+        for base in call.state.workspace_bases(workspace['id']):
+            del call.state.bases[base.uuid]
+
+    return {'success': True}
+
+def base_payload(base: Base) -> dict:
+    return {
+        'id': base.id,
+        'workspace_id': base.workspace_id,
+        'uuid': base.uuid,
+        'name': base.name,
+        'created_at': base.created_at,
+        'updated_at': base.created_at,
+        'color': None,
+        'text_color': None,
+        'icon': None,
+        'is_encrypted': False,
+        'in_storage': True,
+    }
+
+@operation('createBase', auth='account', status=201)
+def create_base(call: Call):
+    workspace_id = call.body_param('workspace_id', int)
+    name = call.body_param('name')
+
+    if workspace_id not in call.state.workspaces:
+        raise ApiError(404, 'Workspace not found.')
+    if any(b.name == name for b in call.state.workspace_bases(workspace_id)):
+        raise ApiError(409, f'Table {name} already exists.')
+
+    base = Base(
+        id=call.state.next_id(),
+        uuid=str(uuid.uuid4()),
+        name=name,
+        workspace_id=workspace_id,
+        owner=call.subject,
+        created_at=timestamp(),
+    )
+    call.state.bases[base.uuid] = base
+
+    return {'table': base_payload(base)}
+
+@operation('copyBaseFromWorkspace', auth='account')
+def copy_base(call: Call):
+    source_workspace_id, workspace_id = call.body_param('src_workspace_id', int), call.body_param('dst_workspace_id', int)
+    name = call.body_param('name')
+
+    source = next((b for b in call.state.workspace_bases(source_workspace_id) if b.name == name), None)
+    if source is None:
+        raise ApiError(404, 'Base not found.')
+    if workspace_id not in call.state.workspaces:
+        raise ApiError(404, 'Workspace not found.')
+    if any(b.name == name for b in call.state.workspace_bases(workspace_id)):
+        raise ApiError(409, f'Table {name} already exists.')
+
+    # The SQL connection cannot be copied, the copy builds its own
+    base = replace(
+        copy.deepcopy(replace(source, sql_cache=None)),
+        id=call.state.next_id(),
+        uuid=str(uuid.uuid4()),
+        workspace_id=workspace_id,
+        owner=call.subject,
+        created_at=timestamp(),
+    )
+    call.state.bases[base.uuid] = base
+
+    return {'dtable': base_payload(base)}
+
+@operation('deleteBase', auth='account')
+def delete_base(call: Call):
+    workspace_id = call.path_param('workspace_id', int)
+    base = next((b for b in call.state.workspace_bases(workspace_id) if b.name == call.body_param('name')), None)
+
+    if base is None:
+        raise ApiError(404, 'Base not found.')
+
+    del call.state.bases[base.uuid]
+    return {'success': True}
+
+# Base operations
+
+def get_base(call: Call) -> Base:
+    base = call.state.bases.get(call.path_param('base_uuid'))
+    if base is None or base.uuid != call.subject:
+        raise ApiError(403, 'Permission denied.')
+
+    return base
+
+@operation('getMetadata', auth='base')
+def get_metadata(call: Call):
+    base = get_base(call)
+
+    return {'metadata': {'tables': [
+        {'_id': table.id, 'name': table.name, 'columns': [{k: c[k] for k in ('key', 'name', 'type', 'data')} for c in table.columns]}
+        for table in base.tables
+    ]}}
+
+@operation('createTable', auth='base')
+@operation('createTableDeprecated', auth='base')
+def create_table(call: Call):
+    base = get_base(call)
+    name = call.body_param('table_name')
+
+    if any(t.name == name for t in base.tables):
+        raise ApiError(400, f'table {name} exists')
+
+    existing_ids = {t.id for t in base.tables}
+    table_id = '0000' if not existing_ids else stable_key(name)
+    attempt = 0
+    while table_id in existing_ids:
+        attempt += 1
+        table_id = stable_key(name, attempt)
+
+    table = Table(id=table_id, name=name)
+    columns = call.body_param('columns', list, default=None) or [{'column_name': 'Name', 'column_type': 'text'}]
+    for column in param_items('columns', columns, dict):
+        column_data = param('column_data', column.get('column_data'), dict, default=None)
+        table.columns.append(make_column(table, param('column_name', column.get('column_name')), param('column_type', column.get('column_type')), column_data))
+
+    base.tables.append(table)
+    base.version += 1
+
+    return table_payload(table)
+
+@operation('deleteTable', auth='base')
+def delete_table(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+
+    base.tables.remove(table)
+    for link_id in [i for i, l in base.links.items() if table.id in (l.table_id, l.other_table_id)]:
+        del base.links[link_id]
+
+    base.version += 1
+    return {'success': True}
+
+@operation('appendRows', auth='base')
+def append_rows(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    rows = add_rows(base, table, param_items('rows', call.body_param('rows', list), dict), base.owner)
+
+    return {
+        'inserted_row_count': len(rows),
+        'row_ids': [{'_id': r['_id']} for r in rows],
+        'first_row': render_row(base, table, rows[0]) if rows else {},
+    }
+
+@operation('appendRowsDeprecated', auth='base')
+def append_rows_deprecated(call: Call):
+    base = get_base(call)
+    rows = add_rows(base, base.table(call.body_param('table_name')), param_items('rows', call.body_param('rows', list), dict), base.owner)
+
+    return {'inserted_row_count': len(rows)}
+
+@operation('addBigDataRows', auth='base')
+def add_big_data_rows(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    rows = add_rows(base, table, param_items('rows', call.body_param('rows', list), dict), base.owner, big_data=True)
+
+    return {'inserted_row_count': len(rows)}
+
+@operation('addRowDeprecated', auth='base')
+def add_row_deprecated(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    row, = add_rows(base, table, [call.body_param('row', dict)], base.owner)
+
+    return render_row(base, table, row, link_objects=False)
+
+@operation('updateRow', auth='base')
+def update_rows(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    modified_at = timestamp()
+
+    for update in param_items('updates', call.body_param('updates', list), dict):
+        row = table.rows.get(param('row_id', update.get('row_id')))
+        # Unknown rows are silently ignored by SeaTable
+        if row is None:
+            continue
+
+        for name, value in param('row', update.get('row'), dict, default={}).items():
+            column = next((c for c in table.columns if name in (c['name'], c['key'])), None)
+            if column is not None:
+                row[column['key']] = to_cell(column, value)
+        row['_mtime'] = modified_at
+
+    base.version += 1
+    return {'success': True}
+
+@operation('updateRowDeprecated', auth='base')
+def update_row_deprecated(call: Call):
+    updates = [{'row_id': call.body_param('row_id'), 'row': call.body_param('row', dict)}]
+    return update_rows(replace(call, body={'table_name': call.body_param('table_name'), 'updates': updates}))
+
+@operation('deleteRow', auth='base')
+def delete_rows(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+
+    for row_id in param_items('row_ids', call.body_param('row_ids', list)):
+        table.rows.pop(row_id, None)
+        for link in base.links.values():
+            link.remove_row(row_id)
+
+    base.version += 1
+    return {'success': True}
+
+def get_row(call: Call, table_name: str) -> tuple[Base, Table, dict]:
+    base = get_base(call)
+    table = base.table(table_name)
+    row = table.rows.get(call.path_param('row_id'))
+
+    if row is None:
+        raise ApiError(404, 'row not found')
+
+    return base, table, row
+
+@operation('getRow', auth='base')
+def get_row_v2(call: Call):
+    base, table, row = get_row(call, call.query_param('table_name'))
+    return render_row(base, table, row, by_name=as_bool(call.query_param('convert_keys', default=False)))
+
+@operation('getRowDeprecated', auth='base')
+def get_row_deprecated(call: Call):
+    base, table, row = get_row(call, call.query_param('table_name'))
+    return render_row(base, table, row, link_objects=False)
+
+def list_rows(call: Call, by_name: bool, link_objects: bool) -> list[dict]:
+    base = get_base(call)
+    table = base.table(call.query_param('table_name'))
+
+    start = max(call.query_param('start', int, default=0), 0)
+    limit = max(min(call.query_param('limit', int, default=1000), 1000), 0)
+    rows = itertools.islice(table.rows.values(), start, start + limit)
+
+    return [render_row(base, table, row, by_name=by_name, link_objects=link_objects) for row in rows]
+
+@operation('listRows', auth='base')
+def list_rows_v2(call: Call):
+    by_name = as_bool(call.query_param('convert_keys', default=False))
+    table = get_base(call).table(call.query_param('table_name'))
+
+    return {
+        'rows': list_rows(call, by_name=by_name, link_objects=True),
+        'metadata': [{k: c[k] for k in ('key', 'name', 'type', 'data')} for c in table.columns],
+    }
+
+@operation('listRowsDeprecated', auth='base')
+def list_rows_deprecated(call: Call):
+    return {'rows': list_rows(call, by_name=True, link_objects=False)}
+
+@operation('insertColumnDeprecated', auth='base')
+def insert_column_deprecated(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    column_name, column_type = call.body_param('column_name'), call.body_param('column_type')
+    column_data = call.body_param('column_data', dict, default=None)
+
+    if column_type == 'link':
+        other_table = base.table(param('other_table', (column_data or {}).get('other_table')))
+        link = Link(link_id=stable_key(table.name, other_table.name, column_name), table_id=table.id, other_table_id=other_table.id)
+        base.links[link.link_id] = link
+        column_data = {
+            'display_column_key': '0000',
+            'table_id': table.id,
+            'other_table_id': other_table.id,
+            'is_internal_link': True,
+            'link_id': link.link_id,
+        }
+
+    column = make_column(table, column_name, column_type, column_data)
+    table.columns.append(column)
+    base.version += 1
+
+    return column
+
+@operation('createRowLinksDeprecated', auth='base')
+def create_row_links_deprecated(call: Call):
+    base = get_base(call)
+    link = base.links.get(call.body_param('link_id'))
+    table = base.table(call.body_param('table_name'))
+
+    if link is None:
+        raise ApiError(404, 'link not found')
+
+    row_id = call.body_param('row_id')
+    for other_row_id in param_items('other_rows_ids', call.body_param('other_rows_ids', list)):
+        link.add(table.id, row_id, other_row_id)
+
+    base.version += 1
+    return {'success': True}
+
+@operation('createRowLink', auth='base')
+def create_row_links(call: Call):
+    base, table, link = get_link(call)
+
+    for row_id, other_row_ids in call.body_param('other_rows_ids_map', dict).items():
+        for other_row_id in param_items('other_rows_ids_map', param('other_rows_ids_map', other_row_ids, list)):
+            link.add(table.id, row_id, other_row_id)
+
+    base.version += 1
+    return {'success': True}
+
+@operation('updateRowLink', auth='base')
+@operation('updateRowLinksDeprecated', auth='base')
+def update_row_links(call: Call):
+    base, table, link = get_link(call)
+
+    # Replaces all links of the given rows
+    for row_id, other_row_ids in call.body_param('other_rows_ids_map', dict).items():
+        link.replace(table.id, row_id, param_items('other_rows_ids_map', param('other_rows_ids_map', other_row_ids, list)))
+
+    base.version += 1
+    return {'success': True}
+
+def get_link(call: Call) -> tuple[Base, Table, Link]:
+    base = get_base(call)
+    link = base.links.get(call.body_param('link_id'))
+    if link is None:
+        raise ApiError(404, 'link not found')
+
+    return base, base.table_by_id(call.body_param('table_id')), link
+
+@operation('listRowLinks', auth='base')
+def list_row_links(call: Call):
+    base = get_base(call)
+    table = base.table(call.body_param('table_name'))
+    column = table.column(call.body_param('link_column_name'))
+    if column['type'] != 'link':
+        raise ApiError(400, f'column {column["name"]} is not a link column')
+    other_table = linked_table(base, table, column)
+    link = base.links[column['data']['link_id']]
+    display_key = other_table.columns[0]['key'] if other_table.columns else None
+
+    result = {}
+    for request in param_items('rows', call.body_param('rows', list), dict):
+        # Like SeaTable, only 10 linked rows are returned unless a limit is given
+        offset = max(param('offset', request.get('offset'), int, default=0), 0)
+        limit = max(param('limit', request.get('limit'), int, default=LINKED_ROWS_DEFAULT_LIMIT), 0)
+        row_id = param('row_id', request.get('row_id'))
+        linked_row_ids = [i for i in link.linked_row_ids(table.id, row_id) if i in other_table.rows]
+        result[row_id] = [
+            {'row_id': linked_row_id, 'display_value': other_table.rows[linked_row_id].get(display_key)}
+            for linked_row_id in linked_row_ids[offset:offset + limit]
+        ]
+
+    return result
+
+@operation('querySQL', auth='base')
+@operation('querySQLDeprecated', auth='base')
+def query(call: Call):
+    base = get_base(call)
+    parameters = param_items('parameters', call.body_param('parameters', list, default=[]), (str, int, float))
+    return query_sql(base, call.body_param('sql'), parameters, as_bool(call.body_param('convert_keys', (bool, str), default=False)))
+
+# Files
+
+@operation('getUploadLink', auth='api')
+def get_upload_link(call: Call):
+    upload_id = str(uuid.uuid4())
+    call.state.upload_links[upload_id] = call.subject
+    month = now().strftime('%Y-%m')
+
+    return {
+        'upload_link': f'{call.base_url}/seafhttp/upload-api/{upload_id}',
+        'parent_path': f'/asset/{call.subject}',
+        'img_relative_path': f'images/{month}',
+        'file_relative_path': f'files/{month}',
+    }
+
+@operation('uploadFile')
+def upload_file(call: Call):
+    if call.path_param('upload_link') not in call.state.upload_links:
+        raise ApiError(403, 'Invalid upload link')
+    if 'file' not in call.files:
+        raise ApiError(400, 'file is required')
+
+    filename, content, _ = call.files['file']
+    directory = f'{call.body_param("parent_dir")}/{call.body_param("relative_path")}'
+    if call.body_param('replace', default='0').lower() not in ('1', 'true'):
+        # Like Seafile: "name.ext" becomes "name (1).ext" if a file with that name exists
+        stem, dot, extension = filename.rpartition('.') if '.' in filename else (filename, '', '')
+        for i in itertools.count(1):
+            if f'{directory}/{filename}' not in call.state.assets:
+                break
+            filename = f'{stem} ({i}){dot}{extension}'
+    call.state.assets[f'{directory}/{filename}'] = content
+
+    return [{'name': filename, 'id': secrets.token_hex(20), 'size': len(content)}]
+
+@operation('getFileDownloadLink', auth='api')
+def get_file_download_link(call: Call):
+    path = f'/asset/{call.subject}{call.query_param("path")}'
+    if path not in call.state.assets:
+        raise ApiError(404, 'File not found')
+
+    token = str(uuid.uuid4())
+    call.state.download_links[token] = path
+
+    return {'download_link': f'{call.base_url}/seafhttp/files/{token}/{quote(path.rsplit("/", 1)[1])}'}
+
+async def download_file(request: Request) -> Response:
+    """Serves the files behind download links (not part of the OpenAPI files), supports single byte ranges"""
+    state: State = request.app.state.standin
+    with state.lock:
+        path = state.download_links.get(request.path_params['token'])
+        content = state.assets.get(path) if path is not None else None
+    if content is None:
+        return Response('File not found', status_code=404)
+
+    match = re.match(r'^bytes=(\d+)-(\d*)$', request.headers.get('range', ''))
+    if match is None:
+        return Response(content, headers={'Accept-Ranges': 'bytes'}, media_type='application/octet-stream')
+
+    start = int(match.group(1))
+    end = min(int(match.group(2)) if match.group(2) else len(content) - 1, len(content) - 1)
+    if start >= len(content):
+        return Response(status_code=416, headers={'Content-Range': f'bytes */{len(content)}'})
+
+    headers = {'Accept-Ranges': 'bytes', 'Content-Range': f'bytes {start}-{end}/{len(content)}'}
+    return Response(content[start:end + 1], status_code=206, headers=headers, media_type='application/octet-stream')
+
+# System admin operations
+
+@operation('addTeam', auth='admin')
+def add_team(call: Call):
+    team_id = call.state.next_id()
+    admin_email = call.body_param('admin_email')
+    call.state.users[admin_email] = (call.body_param('password'), False)
+    call.state.teams[team_id] = {
+        'org_id': team_id,
+        'org_name': call.body_param('org_name'),
+        'ctime': timestamp(),
+        'org_url_prefix': f'org_{stable_key(team_id, length=12).lower()}',
+        'role': 'org_default',
+        'creator_email': admin_email,
+        'creator_name': call.body_param('admin_name', default=''),
+        'creator_contact_email': admin_email,
+        'quota': -2,
+        'storage_usage': 0,
+        'storage_quota': 1000000000,
+        'max_user_number': 25,
+        'rows_count': 0,
+        'row_limit': 2000,
+    }
+
+    return call.state.teams[team_id]
+
+@operation('listTeams', auth='admin')
+def list_teams(call: Call):
+    return {'organizations': list(call.state.teams.values()), 'count': len(call.state.teams)}
+
+@operation('deleteTeam', auth='admin')
+def delete_team(call: Call):
+    team = call.state.teams.pop(call.path_param('org_id', int), None)
+    if team is None:
+        raise ApiError(404, 'Team not found.')
+
+    call.state.users.pop(team['creator_email'], None)
+    return {'success': True}
+
+# ASGI application
+
+async def parse_body(request: Request) -> tuple[Any, dict]:
+    """Returns (body, files) for JSON, urlencoded and multipart requests"""
+    raw = await request.body()
+    mimetype, options = parse_options_header(request.headers.get('content-type', ''))
+
+    if mimetype == 'application/json':
+        try:
+            return json.loads(raw or b'null'), {}
+        except ValueError:
+            raise ApiError(400, 'invalid JSON')
+    if mimetype in ('multipart/form-data', 'application/x-www-form-urlencoded'):
+        _, form, files = FormDataParser().parse(io.BytesIO(raw), mimetype, len(raw), options)
+        return form.to_dict(), {name: (f.filename, f.read(), f.mimetype) for name, f in files.items()}
+
+    return {}, {}
+
+# Daily limit of the /api-gateway endpoints on SeaTable Cloud (see intro/limits.md)
+GATEWAY_DAILY_LIMIT = 5000
+
+def rate_limit_headers(state: State, request: Request) -> dict[str, str]:
+    """Counts /api-gateway requests per base and day, returns the x-ratelimit-* headers (remaining is -1 once exceeded)"""
+    if not request.url.path.startswith('/api-gateway/'):
+        return {}
+
+    today = now().date()
+    key = (request.path_params.get('base_uuid', ''), today.isoformat())
+    state.gateway_usage[key] = state.gateway_usage.get(key, 0) + 1
+    reset = datetime.combine(today + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+
+    return {
+        'x-ratelimit-limit': str(GATEWAY_DAILY_LIMIT),
+        'x-ratelimit-remaining': str(max(GATEWAY_DAILY_LIMIT - state.gateway_usage[key], -1)),
+        'x-ratelimit-reset': str(int(reset.timestamp())),
+    }
+
+class StreamedBodyAdapter(BaseAdapter):
+    """
+    The test client only streams request bodies that are generators and reads everything else as bytes. Passes
+    bodies that can be read more than once (e.g. uploads.MultipartFile) to the test client as a new generator.
+    """
+    def __init__(self, adapter: BaseAdapter):
+        super().__init__()
+        self.adapter = adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> HTTPResponse:
+        if request.body is not None and not isinstance(request.body, (bytes, str)):
+            # Copy the request, it is sent again if it is retried (e.g. after status 429)
+            request = request.copy()
+            request.body = (chunk for chunk in request.body)
+
+        return self.adapter.send(request, **kwargs)
+
+    def close(self):
+        self.adapter.close()
+
+def mount_streaming(session: Any) -> Any:
+    for prefix, adapter in list(session.adapters.items()):
+        if not isinstance(adapter, StreamedBodyAdapter):
+            session.mount(prefix, StreamedBodyAdapter(adapter))
+
+    return session
+
+def create_app(users: dict[str, tuple[str, bool]], base_url: str = '', registry: Optional[SchemaRegistry] = None) -> Starlette:
+    """
+    Creates the stand-in ASGI application.
+
+    `users` maps emails to (password, is_admin). `base_url` is used for URLs returned by the server (e.g. upload links).
+    """
+    registry = registry or SchemaRegistry(base_url=base_url)
+    state = State(users)
+
+    # path -> method -> operation_id
+    paths: dict[str, dict[str, str]] = {}
+    for filename in SPEC_FILES:
+        for operation_id, (method, path) in registry.operation_paths(filename).items():
+            # Some paths contain a fixed query string (e.g. "?ret-json=1")
+            path = path.split('?')[0]
+            methods = paths.setdefault(path, {})
+            # Prefer implemented operations if several files define the same path
+            if method not in methods or operation_id in HANDLERS:
+                methods[method] = operation_id
+
+    def endpoint_for(methods: dict[str, str]) -> Callable:
+        async def endpoint(request: Request) -> JSONResponse:
+            operation_id = methods[request.method.lower()]
+            if operation_id not in HANDLERS:
+                return JSONResponse({'error_msg': f'{operation_id} is not implemented by the stand-in server'}, status_code=501)
+
+            handler, auth, status = HANDLERS[operation_id]
+            try:
+                body, files = await parse_body(request)
+            except ApiError as e:
+                return JSONResponse({'error_msg': e.message}, status_code=e.status)
+
+            with state.lock:
+                headers = rate_limit_headers(state, request)
+                if headers.get('x-ratelimit-remaining') == '-1':
+                    # Like the real server: status 429 without any further output
+                    return Response(status_code=429)
+
+                try:
+                    call = Call(
+                        state=state,
+                        path_params=request.path_params,
+                        query=dict(request.query_params),
+                        body=body,
+                        files=files,
+                        base_url=base_url,
+                    )
+                    if auth is not None:
+                        call.subject = state.authenticate(request.headers.get('authorization'), auth)
+                    payload = handler(call)
+                except ApiError as e:
+                    if e.status == 400 and operation_id == 'getAccountTokenfromUsername':
+                        return JSONResponse({'non_field_errors': [e.message]}, status_code=400, headers=headers)
+                    if e.status == 401:
+                        return JSONResponse({'detail': e.message}, status_code=401, headers=headers)
+                    return JSONResponse({'error_msg': e.message}, status_code=e.status, headers=headers)
+
+            return JSONResponse(payload, status_code=status, headers=headers)
+
+        return endpoint
+
+    # Routes with fewer path parameters are matched first, so static segments win over parameters
+    routes = [
+        Route(path, endpoint_for(methods), methods=[m.upper() for m in methods])
+        for path, methods in sorted(paths.items(), key=lambda item: (item[0].count('{'), item[0]))
+    ]
+    routes.append(Route('/seafhttp/files/{token}/{name:path}', download_file, methods=['GET']))
+
+    app = Starlette(routes=routes)
+    app.state.standin = state
+
+    return app
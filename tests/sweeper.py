@@ -0,0 +1,246 @@
+"""
+Deletes groups (including their bases) and teams that were created by the tests.
+
+During a test run, the fixtures register everything they create and the sweeper deletes it at the end of the session.
+Artifacts left behind by earlier runs (e.g. after a crash or with CLEANUP_AFTER_TESTS=False) are found by their names
+and deleted once they are older than SWEEP_MAX_AGE_HOURS.
+
+Can also be run on its own, the deletions then wait for the rate limits of SEATABLE_RATE_LIMITS (see accounts.connect()):
+
+    python sweeper.py [--max-age-hours 6] [--dry-run]
+"""
+import argparse
+import os
+import re
+import threading
+from concurrency import run_concurrently
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from schemas import SchemaRegistry
+from typing import Any, Optional
+
+# Names used by the fixtures in conftest.py
+GROUP_NAME = re.compile(r'^Automated Tests (\d{4}-\d{2}-\d{2} \d{2}-\d{2}-\d{2})\b')
+TEAM_NAME_PREFIX = 'automated-testing-org-'
+# Groups of the golden bases (see templates.py)
+TEMPLATE_GROUP_NAME = re.compile(r'^Automated Tests Templates [0-9a-f]+$')
+
+# Artifacts of other runs are only deleted once they are older than this (parallel runs might still use them)
+MAX_AGE = timedelta(hours=float(os.environ.get('SWEEP_MAX_AGE_HOURS', 6)))
+# Golden bases that the running tests do not use are only deleted once they were not used for this long
+TEMPLATE_MAX_AGE = timedelta(days=float(os.environ.get('TEMPLATE_MAX_AGE_DAYS', 7)))
+
+@dataclass
+class SweepResult:
+    bases: list[str] = field(default_factory=list)
+    groups: list[str] = field(default_factory=list)
+    teams: list[str] = field(default_factory=list)
+    # Deletions that failed, as "<operation_id> <name>: <status code>"
+    failed: list[str] = field(default_factory=list)
+
+    def __str__(self):
+        return f'{len(self.bases)} bases, {len(self.groups)} groups and {len(self.teams)} teams, {len(self.failed)} failed'
+
+class Sweeper:
+    """Keeps track of the groups and teams created by the tests and deletes them together with stale ones"""
+    def __init__(self, schemas: SchemaRegistry, max_age: timedelta = MAX_AGE, template_max_age: timedelta = TEMPLATE_MAX_AGE):
+        self.user_account_operations = schemas.get('user_account_operations.yaml')
+        self.system_admin_account_operations = schemas.get('system_admin_account_operations.yaml')
+        self.max_age = max_age
+        self.template_max_age = template_max_age
+        # Secret instances (see conftest.py)
+        self.account_token: Any = None
+        self.admin_token: Any = None
+        self.group_ids: set[int] = set()
+        self.team_names: set[str] = set()
+        # None: golden bases are not swept (the run does not provision templates)
+        self.template_workspace_ids: Optional[set[int]] = None
+        # Workspace ID -> time.time() of the last use of its golden base (see templates.py)
+        self.template_last_used: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def track_group(self, group_id: int, account_token: Any):
+        """Deletes the group (and all bases in its workspace) when sweep() is called"""
+        with self._lock:
+            self.account_token = account_token
+            self.group_ids.add(group_id)
+
+    def keep_templates(self, workspace_ids: set[int], last_used: dict[int, float]):
+        """
+        Keeps the golden bases in these workspaces when sweep() is called, other golden bases are deleted once they were
+        not used for template_max_age. Golden bases without a record in `last_used` are aged by their creation time.
+        """
+        with self._lock:
+            self.template_workspace_ids = (self.template_workspace_ids or set()) | workspace_ids
+            self.template_last_used.update(last_used)
+
+    def track_team(self, team_name: str, admin_token: Any):
+        """Deletes the team when sweep() is called, the team does not need to exist yet"""
+        with self._lock:
+            self.admin_token = admin_token
+            self.team_names.add(team_name)
+
+    def sweep(self, dry_run: bool = False) -> SweepResult:
+        """Deletes all tracked and stale groups, bases and teams"""
+        result = SweepResult()
+
+        if self.account_token is not None:
+            self.delete_workspaces(self.stale_workspaces(), result, dry_run=dry_run)
+
+        if self.admin_token is not None:
+            teams = self.stale_teams()
+            result.teams = [team['org_name'] for team in teams]
+
+            if not dry_run:
+                run_concurrently(*(partial(self.delete_team, team, result) for team in teams))
+
+        with self._lock:
+            self.group_ids.clear()
+            self.team_names.clear()
+
+        return result
+
+    def delete_workspaces(self, workspaces: list[dict], result: SweepResult, dry_run: bool = False):
+        """Deletes the groups of the workspaces (as returned by listWorkspaces) together with their bases"""
+        bases = [(workspace, base) for workspace in workspaces for base in workspace.get('table_list', [])]
+        result.bases += [base['name'] for _, base in bases]
+        result.groups += [workspace['name'] for workspace in workspaces]
+
+        if not dry_run:
+            # Bases have to be deleted before their group
+            run_concurrently(*(partial(self.delete_base, workspace, base, result) for workspace, base in bases))
+            run_concurrently(*(partial(self.delete_group, workspace, result) for workspace in workspaces))
+
+    def workspaces(self) -> list[dict]:
+        operation = self.user_account_operations.get_operation_by_id('listWorkspaces')
+        response = operation.make_case(headers=self._headers(self.account_token)).call_and_validate()
+
+        assert response.status_code == 200
+
+        return response.json()['workspace_list']
+
+    def stale_workspaces(self) -> list[dict]:
+        """
+        Returns the workspaces of all tracked groups, of test groups older than max_age and of template groups whose golden
+        base was not used for template_max_age (only if keep_templates() was called)
+        """
+        return [
+            workspace for workspace in self.workspaces()
+            if workspace.get('group_id') is not None and (
+                workspace['group_id'] in self.group_ids or self._is_stale(group_created_at(workspace.get('name', '')))
+                or self._is_stale_template(workspace)
+            )
+        ]
+
+    def stale_teams(self) -> list[dict]:
+        """Returns all tracked teams and test teams older than max_age"""
+        operation = self.system_admin_account_operations.get_operation_by_id('listTeams')
+        response = operation.make_case(headers=self._headers(self.admin_token)).call_and_validate()
+
+        assert response.status_code == 200
+
+        return [
+            team for team in response.json()['organizations']
+            if team['org_name'] in self.team_names or (
+                team['org_name'].startswith(TEAM_NAME_PREFIX) and self._is_stale(parse_ctime(team.get('ctime')))
+            )
+        ]
+
+    def delete_base(self, workspace: dict, base: dict, result: SweepResult):
+        path_parameters = {'workspace_id': workspace['id']}
+        body = {'name': base['name']}
+        case = self.user_account_operations.get_operation_by_id('deleteBase') \
+            .make_case(path_parameters=path_parameters, body=body, headers=self._headers(self.account_token))
+        self._check(case.call(), 'deleteBase', base['name'], result)
+
+    def delete_group(self, workspace: dict, result: SweepResult):
+        path_parameters = {'group_id': workspace['group_id']}
+        case = self.user_account_operations.get_operation_by_id('deleteGroup') \
+            .make_case(path_parameters=path_parameters, headers=self._headers(self.account_token))
+        self._check(case.call(), 'deleteGroup', workspace['name'], result)
+
+    def delete_team(self, team: dict, result: SweepResult):
+        path_parameters = {'org_id': team['org_id']}
+        case = self.system_admin_account_operations.get_operation_by_id('deleteTeam') \
+            .make_case(path_parameters=path_parameters, headers=self._headers(self.admin_token))
+        self._check(case.call(), 'deleteTeam', team['org_name'], result)
+
+    def _check(self, response: Any, operation_id: str, name: str, result: SweepResult):
+        # 404: Already deleted by another worker or run
+        if response.status_code not in (200, 404):
+            with self._lock:
+                result.failed.append(f'{operation_id} {name}: {response.status_code}')
+
+    def _is_stale(self, created_at: Optional[datetime], max_age: Optional[timedelta] = None) -> bool:
+        if created_at is None:
+            return False
+
+        now = datetime.now(created_at.tzinfo) if created_at.tzinfo else datetime.now()
+        return now - created_at > (max_age or self.max_age)
+
+    def _is_stale_template(self, workspace: dict) -> bool:
+        if self.template_workspace_ids is None or workspace['id'] in self.template_workspace_ids:
+            return False
+        if not TEMPLATE_GROUP_NAME.match(workspace.get('name', '')):
+            return False
+
+        if workspace['id'] in self.template_last_used:
+            used_at = datetime.fromtimestamp(self.template_last_used[workspace['id']], timezone.utc)
+            return self._is_stale(used_at, self.template_max_age)
+
+        # Golden bases of other machines: the group holds a single golden base, groups without one are still being built
+        created_at = [parse_ctime(base.get('created_at')) for base in workspace.get('table_list', [])]
+        return any(self._is_stale(c, self.template_max_age) for c in created_at)
+
+    def _headers(self, token: Any) -> dict[str, str]:
+        return {'Authorization': f'Bearer {token.value}'}
+
+def group_created_at(name: str) -> Optional[datetime]:
+    """Returns the creation time contained in the name of a test group (local time), None for other groups"""
+    match = GROUP_NAME.match(name)
+    return datetime.strptime(match.group(1), '%Y-%m-%d %H-%M-%S') if match else None
+
+def parse_ctime(ctime: Optional[str]) -> Optional[datetime]:
+    if not ctime:
+        return None
+
+    try:
+        created_at = datetime.fromisoformat(ctime)
+    except ValueError:
+        return None
+
+    return created_at if created_at.tzinfo else created_at.replace(tzinfo=timezone.utc)
+
+def main():
+    parser = argparse.ArgumentParser(description='Deletes groups, bases and teams left behind by the tests')
+    parser.add_argument('--max-age-hours', type=float, default=MAX_AGE.total_seconds() / 3600,
+                        help='Only delete artifacts older than this (default: %(default)s)')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the artifacts that would be deleted')
+    args = parser.parse_args()
+
+    # Uses the same configuration (environment variables) as the tests, teams are only swept with admin credentials
+    from accounts import ADMIN_USERNAME, connect, login
+
+    schemas, _ = connect()
+    sweeper = Sweeper(schemas, max_age=timedelta(hours=args.max_age_hours))
+    if ADMIN_USERNAME is None:
+        sweeper.account_token = login(schemas)
+    else:
+        sweeper.account_token, sweeper.admin_token = run_concurrently(
+            lambda: login(schemas),
+            lambda: login(schemas, admin=True),
+        )
+
+    result = sweeper.sweep(dry_run=args.dry_run)
+
+    for kind, names in [('Base', result.bases), ('Group', result.groups), ('Team', result.teams)]:
+        for name in names:
+            print(f'{kind}: {name}')
+    for failure in result.failed:
+        print(f'Failed: {failure}')
+
+    print(f'{"Would delete" if args.dry_run else "Deleted"} {result}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Provisions bases with prebuilt tables by copying a golden base instead of creating the tables and rows for every test.
+
+A golden base holds tables with the given columns and rows. It is built once (createTableDeprecated and appendRows,
+like the tests do) in its own group "Automated Tests Templates <key>" and is reused by later test runs. Every provisioned
+base is a copy of it (copyBaseFromWorkspace), a single request no matter how many tables, columns and rows the base
+holds. The golden bases are recorded in TEMPLATE_CACHE_DIR, keyed by a hash of the table definitions, so changing COLUMNS
+or ROWS builds a new golden base. If a golden base is gone (e.g. deleted by hand), it is built again. The records also
+hold the time a golden base was last used: at the end of a run that provisions templates, the sweeper deletes golden
+bases that were not used for TEMPLATE_MAX_AGE_DAYS (see sweeper.py).
+
+The OpenAPI files do not describe an endpoint to import a .dtable file (importBasefromFile only takes .xlsx and .csv
+files, which do not keep the column types), so the golden base is kept on the server instead of as an exported file.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from filelock import FileLock
+from pathlib import Path
+from schemas import SchemaRegistry
+from seeding import Seeder
+from typing import Any, Callable, Optional
+
+TEMPLATE_CACHE_DIR = Path(os.environ.get('TEMPLATE_CACHE_DIR', Path(__file__).resolve().parent / '.templates'))
+
+# table name -> (columns, rows), in the format of createTable and appendRows
+Tables = dict[str, tuple[list[dict], list[dict]]]
+
+def template_key(tables: Tables) -> str:
+    """Hash of the table definitions, changes whenever a table, column or row changes"""
+    return hashlib.sha256(json.dumps(tables, sort_keys=True).encode()).hexdigest()[:16]
+
+def create_tables(schemas: SchemaRegistry, base_uuid: str, base_token: str, tables: Tables):
+    """Creates the tables in an existing base and appends their rows"""
+    operation = schemas.get('base_operations_deprecated.yaml').get_operation_by_id('createTableDeprecated')
+    headers = {'Authorization': f'Bearer {base_token}'}
+
+    for table_name, (columns, rows) in tables.items():
+        body = {'table_name': table_name, 'columns': columns}
+        response = operation.make_case(path_parameters={'base_uuid': base_uuid}, body=body, headers=headers).call_and_validate()
+        assert response.status_code == 200, f'createTableDeprecated failed: {response.text}'
+
+        if rows:
+            Seeder(schemas, base_uuid, base_token).seed(table_name, rows)
+
+class TemplateProvisioner:
+    """
+    Copies golden bases into workspaces.
+
+    `create_workspace(group_name)` creates a group and returns the ID of its workspace, `base_token(workspace_id, base_name)`
+    returns a base token. Without `cache_dir`, golden bases are only reused within this process.
+    """
+    def __init__(self, schemas: SchemaRegistry, account_token: str, server: str, create_workspace: Callable[[str], int],
+                 base_token: Callable[[int, str], str], cache_dir: Optional[Path] = TEMPLATE_CACHE_DIR):
+        self.schemas = schemas
+        self.user_account_operations = schemas.get('user_account_operations.yaml')
+        self.account_token = account_token
+        self.server = server
+        self.create_workspace = create_workspace
+        self.base_token = base_token
+        self.cache_dir = cache_dir
+        # key -> {'workspace_id': ..., 'base_name': ...}
+        self.golden_bases: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def provision(self, tables: Tables, workspace_id: int) -> dict:
+        """Copies the golden base for `tables` into the workspace and returns the copy (id, uuid, name, ...)"""
+        key = template_key(tables)
+        golden = self.golden(key, tables)
+
+        response = self.copy(golden, workspace_id)
+        if response.status_code in (403, 404):
+            # The golden base is gone, build it again
+            golden = self.golden(key, tables, rebuild=True)
+            response = self.copy(golden, workspace_id)
+
+        assert response.status_code == 200, f'copyBaseFromWorkspace failed: {response.text}'
+        return response.json()['dtable']
+
+    def copy(self, golden: dict, workspace_id: int) -> Any:
+        body = {'src_workspace_id': golden['workspace_id'], 'name': golden['base_name'], 'dst_workspace_id': workspace_id}
+        headers = {'Authorization': f'Bearer {self.account_token}'}
+
+        return self.user_account_operations.get_operation_by_id('copyBaseFromWorkspace') \
+            .make_case(body=body, headers=headers).call_and_validate()
+
+    def golden(self, key: str, tables: Tables, rebuild: bool = False) -> dict:
+        """Returns the golden base for `tables`, builds it if there is none (or if `rebuild` is set)"""
+        with self._lock:
+            if not rebuild and key in self.golden_bases:
+                return self.golden_bases[key]
+
+            if self.cache_dir is None:
+                golden = self.build(key, tables)
+            else:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                path = self.cache_dir / f'{key}.json'
+
+                # Parallel workers (pytest-xdist) build every golden base only once
+                with FileLock(f'{path}.lock'):
+                    records = json.loads(path.read_text()) if path.is_file() else {}
+                    golden = records.get(self.server)
+                    if golden is not None:
+                        # Without the time of the last use, to compare it with the golden base of this process
+                        golden = {'workspace_id': golden['workspace_id'], 'base_name': golden['base_name']}
+                    if golden is None or (rebuild and golden == self.golden_bases.get(key)):
+                        golden = self.build(key, tables)
+                    records[self.server] = {**golden, 'used_at': time.time()}
+                    path.write_text(json.dumps(records, indent=2))
+
+            self.golden_bases[key] = golden
+            return golden
+
+    def workspace_ids(self) -> set[int]:
+        """Returns the workspaces of the golden bases used by this process"""
+        with self._lock:
+            return {golden['workspace_id'] for golden in self.golden_bases.values()}
+
+    def last_used(self) -> dict[int, float]:
+        """Returns {workspace ID: time.time() of the last use} for all golden bases of the server in cache_dir"""
+        if self.cache_dir is None or not self.cache_dir.is_dir():
+            return {}
+
+        last_used = {}
+        for path in self.cache_dir.glob('*.json'):
+            try:
+                golden = json.loads(path.read_text()).get(self.server)
+            except (OSError, ValueError):
+                continue
+            if golden is not None and 'used_at' in golden:
+                last_used[golden['workspace_id']] = golden['used_at']
+
+        return last_used
+
+    def build(self, key: str, tables: Tables) -> dict:
+        workspace_id = self.create_workspace(f'Automated Tests Templates {key}')
+        base_name = f'template-{key}'
+
+        body = {'workspace_id': workspace_id, 'name': base_name}
+        headers = {'Authorization': f'Bearer {self.account_token}'}
+        response = self.user_account_operations.get_operation_by_id('createBase') \
+            .make_case(body=body, headers=headers).call_and_validate()
+        assert response.status_code == 201, f'createBase failed: {response.text}'
+
+        create_tables(self.schemas, response.json()['table']['uuid'], self.base_token(workspace_id, base_name), tables)
+
+        return {'workspace_id': workspace_id, 'base_name': base_name}
@@ -0,0 +1,38 @@
+import accounts
+import requests
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+
+class ScriptedAdapter(BaseAdapter):
+    """Answers requests with the given status codes, one after another"""
+    def __init__(self, status_codes: list[int]):
+        super().__init__()
+        self.status_codes = status_codes
+        self.requests: list[PreparedRequest] = []
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        self.requests.append(request)
+
+        response = Response()
+        response.status_code = self.status_codes[len(self.requests) - 1]
+        response.request = request
+        response.url = request.url
+        response._content = b'{}'
+        return response
+
+    def close(self):
+        pass
+
+def test_connect_retries_429(monkeypatch):
+    adapter = ScriptedAdapter([429, 200])
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    monkeypatch.setattr(accounts, 'create_session', lambda: session)
+
+    _, http_session = accounts.connect()
+    response = http_session.get(f'{accounts.BASE_URL}/api2/ping/')
+
+    assert response.status_code == 200
+    assert response.retries == 1
+    assert len(adapter.requests) == 2
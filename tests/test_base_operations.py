@@ -1,250 +1,20 @@
 import pytest
-import requests
-import schemathesis
-from conftest import Base, BASE_URL, Secret
+from columns import COLUMNS
+from concurrency import run_concurrently
+from conftest import Base, Secret, http_session, schemas
+from pathlib import Path
+from requests import Response
 from schemathesis import Case
+from seeding import Seeder
 from syrupy.assertion import SnapshotAssertion
 from syrupy.matchers import path_type
+from templates import Tables
+from typing import Callable
+from uploads import Uploader
 
-schema = schemathesis.from_path('../user_account_operations.yaml', base_url=BASE_URL, validate_schema=True)
-base_operations_deprecated_schema= schemathesis.from_path('../base_operations_deprecated.yaml', base_url=BASE_URL, validate_schema=True)
-base_operations_schema = schemathesis.from_path('../base_operations.yaml', base_url=BASE_URL, validate_schema=True)
-file_operations = schemathesis.from_path('../file_operations.yaml', base_url=BASE_URL, validate_schema=True)
-
-COLUMNS = [
-    {
-        'column_name': 'text',
-        'column_type': 'text',
-    },
-    {
-        'column_name': 'long-text',
-        'column_type': 'long-text',
-    },
-    {
-        'column_name': 'number',
-        'column_type': 'number',
-    },
-    {
-        'column_name': 'number-decimal-dot-thousands-comma',
-        'column_type': 'number',
-        'column_data': {
-            'format': 'number',
-            'decimal': 'dot',
-            'thousands': 'comma',
-        },
-    },
-    {
-        'column_name': 'number-percent',
-        'column_type': 'number',
-        'column_data': {
-            'format': 'percent',
-            'decimal': 'comma',
-            'thousands': 'no',
-        },
-    },
-    {
-        'column_name': 'number-euro',
-        'column_type': 'number',
-        'column_data': {
-            'format': 'euro',
-            'decimal': 'comma',
-            'thousands': 'no',
-        },
-    },
-    {
-        'column_name': 'collaborator',
-        'column_type': 'collaborator',
-    },
-    {
-        'column_name': 'date-iso',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'YYYY-MM-DD'
-        }
-    },
-    {
-        'column_name': 'date-iso-hours-minutes',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'YYYY-MM-DD HH:mm'
-        }
-    },
-    {
-        'column_name': 'date-us',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'M/D/YYYY'
-        }
-    },
-    {
-        'column_name': 'date-us-hours-minutes',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'M/D/YYYY HH:mm'
-        }
-    },
-        {
-        'column_name': 'date-european',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'DD/MM/YYYY'
-        }
-    },
-    # FIXME: Fix this
-    # Also fails with insertColumn operation on api.seatable.io: {"error_type": "column_data_error", "error_message": "column_data: {\"format\":\"DD/MM/YYYY HH:mm\"} do not meet specifications."}
-    #{
-    #     'column_name': 'date-european-hours-minutes',
-    #     'column_type': 'date',
-    #     'column_data': {
-    #         'format': 'DD/MM/YYYY HH:mm'
-    #     }
-    #},
-    {
-        'column_name': 'date-german',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'DD.MM.YYYY'
-        }
-    },
-    {
-        'column_name': 'date-german-hours-minutes',
-        'column_type': 'date',
-        'column_data': {
-            'format': 'DD.MM.YYYY HH:mm'
-        }
-    },
-    {
-        'column_name': 'duration-hours-minutes',
-        'column_type': 'duration',
-        'column_data': {
-            'format': 'duration',
-            'duration_format': 'h:mm'
-        }
-    },
-    {
-        'column_name': 'duration-hours-minutes-seconds',
-        'column_type': 'duration',
-        'column_data': {
-            'format': 'duration',
-            'duration_format': 'h:mm:ss'
-        }
-    },
-    {
-        'column_name': 'single-select',
-        'column_type': 'single-select',
-        'column_data': {
-            'options': [
-               {'id': "0000", 'name': 'option-1', 'color': '#9860E5', 'textColor': '#000000'},
-               {'id': "ef3s", 'name': 'option-2', 'color': '#89D2EA', 'textColor': '#000000'},
-               {'id': "38d7", 'name': 'option-3', 'color': '#59CB74', 'textColor': '#000000'},
-            ]
-        }
-    },
-    {
-        'column_name': 'multiple-select',
-        'column_type': 'multiple-select',
-        'column_data': {
-            'options': [
-               {'id': "0000", 'name': 'option-1', 'color': '#9860E5', 'textColor': '#000000'},
-               {'id': "ef32", 'name': 'option-2', 'color': '#89D2EA', 'textColor': '#000000'},
-               {'id': "yze2", 'name': 'option-3', 'color': '#59CB74', 'textColor': '#000000'},
-            ]
-        }
-    },
-    {
-        'column_name': 'email',
-        'column_type': 'email',
-    },
-    {
-        'column_name': 'url',
-        'column_type': 'url',
-    },
-    {
-        'column_name': 'checkbox',
-        'column_type': 'checkbox',
-    },
-    {
-        'column_name': 'rate',
-        'column_type': 'rate',
-        'column_data': {
-            'rate_max_number': 10,
-        },
-    },
-    {
-        'column_name': 'formula',
-        'column_type': 'formula',
-        'column_data': {
-            'formula': "dateAdd({date-iso}, 1, 'year')"
-        }
-    },
-    {
-        'column_name': 'formula-integer-return-value',
-        'column_type': 'formula',
-        'column_data': {
-            'formula': '1 + 2',
-        },
-    },
-    {
-        'column_name': 'formula-float-return-value',
-        'column_type': 'formula',
-        'column_data': {
-            'formula': '1.3 + 2.6',
-        },
-    },
-    {
-        'column_name': 'formula-boolean-return-value',
-        'column_type': 'formula',
-        'column_data': {
-            'formula': 'and(true(), false())',
-        },
-    },
-    {
-        'column_name': 'geolocation-country-region',
-        'column_type': 'geolocation',
-        'column_data': {
-            'geo_format': 'country_region',
-            'lang': 'en',
-        },
-    },
-    {
-        'column_name': 'geolocation-lat-lon',
-        'column_type': 'geolocation',
-        'column_data': {
-            'geo_format': 'lng_lat',
-        },
-    },
-    {
-        'column_name': 'auto-number-integer',
-        'column_type': 'auto-number',
-        'column_data': {
-            'format': '0000',
-            'digits': 4,
-        },
-    },
-    {
-        'column_name': 'auto-number-string-prefix',
-        'column_type': 'auto-number',
-        'column_data': {
-            'format': '0000',
-            'digits': 4,
-            'prefix_type': 'string',
-            'prefix': 'row',
-        },
-    },
-    {
-        'column_name': 'auto-number-date-prefix',
-        'column_type': 'auto-number',
-        'column_data': {
-            'format': '0000',
-            'digits': 4,
-            'prefix_type': 'date',
-        },
-    },
-    {
-        'column_name': 'digital-sign',
-        'column_type': 'digital-sign',
-    },
-]
+schema = schemas.get('user_account_operations.yaml')
+base_operations_deprecated_schema = schemas.get('base_operations_deprecated.yaml')
+base_operations_schema = schemas.get('base_operations.yaml')
 
 ROWS = [
     {
@@ -440,11 +210,9 @@ def test_getRow(base: Base, snapshot_json, operation_id: str):
     assert snapshot_json(matcher=matcher) == response.json()
 
 @pytest.mark.parametrize('operation_id', ['listRowsDeprecated', 'listRows'])
-def test_listRows(base: Base, snapshot_json, operation_id: str):
+def test_listRows(provision: Callable[[Tables], Base], snapshot_json, operation_id: str):
     table_name = f'test_{operation_id}'
-
-    create_table(base, table_name, COLUMNS)
-    append_rows(base, table_name, ROWS)
+    base = provision({table_name: (COLUMNS, ROWS)})
 
     path_parameters = {'base_uuid': base.uuid}
     query = {'table_name': table_name}
@@ -480,13 +248,16 @@ def test_listRows_links(base: Base,  snapshot_json: SnapshotAssertion, operation
     columns_1 = [
         {'column_name': 'number', 'column_type': 'number'},
     ]
-    create_table(base, table_name_1, columns_1)
 
     table_name_2 = f'test_{operation_id}_links-2'
     columns_2 = [
         {'column_name': 'number', 'column_type': 'number'},
     ]
-    create_table(base, table_name_2, columns_2)
+
+    run_concurrently(
+        lambda: create_table(base, table_name_1, columns_1),
+        lambda: create_table(base, table_name_2, columns_2),
+    )
 
     # Add rows
     table_1_rows = [
@@ -497,11 +268,8 @@ def test_listRows_links(base: Base,  snapshot_json: SnapshotAssertion, operation
         {'number': 1.4},
         {'number': 1.4},
     ]
-    table_1_row_ids = append_rows(base, table_name_1, table_1_rows)
-    table_2_row_id = add_row(base, table_name_2, {'number': 2.1})
 
-    # Insert link column
-    path_parameters = {'base_uuid': base.uuid}
+    # Insert link column (while the rows are being added)
     body = {
         'table_name': table_name_2,
         'column_name': 'link',
@@ -511,27 +279,33 @@ def test_listRows_links(base: Base,  snapshot_json: SnapshotAssertion, operation
             'other_table': table_name_1
         },
     }
-    headers = {'Authorization': f'Bearer {base.token}'}
-    case: Case = base_operations_deprecated_schema.get_operation_by_id('insertColumnDeprecated') \
-        .make_case(path_parameters=path_parameters, body=body, headers=headers)
-    response = case.call_and_validate()
+
+    table_1_row_ids, table_2_row_id, response = run_concurrently(
+        lambda: append_rows(base, table_name_1, table_1_rows),
+        lambda: add_row(base, table_name_2, {'number': 2.1}),
+        lambda: insert_column(base, body),
+    )
 
     link_id = response.json()['data']['link_id']
     assert isinstance(link_id, str)
 
+    path_parameters = {'base_uuid': base.uuid}
+    headers = {'Authorization': f'Bearer {base.token}'}
+
     # Create row link
-    body = {
-        'table_name': table_name_2,
-        'other_table_name': table_name_1,
-        'link_id': link_id,
-        'row_id': table_2_row_id,
-        'other_rows_ids': table_1_row_ids,
-    }
-    case: Case = base_operations_deprecated_schema.get_operation_by_id('createRowLinksDeprecated') \
-        .make_case(path_parameters=path_parameters, body=body, headers=headers)
-    response = case.call_and_validate()
+    def create_row_links():
+        body = {
+            'table_name': table_name_2,
+            'other_table_name': table_name_1,
+            'link_id': link_id,
+            'row_id': table_2_row_id,
+            'other_rows_ids': table_1_row_ids,
+        }
+        case: Case = base_operations_deprecated_schema.get_operation_by_id('createRowLinksDeprecated') \
+            .make_case(path_parameters=path_parameters, body=body, headers=headers)
+        response = case.call_and_validate()
 
-    assert response.status_code == 200
+        assert response.status_code == 200
 
     # TODO: Use appendColumns operation (does not work with link-formula columns?)
     link_formula_columns = [
@@ -611,13 +385,13 @@ def test_listRows_links(base: Base,  snapshot_json: SnapshotAssertion, operation
         },
     ]
 
-    # Insert link-formula columns to table 2
-    for column in link_formula_columns:
-        path_parameters = {'base_uuid': base.uuid}
-        case: Case = base_operations_deprecated_schema.get_operation_by_id('insertColumnDeprecated') \
-            .make_case(path_parameters=path_parameters, body=column, headers=headers)
-        response = case.call_and_validate()
-        assert response.status_code == 200
+    def insert_link_formula_columns():
+        # One after another, so the columns are listed in a fixed order
+        for column in link_formula_columns:
+            insert_column(base, column)
+
+    # Insert link-formula columns to table 2 (while the rows are being linked)
+    run_concurrently(create_row_links, insert_link_formula_columns)
 
     # List rows
     query = {'table_name': table_name_2}
@@ -657,51 +431,14 @@ def test_listRows_files_images(base: Base,  snapshot_json: SnapshotAssertion, op
     ]
     create_table(base, table_name, columns)
 
-    # Generate upload link
-    headers = {'Authorization': f'Bearer {base.api_token}'}
-    case: Case = file_operations.get_operation_by_id('getUploadLink').make_case(headers=headers)
-    response = case.call_and_validate()
-    assert response.status_code == 200
-
-    upload_link_data = response.json()
-
-    # TODO: Use schemathesis to execute uploadFile requests
-
-    # Upload image
-    files = { "file": ("seatable-logo.svg", open("assets/seatable-logo.svg", "rb"), "image/svg+xml") }
-    payload = {
-        'parent_dir': upload_link_data['parent_path'],
-        'relative_path': upload_link_data['img_relative_path'],
-        'replace': 1,
-    }
-    headers = {'Accept': 'application/json'}
-    response = requests.post(f'{upload_link_data["upload_link"]}?ret-json=1', data=payload, files=files, headers=headers)
-    assert response.status_code == 200
-    uploaded_image = response.json()
-
-    # Upload file
-    files = { "file": ("test.txt", open("assets/test.txt", "rb"), "text/plain") }
-    payload = {
-        'parent_dir': upload_link_data['parent_path'],
-        'relative_path': upload_link_data['file_relative_path'],
-        'replace': 1,
-    }
-    headers = {'Accept': 'application/json'}
-    response = requests.post(f'{upload_link_data["upload_link"]}?ret-json=1', data=payload, files=files, headers=headers)
-    assert response.status_code == 200
-    uploaded_file = response.json()
+    # Upload image and file (streamed from disk, with the same upload link)
+    uploader = Uploader(schemas, http_session, base.api_token, base.workspace_id, replace=True)
+    uploaded_image, uploaded_file = uploader.upload_many([Path('assets/seatable-logo.svg'), Path('assets/test.txt')]).files
 
     # Insert row
     row = {
-        'images': [f'/workspace/{base.workspace_id}{upload_link_data["parent_path"]}/{upload_link_data["img_relative_path"]}/{uploaded_image[0]["name"]}'],
-        'files': [
-            {
-                'name': uploaded_file[0]['name'],
-                'size': uploaded_file[0]['size'],
-                'type': 'file',
-                'url': f'/workspace/{base.workspace_id}{upload_link_data["parent_path"]}/{upload_link_data["file_relative_path"]}/{uploaded_file[0]["name"]}'
-            }
-        ],
+        'images': [uploaded_image.cell_value],
+        'files': [uploaded_file.cell_value],
     }
     add_row(base, table_name, row)
 
@@ -729,11 +466,9 @@ def test_listRows_files_images(base: Base,  snapshot_json: SnapshotAssertion, op
     assert snapshot_json(matcher=matcher) == response.json()
 
 @pytest.mark.parametrize('operation_id', ['querySQLDeprecated', 'querySQL'])
-def test_querySQL(base: Base, snapshot_json: SnapshotAssertion, operation_id: str):
+def test_querySQL(provision: Callable[[Tables], Base], snapshot_json: SnapshotAssertion, operation_id: str):
     table_name = f'test_{operation_id}'
-
-    create_table(base, table_name, COLUMNS)
-    append_rows(base, table_name, ROWS)
+    base = provision({table_name: (COLUMNS, ROWS)})
 
     path_parameters = {'base_uuid': base.uuid}
     body = {'sql': f'SELECT * FROM {table_name}', 'convert_keys': True}
@@ -760,7 +495,7 @@ def test_querySQL(base: Base, snapshot_json: SnapshotAssertion, operation_id: st
 
     assert snapshot_json(matcher=matcher) == response.json()
 
-def create_table(base: Base, table_name: str, columns: list[dict]):
+def create_table(base: Base, table_name: str, columns: list[dict]) -> str:
     path_parameters = {'base_uuid': base.uuid}
     body = {'table_name': table_name, 'columns': columns}
     headers = {'Authorization': f'Bearer {base.token}'}
@@ -772,6 +507,11 @@ def create_table(base: Base, table_name: str, columns: list[dict]):
 
     assert response.status_code == 200
 
+    table_id = response.json()['_id']
+    assert isinstance(table_id, str)
+
+    return table_id
+
 def add_row(base: Base, table_name: str, row: dict) -> str:
     path_parameters = {'base_uuid': base.uuid}
     body = {'table_name': table_name, 'row': row}
@@ -787,19 +527,22 @@ def add_row(base: Base, table_name: str, row: dict) -> str:
     return row_id
 
 def append_rows(base: Base, table_name: str, rows: list[dict]) -> list[str]:
+    # Sent in batches, appendRows accepts at most 1,000 rows per request
+    row_ids = []
+    Seeder(schemas, base.uuid, base.token).seed(table_name, rows, on_row_ids=row_ids.extend)
+
+    assert len(row_ids) == len(rows)
+
+    return row_ids
+
+def insert_column(base: Base, column: dict) -> Response:
     path_parameters = {'base_uuid': base.uuid}
-    body = {'table_name': table_name, 'rows': rows}
     headers = {'Authorization': f'Bearer {base.token}'}
 
-    operation = base_operations_schema.get_operation_by_id('appendRows')
-    case: Case = operation.make_case(path_parameters=path_parameters, body=body, headers=headers)
+    operation = base_operations_deprecated_schema.get_operation_by_id('insertColumnDeprecated')
+    case: Case = operation.make_case(path_parameters=path_parameters, body=column, headers=headers)
     response = case.call_and_validate()
 
     assert response.status_code == 200
 
-    # Extract row IDs
-    row_ids = [r['_id'] for r in response.json()['row_ids']]
-
-    assert len(row_ids) == len(rows)
-
-    return row_ids
+    return response
@@ -0,0 +1,35 @@
+import baselines
+from baselines import baseline_path, find_regressions, read_baseline, write_baseline
+from pathlib import Path
+
+def summary(**p50: float) -> dict:
+    return {
+        operation_id: {'count': 1, 'latency': {'p50': seconds, 'p95': seconds}, 'ttfb': {'p50': seconds}, 'bytes': 100}
+        for operation_id, seconds in p50.items()
+    }
+
+def test_pass_within_threshold():
+    # 1.4x slower
+    assert find_regressions(summary(listRows=0.2), summary(listRows=0.28)) == []
+
+def test_pass_below_min_delta():
+    # 3x slower, but only by 20 ms
+    assert find_regressions(summary(listRows=0.01), summary(listRows=0.03)) == []
+
+def test_fail_above_threshold_and_min_delta():
+    regressions = find_regressions(summary(listRows=0.2, querySQL=0.2), summary(listRows=0.4, querySQL=0.2))
+
+    assert regressions == ['listRows: median latency 400.0 ms, baseline 200.0 ms (2.00x, threshold 1.5x)']
+
+def test_ignore_ungated_and_new_operations(monkeypatch):
+    monkeypatch.setattr(baselines, 'GATED_OPERATIONS', ['listRows', 'appendRows'])
+
+    assert find_regressions(summary(getRow=0.1, listRows=0.2), summary(getRow=1.0, appendRows=1.0, listRows=0.2)) == []
+
+def test_write_and_read_baseline(tmp_path: Path):
+    path = baseline_path(tmp_path / '__snapshots__' / 'test_base_operations', 'test_listRows[listRows]')
+    write_baseline(path, summary(listRows=0.2))
+
+    assert path == tmp_path / '__baselines__' / 'test_base_operations' / 'test_listRows[listRows].json'
+    assert read_baseline(path) == {'listRows': {'count': 1, 'latency': {'p50': 0.2, 'p95': 0.2}, 'ttfb': {'p50': 0.2}}}
+    assert read_baseline(tmp_path / 'missing.json') is None
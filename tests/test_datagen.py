@@ -0,0 +1,28 @@
+import io
+import json
+from columns import COLUMNS
+from datagen import BATCH_SIZE, RowGenerator
+
+def jsonl(generator: RowGenerator, count: int, start: int = 0) -> bytes:
+    file = io.StringIO()
+    generator.write_jsonl(file, count, start=start)
+    return file.getvalue().encode()
+
+def test_same_seed_same_rows():
+    count = 2 * BATCH_SIZE + 10
+    output = jsonl(RowGenerator(COLUMNS, seed=1), count)
+
+    assert output == jsonl(RowGenerator(COLUMNS, seed=1), count)
+    # The dicts and the JSON lines contain the same rows
+    assert list(RowGenerator(COLUMNS, seed=1).rows(count)) == [json.loads(line) for line in output.splitlines()]
+
+def test_range_matches_full_output():
+    generator = RowGenerator(COLUMNS, seed=1)
+    full = jsonl(generator, 3 * BATCH_SIZE).splitlines(keepends=True)
+
+    # Ranges across batch boundaries, generated in any order
+    for start, count in [(BATCH_SIZE - 5, BATCH_SIZE + 10), (0, 10), (2 * BATCH_SIZE, BATCH_SIZE)]:
+        assert jsonl(generator, count, start=start) == b''.join(full[start:start + count])
+
+def test_different_seed_different_rows():
+    assert jsonl(RowGenerator(COLUMNS, seed=1), 10) != jsonl(RowGenerator(COLUMNS, seed=2), 10)
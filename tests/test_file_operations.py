@@ -0,0 +1,50 @@
+import hashlib
+from conftest import Base, http_session, schemas
+from downloads import MANIFEST_FILE, AssetExporter
+from pathlib import Path
+from test_base_operations import add_row, create_table
+from uploads import Uploader
+
+ASSETS = [Path('assets/seatable-logo.svg'), Path('assets/test.txt')]
+
+def test_export_assets(base: Base, tmp_path: Path):
+    table_name = 'test_export_assets'
+    columns = [
+        {'column_name': 'images', 'column_type': 'image'},
+        {'column_name': 'files', 'column_type': 'file'},
+    ]
+    create_table(base, table_name, columns)
+
+    uploader = Uploader(schemas, http_session, base.api_token, base.workspace_id)
+    uploaded_image, uploaded_file = uploader.upload_many(ASSETS).files
+    add_row(base, table_name, {'images': [uploaded_image.cell_value], 'files': [uploaded_file.cell_value]})
+
+    exporter = AssetExporter(schemas, http_session, base.uuid, base.token, base.api_token, tmp_path)
+    assets = exporter.assets([table_name])
+    assert sorted(asset.path.rsplit('/', 1)[1] for asset in assets) == [uploaded_image.name, uploaded_file.name]
+
+    result = exporter.export(assets)
+    assert result.download_links == 2
+    for file, source in zip(sorted(result.files, key=lambda f: f.path.name), sorted(ASSETS, key=lambda p: p.name)):
+        assert file.path.read_bytes() == source.read_bytes()
+        assert file.sha256 == hashlib.sha256(source.read_bytes()).hexdigest()
+        assert not file.skipped
+    assert (tmp_path / MANIFEST_FILE).exists()
+
+    # Unchanged files are only verified
+    result = exporter.export(assets)
+    assert result.download_links == 0
+    assert all(file.skipped for file in result.files)
+
+    # An interrupted download is resumed from the part on disk
+    downloaded = next(file for file in result.files if file.path.name == uploaded_image.name)
+    content = downloaded.path.read_bytes()
+    downloaded.path.with_name(f'{downloaded.path.name}.part').write_bytes(content[:len(content) // 2])
+    downloaded.path.unlink()
+
+    result = exporter.export(assets)
+    resumed = next(file for file in result.files if file.path.name == uploaded_image.name)
+    assert result.download_links == 1
+    assert resumed.reused_bytes == len(content) // 2
+    assert resumed.path.read_bytes() == content
+    assert resumed.sha256 == downloaded.sha256
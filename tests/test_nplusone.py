@@ -0,0 +1,69 @@
+import nplusone
+import pytest
+import threading
+from conftest import schemas
+from nplusone import CallLog
+
+@pytest.fixture(autouse=True)
+def defaults(monkeypatch):
+    monkeypatch.setattr(nplusone, 'MIN_CALLS', 3)
+    monkeypatch.setattr(nplusone, 'WINDOW', 2)
+
+def record(monkeypatch, log: CallLog, operation_id: str, times: list[float], path_parameters: dict = None):
+    """Records calls of the operation at the given times"""
+    clock = iter(times)
+    with monkeypatch.context() as m:
+        m.setattr(nplusone.time, 'monotonic', lambda: next(clock))
+        for _ in times:
+            log.record(operation_id, path_parameters or {'base_uuid': 'base'}, scope='test')
+
+def test_report_calls_within_window(monkeypatch):
+    log = CallLog()
+    record(monkeypatch, log, 'insertColumnDeprecated', [0, 1, 1.5, 2])
+
+    [finding] = log.findings(schemas)
+
+    assert finding.scope == 'test'
+    assert finding.operation_id == 'insertColumnDeprecated'
+    assert finding.path_parameters == {'base_uuid': 'base'}
+    assert finding.calls == 4
+    assert finding.seconds == 2
+    assert finding.batch_operations == ['appendColumns', 'appendColumnsDeprecated']
+    assert str(finding) == 'test: 4 x insertColumnDeprecated in 2.0 seconds -> appendColumns, appendColumnsDeprecated'
+
+def test_ignore_calls_spread_beyond_window(monkeypatch):
+    log = CallLog()
+    # Runs of 2 calls, each 2 seconds (WINDOW) after the previous one
+    record(monkeypatch, log, 'insertColumnDeprecated', [0, 1, 3, 4, 6, 7])
+    # Different path parameters are counted separately
+    record(monkeypatch, log, 'getRow', [0, 0.1], {'row_id': 'a'})
+    record(monkeypatch, log, 'getRow', [0.2], {'row_id': 'b'})
+
+    assert log.findings(schemas) == []
+
+    monkeypatch.setattr(nplusone, 'WINDOW', 2.5)
+    assert [f.calls for f in log.findings(schemas)] == [6]
+    monkeypatch.setattr(nplusone, 'MIN_CALLS', 7)
+    assert log.findings(schemas) == []
+
+def test_only_report_replaceable_calls(monkeypatch):
+    log = CallLog()
+    # Accepts an array of rows already, e.g. seeding in batches
+    record(monkeypatch, log, 'appendRows', [0, 1, 2])
+    # No batch operation
+    record(monkeypatch, log, 'createRowLink', [0, 1, 2])
+    record(monkeypatch, log, 'getRow', [0, 1, 2])
+
+    assert [(f.operation_id, f.batch_operations) for f in log.findings(schemas)] == [('getRow', ['listRows'])]
+
+def test_scoped():
+    log = CallLog()
+
+    with log.scoped('session'):
+        # Also applies to other threads, e.g. the parallel requests of the sweeper
+        thread = threading.Thread(target=log.record, args=('deleteGroup', {'group_id': 1}))
+        thread.start()
+        thread.join()
+    log.record('deleteGroup', {'group_id': 1}, scope='test')
+
+    assert [scope for scope, _, _ in log.calls] == ['session', 'test']
@@ -0,0 +1,92 @@
+import pytest
+import time
+from conftest import BASE_URL, Base, create_base, get_base_token, schemas
+from pathlib import Path
+from pool import BasePool, PooledBase
+from sweeper import Sweeper
+from test_base_operations import create_table
+
+LEASE_SECONDS = 1
+
+@pytest.fixture
+def new_pool(account_token, sweeper: Sweeper, tmp_path: Path):
+    def create(group_name: str) -> tuple[int, int, str, str]:
+        group_id, workspace_id, base_uuid, base_name = create_base(account_token, group_name)
+        # Pooled groups are left alone by the sweeper unless they are tracked
+        sweeper.track_group(group_id, account_token)
+        return group_id, workspace_id, base_uuid, base_name
+
+    def new_pool(size: int) -> BasePool:
+        # Pools with the same file share their bases, like parallel workers
+        return BasePool(
+            schemas, BASE_URL, size, create_base=create,
+            base_token=lambda workspace_id, base_name: get_base_token(account_token, workspace_id, base_name).value,
+            path=tmp_path / 'bases.json', lease_seconds=LEASE_SECONDS,
+        )
+
+    return new_pool
+
+def crash(pool: BasePool, base: PooledBase):
+    """Stops renewing the lease, as if the holder was killed"""
+    pool._heartbeats.pop(base.uuid).set()
+
+def add_table(pool: BasePool, base: PooledBase, table_name: str):
+    token = pool.base_token(base.workspace_id, base.name)
+    create_table(Base(workspace_id=base.workspace_id, uuid=base.uuid, token=token, api_token=''), table_name,
+                 [{'column_name': 'Name', 'column_type': 'text'}])
+
+def test_checkin_resets_base(new_pool):
+    pool = new_pool(1)
+    base = pool.checkout()
+    add_table(pool, base, 'test_checkin_resets_base')
+    assert 'test_checkin_resets_base' in pool.table_names(base.workspace_id, base.name, base.uuid)
+
+    pool.checkin(base)
+
+    assert pool.table_names(base.workspace_id, base.name, base.uuid) == base.initial_tables
+    again = pool.checkout()
+    assert again.uuid == base.uuid
+    pool.checkin(again)
+
+def test_renew_lease(new_pool):
+    pool = new_pool(1)
+    base = pool.checkout()
+    crash(pool, base)
+    lease = base.lease
+
+    assert pool.renew(base)
+    assert base.lease != lease
+    assert [b.lease for b in pool.bases()] == [base.lease]
+    # The renewed lease is still valid
+    assert new_pool(1).checkout() is None
+
+def test_reclaim_expired_lease(new_pool):
+    pool = new_pool(1)
+    base = pool.checkout()
+    add_table(pool, base, 'test_reclaim_expired_lease')
+    crash(pool, base)
+    time.sleep(LEASE_SECONDS + 0.1)
+
+    other_pool = new_pool(1)
+    reclaimed = other_pool.checkout()
+
+    assert reclaimed.uuid == base.uuid
+    # Reset because the crashed holder did not return it
+    assert other_pool.table_names(base.workspace_id, base.name, base.uuid) == base.initial_tables
+    # The crashed holder lost its lease
+    assert not pool.renew(base)
+    other_pool.checkin(reclaimed)
+
+def test_group_names_after_drain(new_pool):
+    pool = new_pool(3)
+    first, second = pool.checkout(), pool.checkout()
+    assert [first.group_name, second.group_name] == ['Automated Tests Pool 1', 'Automated Tests Pool 2']
+
+    pool.checkin(first)
+    assert [b.uuid for b in pool.drain()] == [first.uuid]
+
+    # Not "Automated Tests Pool 2" again while the second base still exists
+    third = pool.checkout()
+    assert third.group_name == 'Automated Tests Pool 3'
+    pool.checkin(second)
+    pool.checkin(third)
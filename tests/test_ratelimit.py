@@ -0,0 +1,85 @@
+import pytest
+import ratelimit
+import time
+from ratelimit import RateLimitExceeded, RateLimiter
+from requests import PreparedRequest, Request, Response
+from test_accounts import ScriptedAdapter
+
+BASE_UUID = '5f226214-a1e0-4c6d-897e-5c43739b6934'
+OTHER_BASE_UUID = '6a7b8c9d-a1e0-4c6d-897e-5c43739b6934'
+LIST_ROWS_URL = f'https://cloud.seatable.io/dtable-server/api/v1/dtables/{BASE_UUID}/rows/'
+
+def prepare(url: str, method: str = 'GET') -> PreparedRequest:
+    return Request(method, url).prepare()
+
+def test_retry_429():
+    limiter = RateLimiter('off')
+    adapter = ScriptedAdapter([429, 200])
+
+    response = limiter.send(adapter, prepare(LIST_ROWS_URL))
+
+    assert response.status_code == 200
+    assert response.retries == 1
+    assert limiter.retries == 1
+    assert len(adapter.requests) == 2
+
+def test_give_up_after_max_retries(monkeypatch):
+    monkeypatch.setattr(ratelimit, 'MAX_RETRIES', 1)
+    adapter = ScriptedAdapter([429, 429, 200])
+
+    response = RateLimiter('off').send(adapter, prepare(LIST_ROWS_URL))
+
+    assert response.status_code == 429
+    assert len(adapter.requests) == 2
+
+def test_buckets():
+    buckets = RateLimiter('cloud').buckets('GET', LIST_ROWS_URL)
+    assert [(endpoint_class.name, key) for endpoint_class, key in buckets] == [
+        ('list-rows', BASE_UUID.replace('-', '')),
+        ('dtable-server', BASE_UUID.replace('-', '')),
+    ]
+
+    # Appending rows is not limited like listing them, the web API is counted per IP address
+    assert [c.name for c, _ in RateLimiter('cloud').buckets('POST', LIST_ROWS_URL)] == ['dtable-server']
+    assert RateLimiter('cloud').buckets('GET', 'https://cloud.seatable.io/api/v2.1/workspaces/')[0][1] == ''
+
+    # SeaTable Dedicated and self-hosted servers have no limits for /api/v2.1/, no limits at all without a profile
+    assert RateLimiter('server').buckets('GET', 'https://cloud.seatable.io/api/v2.1/workspaces/') == []
+    assert RateLimiter('off').buckets('GET', LIST_ROWS_URL) == []
+
+def test_workers_share_the_limits():
+    list_rows = RateLimiter('server').buckets('GET', LIST_ROWS_URL)[0][0]
+
+    assert [rate.limit for rate in RateLimiter('server').rates(list_rows)] == [100, 6000]
+    assert [rate.limit for rate in RateLimiter('server', workers=4).rates(list_rows)] == [25, 1500]
+
+def test_bucket_limit(monkeypatch):
+    # Fail instead of waiting for the next minute
+    monkeypatch.setattr(ratelimit, 'MAX_WAIT', 0)
+    limiter = RateLimiter('server')
+
+    for _ in range(100):
+        limiter.acquire('GET', LIST_ROWS_URL)
+
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire('GET', LIST_ROWS_URL)
+
+    # Every base has its own buckets
+    limiter.acquire('GET', LIST_ROWS_URL.replace(BASE_UUID, OTHER_BASE_UUID))
+
+def test_pause_until_reset():
+    limiter = RateLimiter('cloud')
+    response = Response()
+    response.headers['x-ratelimit-remaining'] = '0'
+    response.headers['x-ratelimit-reset'] = str(time.time() + 0.5)
+
+    limiter.update('GET', LIST_ROWS_URL, response)
+
+    start = time.perf_counter()
+    limiter.acquire('GET', LIST_ROWS_URL)
+    assert time.perf_counter() - start >= 0.4
+
+    # Only until the reset
+    start = time.perf_counter()
+    limiter.acquire('GET', LIST_ROWS_URL)
+    assert time.perf_counter() - start < 0.1
@@ -0,0 +1,57 @@
+import threading
+import time
+from conftest import Base, schemas
+from seeding import Seeder, batches
+from test_base_operations import create_table
+
+def test_batches():
+    rows = ({'Name': str(i)} for i in range(2500))
+
+    assert [len(batch) for batch in batches(rows, 1000)] == [1000, 1000, 500]
+    assert list(batches([], 1000)) == []
+
+def test_bounded_in_flight_batches(monkeypatch):
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+    read = []
+
+    def append(self, table_name: str, rows: list[dict], big_data: bool = False) -> tuple[list[str], int]:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        # Later batches finish first
+        time.sleep(0.05 if rows[0]['Name'] == '0' else 0.01)
+        with lock:
+            in_flight -= 1
+        return [row['Name'] for row in rows], len(rows)
+
+    def rows():
+        for i in range(2500):
+            read.append(i)
+            # Rows are only read once a batch finished
+            assert len(read) <= 100 * (3 + len(row_ids) // 100)
+            yield {'Name': str(i)}
+
+    monkeypatch.setattr(Seeder, 'append', append)
+    row_ids = []
+    seeder = Seeder(schemas, 'base_uuid', 'base_token', batch_size=100, concurrency=2)
+    result = seeder.seed('Table1', rows(), on_row_ids=row_ids.extend)
+
+    assert result.rows == 2500
+    assert result.requests == 25
+    assert max_in_flight == 2
+    assert row_ids == [str(i) for i in range(2500)]
+
+def test_seed(base: Base):
+    table_name = 'test_seed'
+    create_table(base, table_name, [{'column_name': 'Name', 'column_type': 'text'}])
+
+    row_ids = []
+    result = Seeder(schemas, base.uuid, base.token, batch_size=1000).seed(
+        table_name, ({'Name': str(i)} for i in range(2500)), on_row_ids=row_ids.extend)
+
+    assert result.rows == 2500
+    assert result.requests == 3
+    assert len(set(row_ids)) == 2500
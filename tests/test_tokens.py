@@ -0,0 +1,103 @@
+import base64
+import json
+import requests
+import time
+from concurrency import run_concurrently
+from test_accounts import ScriptedAdapter
+from tokens import REFRESH_MARGIN, TokenCache
+
+def jwt(subject: str, expires_in: float) -> str:
+    payload = json.dumps({'sub': subject, 'exp': time.time() + expires_in}).encode()
+    return f"e30.{base64.urlsafe_b64encode(payload).decode().rstrip('=')}.signature"
+
+class TokenRecorder(ScriptedAdapter):
+    """Records the Authorization header of every request (the token adapter changes the request in place)"""
+    def __init__(self, status_codes: list[int]):
+        super().__init__(status_codes)
+        self.authorization: list[str] = []
+
+    def send(self, request, **kwargs):
+        self.authorization.append(request.headers.get('Authorization'))
+        return super().send(request, **kwargs)
+
+def recording_session(cache: TokenCache, status_codes: list[int]) -> tuple[requests.Session, TokenRecorder]:
+    adapter = TokenRecorder(status_codes)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    cache.mount(session)
+    return session, adapter
+
+def test_fetch_different_tokens_in_parallel():
+    cache = TokenCache()
+
+    def fetch(token: str) -> str:
+        time.sleep(0.5)
+        return token
+
+    start = time.perf_counter()
+    tokens = run_concurrently(
+        lambda: cache.get('base', 'one', lambda: fetch('token-1')),
+        lambda: cache.get('base', 'two', lambda: fetch('token-2')),
+        limit=2,
+    )
+    assert time.perf_counter() - start < 0.9
+
+    assert tokens == ['token-1', 'token-2']
+    assert cache.fetched == 2
+
+def test_fetch_same_token_once():
+    cache = TokenCache()
+
+    def fetch() -> str:
+        time.sleep(0.2)
+        return 'token'
+
+    tokens = run_concurrently(*(lambda: cache.get('base', 'one', fetch) for _ in range(4)), limit=4)
+
+    assert tokens == ['token'] * 4
+    assert cache.fetched == 1
+
+def test_refresh_expiring_token():
+    cache = TokenCache()
+    tokens = iter([jwt('one', REFRESH_MARGIN / 2), jwt('two', 3 * REFRESH_MARGIN)])
+    fetch = lambda: next(tokens)
+
+    expiring = cache.get('api', 'base', fetch)
+    refreshed = cache.get('api', 'base', fetch)
+
+    assert refreshed != expiring
+    assert cache.get('api', 'base', fetch) == refreshed
+    assert cache.fetched == 2
+
+def test_replace_outdated_token():
+    cache = TokenCache()
+    tokens = iter([jwt('one', REFRESH_MARGIN / 2), jwt('two', 3 * REFRESH_MARGIN)])
+    outdated = cache.get('api', 'base', lambda: next(tokens))
+    session, adapter = recording_session(cache, [200])
+
+    response = session.get('https://seatable.local/api/v2.1/', headers={'Authorization': f'Bearer {outdated}'})
+
+    assert response.status_code == 200
+    assert adapter.authorization == [f'Bearer {cache.current(outdated)}']
+    assert cache.current(outdated) != outdated
+
+def test_retry_rejected_token():
+    cache = TokenCache()
+    tokens = iter(['account-token-1', 'account-token-2'])
+    rejected = cache.get('account', 'user', lambda: next(tokens))
+    session, adapter = recording_session(cache, [401, 200])
+
+    response = session.get('https://seatable.local/api/v2.1/', headers={'Authorization': f'Token {rejected}'})
+
+    assert response.status_code == 200
+    assert response.retries == 1
+    assert adapter.authorization == ['Token account-token-1', 'Token account-token-2']
+    assert cache.fetched == 2
+
+def test_keep_unknown_token():
+    session, adapter = recording_session(TokenCache(), [401])
+
+    response = session.get('https://seatable.local/api/v2.1/', headers={'Authorization': 'Token unknown'})
+
+    assert response.status_code == 401
+    assert adapter.authorization == ['Token unknown']
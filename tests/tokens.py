@@ -0,0 +1,222 @@
+import base64
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from requests import PreparedRequest, Response, Session
+from requests.adapters import BaseAdapter
+from typing import Callable, Optional
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:
+    # Only needed for the optional cache file
+    Fernet = InvalidToken = None
+
+# Tokens are refreshed if they expire within the next REFRESH_MARGIN seconds
+REFRESH_MARGIN = 60
+
+@dataclass
+class CachedToken:
+    # Hide token from console output by setting repr=False
+    token: str = field(repr=False)
+    # Unix timestamp, None if the token does not expire (e.g. account tokens)
+    expires_at: Optional[float] = None
+    # Stored in the cache file (if configured)
+    persistent: bool = False
+
+    def expires_soon(self) -> bool:
+        return self.expires_at is not None and self.expires_at - time.time() < REFRESH_MARGIN
+
+class TokenCache:
+    """
+    Caches account, base and API tokens for the whole test run.
+
+    A token is only fetched again if it is about to expire or if the server rejects it (status 401).
+    TokenRefreshAdapter replaces outdated tokens in the Authorization header of outgoing requests, so code
+    that still holds an old token keeps working after a refresh.
+
+    Tokens of different kinds or subjects are fetched in parallel, the same token is only fetched by one thread at a time.
+
+    Persistent tokens can additionally be stored in an encrypted file to reuse them across runs. This requires
+    the cryptography package and a Fernet key (see Fernet.generate_key()).
+    """
+    def __init__(self, path: Optional[Path] = None, key: Optional[str] = None):
+        if path is not None:
+            assert key is not None, 'A key is required to encrypt the token cache file'
+            assert Fernet is not None, 'The cryptography package is required to encrypt the token cache file'
+
+        self.path = path
+        self.fernet = Fernet(key) if path is not None else None
+        # (kind, subject) -> token
+        self._tokens: dict[tuple[str, str], CachedToken] = self._read()
+        # (kind, subject) -> function to fetch a new token
+        self._fetch: dict[tuple[str, str], Callable[[], str]] = {}
+        # Token -> (kind, subject), includes outdated tokens
+        self._keys: dict[str, tuple[str, str]] = {cached.token: key for key, cached in self._tokens.items()}
+        # Guards the dicts, held only briefly (never while fetching a token)
+        self._lock = threading.RLock()
+        # (kind, subject) -> lock held while the token is fetched
+        self._key_locks: dict[tuple[str, str], threading.RLock] = {}
+        self.fetched = 0
+
+    def get(self, kind: str, subject: str, fetch: Callable[[], str], persistent: bool = False) -> str:
+        """Returns the cached token for (kind, subject), calls fetch() if there is none or it expires soon"""
+        key = (kind, subject)
+
+        with self._lock:
+            self._fetch[key] = fetch
+
+        with self._key_lock(key):
+            cached = self._tokens.get(key)
+
+            if cached is None or cached.expires_soon():
+                return self._refresh(key, persistent)
+
+            return cached.token
+
+    def add(self, kind: str, subject: str, token: str, fetch: Callable[[], str], persistent: bool = False):
+        """Adds a token that was fetched elsewhere (e.g. by another pytest-xdist worker)"""
+        key = (kind, subject)
+
+        with self._lock:
+            self._fetch[key] = fetch
+            cached = self._tokens.get(key)
+
+            if cached is None or cached.token != token:
+                self._tokens[key] = CachedToken(token=token, expires_at=token_expiry(token), persistent=persistent)
+                self._keys[token] = key
+
+    def current(self, token: str) -> str:
+        """Returns the up to date version of a token that was issued by this cache (refreshes it if it expires soon)"""
+        key = self._keys.get(token)
+        if key is None:
+            return token
+
+        with self._key_lock(key):
+            cached = self._tokens[key]
+            if cached.expires_soon() and key in self._fetch:
+                return self._refresh(key, cached.persistent)
+
+            return cached.token
+
+    def reject(self, token: str) -> Optional[str]:
+        """Called if the server rejects a token, returns a new token (None if the token cannot be refreshed)"""
+        key = self._keys.get(token)
+        if key is None or key not in self._fetch:
+            return None
+
+        with self._key_lock(key):
+            cached = self._tokens[key]
+            # Another thread might have refreshed the token in the meantime
+            if cached.token != token:
+                return cached.token
+
+            return self._refresh(key, cached.persistent)
+
+    def mount(self, session: Session) -> Session:
+        """Keeps the tokens in the Authorization header of all requests of `session` up to date"""
+        for prefix, adapter in list(session.adapters.items()):
+            if not isinstance(adapter, TokenRefreshAdapter):
+                session.mount(prefix, TokenRefreshAdapter(self, adapter))
+
+        return session
+
+    def _key_lock(self, key: tuple[str, str]) -> threading.RLock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.RLock())
+
+    def _refresh(self, key: tuple[str, str], persistent: bool) -> str:
+        """Fetches a new token, the caller holds the lock of the key"""
+        with self._lock:
+            fetch = self._fetch[key]
+
+        token = fetch()
+
+        with self._lock:
+            self.fetched += 1
+            self._tokens[key] = CachedToken(token=token, expires_at=token_expiry(token), persistent=persistent)
+            self._keys[token] = key
+
+            if persistent:
+                self._write()
+
+        return token
+
+    def _read(self) -> dict[tuple[str, str], CachedToken]:
+        if self.path is None:
+            return {}
+
+        try:
+            data = json.loads(self.fernet.decrypt(self.path.read_bytes()))
+        except (OSError, InvalidToken, ValueError):
+            return {}
+
+        tokens = {(kind, subject): CachedToken(token, expires_at, persistent=True) for kind, subject, token, expires_at in data}
+        return {key: cached for key, cached in tokens.items() if not cached.expires_soon()}
+
+    def _write(self):
+        if self.path is None:
+            return
+
+        data = [
+            (kind, subject, cached.token, cached.expires_at)
+            for (kind, subject), cached in self._tokens.items()
+            if cached.persistent and not cached.expires_soon()
+        ]
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that parallel workers never read a partially written file
+        tmp_path = self.path.with_suffix(f'.{os.getpid()}.tmp')
+        tmp_path.write_bytes(self.fernet.encrypt(json.dumps(data).encode()))
+        os.replace(tmp_path, self.path)
+
+class TokenRefreshAdapter(BaseAdapter):
+    """Transport adapter that replaces outdated tokens and retries requests whose token was rejected"""
+    def __init__(self, cache: TokenCache, adapter: BaseAdapter):
+        super().__init__()
+        self.cache = cache
+        self.adapter = adapter
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        token = authorization_token(request)
+        if token is not None:
+            set_authorization_token(request, self.cache.current(token))
+
+        response = self.adapter.send(request, **kwargs)
+
+        if response.status_code == 401 and token is not None:
+            new_token = self.cache.reject(authorization_token(request))
+            if new_token is not None:
+                set_authorization_token(request, new_token)
+                response = self.adapter.send(request, **kwargs)
+                response.retries = getattr(response, 'retries', 0) + 1
+
+        return response
+
+    def close(self):
+        self.adapter.close()
+
+def authorization_token(request: PreparedRequest) -> Optional[str]:
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return token if scheme in ('Bearer', 'Token') and token else None
+
+def set_authorization_token(request: PreparedRequest, token: str):
+    scheme, _, _ = request.headers['Authorization'].partition(' ')
+    request.headers['Authorization'] = f'{scheme} {token}'
+
+def token_expiry(token: str) -> Optional[float]:
+    """Returns the "exp" claim of a JWT (base tokens, temporary API tokens), None for other tokens"""
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4)))
+    except ValueError:
+        return None
+
+    exp = payload.get('exp') if isinstance(payload, dict) else None
+    return float(exp) if isinstance(exp, (int, float)) else None
@@ -0,0 +1,217 @@
+"""
+Uploads files to the assets of a base through the upload links of the file API.
+
+Files are streamed from disk: the multipart body is produced in chunks of CHUNK_SIZE bytes while it is sent, so no file
+is ever held in memory as a whole. The body can be iterated more than once (the file is opened again), so requests that
+are retried by the rate limiter or the token cache are sent again in full. An upload link (getUploadLink) is reused for
+all uploads until it is older than UPLOAD_LINK_MAX_AGE or the server rejects it. Uploads run concurrently in worker
+threads, and every uploaded file is returned with the value to put into an image or file column.
+
+Can also be run on its own:
+
+    python uploads.py --workspace-id 1 --base-name "My Base" --images photos/*.jpg
+"""
+import argparse
+import json
+import mimetypes
+import os
+import secrets
+import sys
+import threading
+import time
+from concurrency import MAX_CONCURRENT_REQUESTS, run_concurrently
+from dataclasses import dataclass, field
+from pathlib import Path
+from requests import Response
+from schemas import SchemaRegistry
+from typing import Any, Iterator, Optional, Union
+
+CHUNK_SIZE = 64 * 1024
+# Upload links are only valid for some minutes (see getUploadLink in file_operations.yaml)
+UPLOAD_LINK_MAX_AGE = int(os.environ.get('UPLOAD_LINK_MAX_AGE', 180))
+
+class MultipartFile:
+    """A multipart/form-data body with some form fields and one file, read from disk while it is sent"""
+    def __init__(self, fields: dict[str, Any], path: Path, filename: Optional[str] = None, content_type: Optional[str] = None):
+        self.path = path
+        self.boundary = secrets.token_hex(16)
+        filename = filename or path.name
+        content_type = content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+        head = ''.join(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        )
+        self.head = head.encode()
+        self.tail = f'\r\n--{self.boundary}--\r\n'.encode()
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def __len__(self) -> int:
+        # Lets requests send a Content-Length header instead of using chunked transfer encoding
+        return len(self.head) + self.path.stat().st_size + len(self.tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self.head
+        with open(self.path, 'rb') as file:
+            while chunk := file.read(CHUNK_SIZE):
+                yield chunk
+        yield self.tail
+
+@dataclass
+class UploadedFile:
+    path: Path
+    name: str
+    size: int
+    # /workspace/{workspace_id}/asset/... as expected by image and file columns
+    url: str
+    image: bool
+
+    @property
+    def cell_value(self) -> Union[str, dict]:
+        """The value of this file in an image column (the URL) or a file column (name, size, type and URL)"""
+        if self.image:
+            return self.url
+
+        return {'name': self.name, 'size': self.size, 'type': 'file', 'url': self.url}
+
+@dataclass
+class UploadResult:
+    files: list[UploadedFile] = field(default_factory=list)
+    upload_links: int = 0
+    seconds: float = 0
+
+    @property
+    def bytes(self) -> int:
+        return sum(file.size for file in self.files)
+
+    @property
+    def files_per_second(self) -> float:
+        return len(self.files) / self.seconds if self.seconds else 0
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.bytes / 1_000_000 / self.seconds if self.seconds else 0
+
+    def __str__(self):
+        return (
+            f'{len(self.files)} files ({self.bytes / 1_000_000:.1f} MB) in {self.seconds:.1f} seconds '
+            f'({self.files_per_second:.1f} files/s, {self.megabytes_per_second:.1f} MB/s, {self.upload_links} upload links)'
+        )
+
+class UploadLinkRejected(Exception):
+    """Raised if the server rejects an upload link that was just fetched"""
+
+class Uploader:
+    """Uploads files to the base the API token belongs to"""
+    def __init__(self, schemas: SchemaRegistry, session: Any, api_token: str, workspace_id: int,
+                 concurrency: int = MAX_CONCURRENT_REQUESTS, link_max_age: float = UPLOAD_LINK_MAX_AGE, replace: bool = False):
+        self.file_operations = schemas.get('file_operations.yaml')
+        self.session = session
+        self.api_token = api_token
+        self.workspace_id = workspace_id
+        self.concurrency = max(concurrency, 1)
+        self.link_max_age = link_max_age
+        # Overwrite files with the same name, otherwise the server renames the uploaded file (e.g. "name (1).ext")
+        self.replace = replace
+        self.upload_links = 0
+        # (upload link data, time.monotonic() when it was fetched)
+        self._link: Optional[tuple[dict, float]] = None
+        self._lock = threading.Lock()
+
+    def upload_link(self, rejected: Optional[dict] = None) -> dict:
+        """Returns the current upload link, fetches a new one if it is too old or if it is `rejected`"""
+        with self._lock:
+            if self._link is not None and self._link[0] is not rejected and time.monotonic() - self._link[1] < self.link_max_age:
+                return self._link[0]
+
+            headers = {'Authorization': f'Bearer {self.api_token}'}
+            response = self.file_operations.get_operation_by_id('getUploadLink').make_case(headers=headers).call_and_validate()
+            assert response.status_code == 200, f'getUploadLink failed: {response.text}'
+
+            self._link = (response.json(), time.monotonic())
+            self.upload_links += 1
+            return self._link[0]
+
+    def upload(self, path: Path, image: Optional[bool] = None, filename: Optional[str] = None) -> UploadedFile:
+        """
+        Uploads a single file, as image (to the image folder) or as file. By default, files with an image MIME type
+        are uploaded as images.
+        """
+        filename = filename or path.name
+        if image is None:
+            image = (mimetypes.guess_type(filename)[0] or '').startswith('image/')
+
+        link = self.upload_link()
+        response = self._send(link, path, image, filename)
+        if response.status_code in (403, 404):
+            # The upload link expired earlier than expected
+            link = self.upload_link(rejected=link)
+            response = self._send(link, path, image, filename)
+            if response.status_code in (403, 404):
+                raise UploadLinkRejected(f'Upload link rejected: {response.text}')
+
+        assert response.status_code == 200, f'Upload of {path} failed: {response.text}'
+        uploaded = response.json()[0]
+
+        relative_path = link['img_relative_path'] if image else link['file_relative_path']
+        return UploadedFile(
+            path=path,
+            name=uploaded['name'],
+            size=uploaded['size'],
+            url=f'/workspace/{self.workspace_id}{link["parent_path"]}/{relative_path}/{uploaded["name"]}',
+            image=image,
+        )
+
+    def upload_many(self, paths: list[Path], image: Optional[bool] = None) -> UploadResult:
+        """Uploads all files, `concurrency` at a time, and returns them in the order of `paths`"""
+        links_before = self.upload_links
+        start = time.perf_counter()
+
+        files = run_concurrently(*(lambda path=path: self.upload(path, image) for path in paths), limit=self.concurrency)
+
+        return UploadResult(files=files, upload_links=self.upload_links - links_before, seconds=time.perf_counter() - start)
+
+    def _send(self, link: dict, path: Path, image: bool, filename: str) -> Response:
+        fields = {
+            'parent_dir': link['parent_path'],
+            'relative_path': link['img_relative_path'] if image else link['file_relative_path'],
+            'replace': 1 if self.replace else 0,
+        }
+        body = MultipartFile(fields, path, filename=filename)
+        headers = {'Accept': 'application/json', 'Content-Type': body.content_type}
+
+        return self.session.post(f'{link["upload_link"]}?ret-json=1', data=body, headers=headers)
+
+def main():
+    parser = argparse.ArgumentParser(description='Uploads files to a base and prints their image/file column values as JSON')
+    parser.add_argument('--workspace-id', type=int, required=True)
+    parser.add_argument('--base-name', required=True)
+    parser.add_argument('--images', type=Path, nargs='*', default=[], help='Files to upload as images')
+    parser.add_argument('--files', type=Path, nargs='*', default=[], help='Files to upload as files')
+    parser.add_argument('--concurrency', type=int, default=MAX_CONCURRENT_REQUESTS, help='Uploads in flight (default: %(default)s)')
+    args = parser.parse_args()
+
+    # Uses the same configuration (environment variables) as the tests
+    from accounts import connect, get_api_token, login
+
+    schemas, http_session = connect()
+    api_token = get_api_token(schemas, login(schemas), args.workspace_id, args.base_name)
+    uploader = Uploader(schemas, http_session, api_token.value, args.workspace_id, concurrency=args.concurrency)
+    images = uploader.upload_many(args.images, image=True)
+    files = uploader.upload_many(args.files, image=False)
+
+    print(json.dumps({
+        'images': [file.cell_value for file in images.files],
+        'files': [file.cell_value for file in files.files],
+    }, indent=2))
+    print(f'Uploaded {images}, {files}', file=sys.stderr)
+
+if __name__ == '__main__':
+    main()